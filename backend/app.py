@@ -1,29 +1,37 @@
 import os
+import asyncio
+import csv
+import io
 import json
+import re
+import time
 from datetime import datetime, timedelta
 from functools import lru_cache
 from typing import List, Optional, Dict, Any
 
-import jwt
 import requests
 from dotenv import load_dotenv
 from fastapi import Body, Depends, FastAPI, HTTPException, Request, status, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient, ReturnDocument
-from pymongo.collection import Collection
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from bson import ObjectId
 
-# Import RAG handler
-try:
-    from rag import ChatHandler
-except ImportError:
-    ChatHandler = None
+from auth import ClerkVerifier, TokenCache
+from chat_cache import MemoryStore, RedisStore
+from dedup import best_match, dedup_keys, normalize_nuid
+from questions import QuestionStore
+from repository import OPEN_STATUSES, ApplicationNotFound, ClaimConflict, create_repository, get_path
+from roster import (
+    Level, Permission, RosterIndex, StaffMember, classify_role, normalize_branch, reviewable_levels, save_roster
+)
+from startup import DISABLED, FAILED, PENDING, READY, Readiness
 
 # Import Google Sheets Roster Loader
 try:
-    from google_sheets import fetch_roster_from_sheets
+    from google_sheets import RosterSync
 except ImportError:
-    fetch_roster_from_sheets = None
+    RosterSync = None
 
 load_dotenv()
 
@@ -34,76 +42,271 @@ def get_settings():
     if not mongo_uri:
         print("WARNING: MONGO environment variable not set.")
         mongo_uri = "mongodb://localhost:27017"
+
+    # "google" (Gemini) or "local" (hashing embeddings + extractive answers, no network)
+    chat_provider = os.getenv("CHAT_PROVIDER", "google").lower()
+    vector_store = os.getenv("VECTOR_STORE", "chroma").lower()
+    # Vectors from different providers don't mix, so each gets its own store by default
+    # (same naming as vector_store.default_store_dir, which needs the chat dependencies)
+    if vector_store == "chroma":
+        vector_store_dir = "chroma_db" if chat_provider == "google" else f"chroma_db_{chat_provider}"
+    else:
+        vector_store_dir = f"{vector_store}_db_{chat_provider}"
     
     return {
         "mongo_uri": mongo_uri,
+        "mongo_max_pool_size": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "mongo_min_pool_size": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "mongo_timeout_ms": int(os.getenv("MONGO_TIMEOUT_MS", "5000")),
+        # How long a reviewer's claim on an application lasts before it returns to the queue
+        "claim_lease_minutes": int(os.getenv("CLAIM_LEASE_MINUTES", "120")),
+        # Name/email similarity at which a new application is flagged as a possible duplicate
+        "dedup_threshold": float(os.getenv("DEDUP_THRESHOLD", "0.8")),
+        # "mongo" or "memory" (in-process store for tests / load benchmarks)
+        "data_backend": os.getenv("DATA_BACKEND", "mongo").lower(),
         "google_api_key": os.getenv("GOOGLE_API_KEY"),
+        "chat_provider": chat_provider,
+        "chat_embedding_model": os.getenv("CHAT_EMBEDDING_MODEL", "models/embedding-001"),
+        "chat_model": os.getenv("CHAT_MODEL", "gemini-pro"),
+        # "background": build the chat handler right after startup; "lazy": on the first chat request
+        "chat_init": os.getenv("CHAT_INIT", "background").lower(),
+        # "chroma" or "numpy" (in-memory matrix, memory-mapped on disk; for small knowledge bases)
+        "vector_store": vector_store,
+        "vector_store_dir": os.getenv("VECTOR_STORE_DIR") or os.getenv("CHROMA_DIR") or vector_store_dir,
+        # Concurrent /api/chat calls allowed per worker, and how long one may take
+        "chat_max_concurrency": int(os.getenv("CHAT_MAX_CONCURRENCY", "4")),
+        "chat_timeout_seconds": float(os.getenv("CHAT_TIMEOUT_SECONDS", "30")),
+        # Chat sessions kept for follow-up questions, and the prompt budgets (tokens)
+        "chat_max_sessions": int(os.getenv("CHAT_MAX_SESSIONS", "1000")),
+        "chat_session_idle_minutes": int(os.getenv("CHAT_SESSION_IDLE_MINUTES", "30")),
+        "chat_history_tokens": int(os.getenv("CHAT_HISTORY_TOKENS", "800")),
+        "chat_context_tokens": int(os.getenv("CHAT_CONTEXT_TOKENS", "1500")),
+        # Target size of knowledge-base chunks; keep in sync with ingest.py (same env var)
+        "chat_chunk_tokens": int(os.getenv("CHAT_CHUNK_TOKENS", "400")),
+        # "hybrid" (BM25 + vectors, lexical fast path) or "vector"
+        "chat_retrieval": os.getenv("CHAT_RETRIEVAL", "hybrid").lower(),
+        "chat_cache_size": int(os.getenv("CHAT_CACHE_SIZE", "256")),
+        "chat_cache_ttl_seconds": int(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600")),
+        # Cosine similarity above which a new question reuses a cached answer (unset = exact matches only)
+        "chat_cache_similarity": float(os.getenv("CHAT_CACHE_SIMILARITY")) if os.getenv("CHAT_CACHE_SIMILARITY") else None,
+        # Shared answer cache across workers; in-process LRU when unset
+        "chat_cache_redis_url": os.getenv("CHAT_CACHE_REDIS_URL"),
         "jwt_secret": os.getenv("JWT_SECRET", "dev-secret"),
-        "clerk_secret": os.getenv("CLERK_SECRET_KEY", "sk_test_1u0fLiKqdZsGWR52WCJgYehw5msMUbdcJSfiAcM07D")
+        "clerk_secret": os.getenv("CLERK_SECRET_KEY", "sk_test_1u0fLiKqdZsGWR52WCJgYehw5msMUbdcJSfiAcM07D"),
+        "clerk_jwks_url": os.getenv("CLERK_JWKS_URL", "https://api.clerk.com/v1/jwks"),
+        # Local JWKS file (offline testing); takes precedence over the URL when set
+        "clerk_jwks_path": os.getenv("CLERK_JWKS_PATH"),
+        "clerk_issuer": os.getenv("CLERK_ISSUER"),
+        "jwks_refresh_minutes": int(os.getenv("JWKS_REFRESH_MINUTES", "60")),
+        # How often the roster is re-synced from Google Sheets (0 = only at startup)
+        "roster_sync_minutes": float(os.getenv("ROSTER_SYNC_MINUTES", "10")),
+        "token_cache_size": int(os.getenv("TOKEN_CACHE_SIZE", "1024")),
+        "token_cache_ttl_seconds": int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60")),
     }
 
 
 settings = get_settings()
 
-# Database setup
-client = MongoClient(settings["mongo_uri"])
-db = client["recruitment"]
-users_collection: Collection = db["users"]
-applications_collection: Collection = db["applications"]
-decisions_collection: Collection = db["decisions"]
+# Startup phases, reported by /api/health/ready. Requests are served while they run;
+# only the database gates readiness, everything else degrades on its own.
+readiness = Readiness(required=("database",))
 
-# Ensure indexes
-users_collection.create_index("email", unique=True)
-applications_collection.create_index("email")
-applications_collection.create_index("branch")
-applications_collection.create_index("status")
+# Database setup (connections are opened lazily; indexes are ensured in the background)
+repo = create_repository(settings)
+
+token_verifier = ClerkVerifier(
+    jwks_url=settings["clerk_jwks_url"],
+    secret_key=settings["clerk_secret"],
+    jwks_path=settings["clerk_jwks_path"],
+    issuer=settings["clerk_issuer"],
+    refresh_seconds=settings["jwks_refresh_minutes"] * 60,
+    cache=TokenCache(settings["token_cache_size"], settings["token_cache_ttl_seconds"]),
+)
+background_tasks = []
 
 # Initialize Chat Handler
-chat_handler = ChatHandler(settings["google_api_key"]) if ChatHandler and settings["google_api_key"] else None
+def create_answer_store(settings: dict):
+    if settings["chat_cache_redis_url"]:
+        return RedisStore(settings["chat_cache_redis_url"], ttl=settings["chat_cache_ttl_seconds"])
+    return MemoryStore(settings["chat_cache_size"], settings["chat_cache_ttl_seconds"])
+
+
+def create_chat_handler(settings: dict):
+    """Blocking (opens the vector store, may embed the default knowledge); run off the event loop."""
+    try:
+        # Imported here: LangChain and the vector store are slow to import
+        from rag import ChatHandler
+        from providers import create_providers
+        from conversation import ConversationStore
+    except ImportError as e:
+        print(f"Chat disabled: {e}")
+        return None
+    try:
+        embeddings, llm = create_providers(
+            settings["chat_provider"],
+            api_key=settings["google_api_key"],
+            embedding_model=settings["chat_embedding_model"],
+            chat_model=settings["chat_model"],
+        )
+    except Exception as e:
+        print(f"Chat disabled: {e}")
+        return None
+    return ChatHandler(
+        embeddings,
+        llm,
+        persist_directory=settings["vector_store_dir"],
+        vector_store=settings["vector_store"],
+        max_concurrency=settings["chat_max_concurrency"],
+        timeout=settings["chat_timeout_seconds"],
+        cache_store=create_answer_store(settings),
+        cache_similarity=settings["chat_cache_similarity"],
+        retrieval=settings["chat_retrieval"],
+        conversations=ConversationStore(
+            settings["chat_max_sessions"],
+            settings["chat_session_idle_minutes"] * 60,
+            settings["chat_history_tokens"],
+        ),
+        context_tokens=settings["chat_context_tokens"],
+        chunk_tokens=settings["chat_chunk_tokens"],
+    )
 
-# Load Roster
-ROSTER = []
+
+chat_handler = None
+chat_init: Optional[asyncio.Task] = None
+
+# Last good roster (written by every Sheets sync) serves traffic from the first request
+ROSTER_PATH = "data/roster.json"
+roster_index = RosterIndex([])
+_roster_started = time.perf_counter()
 try:
-    with open("data/roster.json", "r") as f:
-        ROSTER = json.load(f)
-    print(f"Loaded {len(ROSTER)} staff members from roster.")
+    roster_index = RosterIndex.load(ROSTER_PATH)
+    print(f"Loaded {len(roster_index)} staff members from roster.")
+    readiness.set("roster", READY, f"{len(roster_index)} members from roster.json", time.perf_counter() - _roster_started)
 except Exception as e:
     print(f"Warning: Could not load roster.json: {e}")
-    ROSTER = []
+    readiness.set("roster", FAILED, str(e), time.perf_counter() - _roster_started)
+
+question_store = QuestionStore("data/questions.json")
+
 
+def set_roster(records: List[dict]):
+    """Swap in a freshly built roster index (single reference assignment)."""
+    global roster_index
+    roster_index = RosterIndex(records)
 
-def get_roster_user(email: str):
+
+def get_roster_user(email: str) -> Optional[StaffMember]:
     """Find user in roster by email (case-insensitive)."""
-    if not email: 
-        return None
-    email = email.lower()
-    for user in ROSTER:
-        if user.get("email", "").lower() == email:
-            return user
-    return None
+    return roster_index.get(email)
+
+
+roster_sync = RosterSync(
+    apply=set_roster,
+    current=lambda: roster_index.records,
+    path=ROSTER_PATH,
+    interval_seconds=settings["roster_sync_minutes"] * 60,
+) if RosterSync else None
 
 
 # FastAPI application
 app = FastAPI(title="Generate Recruitment Backend", version="1.0.0")
 
+async def seed_metrics():
+    # First boot (or counters lost): seed them from the applications
+    if not (await repo.dashboard_metrics())["branches"]:
+        await repo.rebuild_metrics()
+
+
+async def init_database():
+    # Mongo may come up after the API does: keep retrying, readiness stays 503 meanwhile
+    while True:
+        await readiness.run("database", repo.ensure_indexes)
+        if readiness.status("database") == READY:
+            break
+        await asyncio.sleep(10)
+    await readiness.run("metrics", seed_metrics)
+
+
+async def init_chat():
+    global chat_handler
+    chat_handler = await readiness.run("chat", create_chat_handler, settings, blocking=True)
+    if chat_handler is None and readiness.status("chat") == READY:
+        readiness.set("chat", DISABLED, "Check API Key or CHAT_PROVIDER")
+
+
+def start_chat_init() -> asyncio.Task:
+    global chat_init
+    if chat_init is None:
+        chat_init = asyncio.create_task(init_chat())
+        background_tasks.append(chat_init)
+    return chat_init
+
+
+async def get_chat_handler():
+    """The chat handler, waiting (up to the chat timeout) for it if it is still being built."""
+    task = start_chat_init()
+    if not task.done():
+        try:
+            # shield: a client giving up must not cancel the shared initialization
+            await asyncio.wait_for(asyncio.shield(task), settings["chat_timeout_seconds"])
+        except asyncio.TimeoutError:
+            raise HTTPException(503, detail="Chat is starting up, try again shortly", headers={"Retry-After": "10"})
+    return chat_handler
+
+
+async def start_roster_sync():
+    if not roster_sync:
+        readiness.set("roster_sheets", DISABLED, "Google Sheets client not installed")
+        return
+    if not roster_sync.configured:
+        readiness.set("roster_sheets", DISABLED, "No service account file; serving roster.json")
+        return
+    print("Syncing roster from Google Sheets...")
+    # Keeps going after a failed first sync: Sheets being down at boot is not permanent
+    while True:
+        result = await readiness.run("roster_sheets", roster_sync.sync, blocking=True)
+        if result:
+            readiness.set("roster_sheets", READY, f"{result['result']}, {len(roster_index)} members")
+        if settings["roster_sync_minutes"] <= 0:
+            return
+        await asyncio.sleep(roster_sync.interval_seconds)
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Load roster from Google Sheets on startup"""
-    if fetch_roster_from_sheets:
-        print("Fetching roster from Google Sheets...")
-        try:
-            fetch_roster_from_sheets()
-        except Exception as e:
-            print(f"Startup Roster Fetch Failed: {e}")
-            
-    # Reload global ROSTER variable
-    global ROSTER
-    try:
-        with open("data/roster.json", "r") as f:
-            ROSTER = json.load(f)
-        print(f"Loaded {len(ROSTER)} staff members.")
-    except:
-        print("No roster.json found.")
+    """
+    Nothing slow runs before the server accepts traffic: indexes, the Sheets
+    roster and the chat handler are set up by background tasks (see /api/health/ready).
+    """
+    background_tasks.append(asyncio.create_task(token_verifier.refresh_forever()))
+    background_tasks.append(asyncio.create_task(init_database()))
+    background_tasks.append(asyncio.create_task(start_roster_sync()))
+    if settings["chat_init"] == "lazy":
+        readiness.set("chat", PENDING, "Built on the first chat request")
+    else:
+        start_chat_init()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    await repo.close()
+
+
+@app.get("/api/health")
+def health():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@app.get("/api/health/ready")
+def health_ready(response: Response):
+    """Readiness: per-component startup status and timings; 503 until the database is set up."""
+    report = readiness.report()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
 
 
 app.add_middleware(
@@ -112,6 +315,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -126,9 +330,8 @@ async def verify_clerk_token(request: Request):
 
     try:
         token = auth_header.split(" ")[1] if " " in auth_header else auth_header
-        # Decode without verify for MVP speed
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        return decoded
+        # Signature checked against Clerk's JWKS; repeat tokens come from the claims cache
+        return await token_verifier.verify(token)
     except Exception as e:
         print(f"Token verification failed: {e}")
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -138,6 +341,77 @@ def get_current_user_email(token: dict = Depends(verify_clerk_token)):
     return token.get("email") or token.get("sub")
 
 
+def lease_window():
+    """(now, lease expiry) for a claim taken or renewed now."""
+    now = datetime.utcnow()
+    return now, now + timedelta(minutes=settings["claim_lease_minutes"])
+
+
+def validate_app_id(app_id: str) -> str:
+    if not ObjectId.is_valid(app_id):
+        raise HTTPException(status_code=400, detail="Invalid ID")
+    return app_id
+
+
+# Statuses a decision may set (each is counted in the dashboard metrics)
+DECISION_STATUSES = {"accepted", "rejected", "interview", "waitlisted"}
+
+
+def validate_decision(decision) -> str:
+    if not isinstance(decision, str) or decision not in DECISION_STATUSES:
+        raise HTTPException(
+            status_code=422, detail=f"decision must be one of {sorted(DECISION_STATUSES)}, got {decision!r}"
+        )
+    return decision
+
+
+# FastAPI caches dependency results per request, so the token is decoded and
+# the roster looked up once no matter how many of these a route pulls in.
+
+def get_staff_member(user_token: dict = Depends(verify_clerk_token)) -> Optional[StaffMember]:
+    return get_roster_user(user_token.get("email"))
+
+
+def require_staff(member: Optional[StaffMember] = Depends(get_staff_member)) -> StaffMember:
+    if not member:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return member
+
+
+def require_admin(member: Optional[StaffMember] = Depends(get_staff_member)) -> StaffMember:
+    if not member or not member.can(Permission.ADMIN):
+        raise HTTPException(status_code=403, detail="Admin access only")
+    return member
+
+
+def require_bulk_reviewer(member: StaffMember = Depends(require_staff)) -> StaffMember:
+    if not member.can(Permission.BULK_REVIEW):
+        raise HTTPException(status_code=403, detail="Bulk operations are limited to Chiefs and above")
+    return member
+
+
+async def stream_grouped_json(rows, group_key: str):
+    """
+    Stream rows already ordered by `group_key` as one JSON object:
+    {group: [row, ...], ...}, without holding more than one row in memory.
+    """
+    current = None
+    yield b"{"
+    async for row in rows:
+        group = row.pop(group_key)
+        if group != current:
+            if current is not None:
+                yield b"],"
+            yield json.dumps(group).encode() + b":["
+            current = group
+        else:
+            yield b","
+        yield json.dumps(jsonable_encoder(row)).encode()
+    if current is not None:
+        yield b"]"
+    yield b"}"
+
+
 # --- Auth / Roster Routes ---
 
 @app.get("/api/auth/me")
@@ -163,9 +437,9 @@ def get_current_user_info(token: dict = Depends(verify_clerk_token)):
     return {
         "authorized": True,
         "email": email,
-        "role": roster_user["role"],
-        "branch": roster_user["branch"],
-        "name": roster_user["name"]
+        "role": roster_user.role,
+        "branch": roster_user.branch,
+        "name": roster_user.name
     }
 
 
@@ -173,49 +447,28 @@ def get_current_user_info(token: dict = Depends(verify_clerk_token)):
 
 @app.get("/api/forms/questions")
 def get_form_questions(
+    request: Request,
     branch: str = Query(...),
     role: str = Query(...)
 ):
     """
     Get dynamic questions based on Branch and Role.
     Merges: Global Default + Branch Default + Role Specific
+    (precomposed by QuestionStore; revalidated with ETag / If-None-Match)
     """
-    try:
-        with open("data/questions.json", "r") as f:
-            all_questions = json.load(f)
-    except Exception as e:
-        print(f"Error loading questions: {e}")
-        return []
+    question_set = question_store.get(branch, role)
+    headers = {"ETag": question_set.etag, "Cache-Control": "no-cache"}
 
-    questions = []
-    
-    # 1. Global Defaults
-    if "default" in all_questions:
-        questions.extend(all_questions["default"])
-        
-    # 2. Branch Defaults
-    branch_data = all_questions.get("branches", {}).get(branch, {})
-    if "default" in branch_data:
-        questions.extend(branch_data["default"])
-        
-    # 3. Role Specific
-    # Handle "Chief", "Lead", "Member" mapping if exact match not found
-    # Simple keyword matching
-    role_key = role
-    if "chief" in role.lower(): role_key = "Chief"
-    elif "lead" in role.lower(): role_key = "Lead"
-    elif "member" in role.lower(): role_key = "Member"
-    
-    role_questions = branch_data.get("roles", {}).get(role_key, [])
-    questions.extend(role_questions)
-    
-    return questions
+    if request.headers.get("if-none-match") == question_set.etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=question_set.body, media_type="application/json", headers=headers)
 
 
 # --- Application Routes ---
 
 @app.post("/api/applications/create")
-def create_application(
+async def create_application(
     data: dict = Body(...),
     user_token: dict = Depends(verify_clerk_token)
 ):
@@ -228,6 +481,9 @@ def create_application(
         "email": data["email"],
         "role": data["role"],
         "branch": data["branch"],
+        # Indexed lookup keys for the review queue / reports
+        "branchKey": normalize_branch(data["branch"]),
+        "roleLevel": int(classify_role(data["role"])),
         "branchColor": data.get("branchColor", ""),
         "status": "submitted",
         "submittedAt": datetime.utcnow(),
@@ -237,9 +493,34 @@ def create_application(
         "formData": data.get("formData", {}),
         "isSubmitted": True
     }
-
-    result = applications_collection.insert_one(application)
-    application["_id"] = str(result.inserted_id)
+    # Digits only, zero-padded (see dedup.normalize_nuid); looked up below to catch resubmissions
+    nuid = normalize_nuid(data.get("nuid") or application["formData"].get("nuid"))
+    if nuid:
+        if len(nuid) != 9:
+            raise HTTPException(status_code=400, detail="Invalid NUID")
+        application["nuid"] = nuid
+    application["dedupKeys"] = dedup_keys(application)
+
+    # Same person, branch and role already on file: by email / NUID it's a resubmission,
+    # by name alone it's flagged for reviewers (see dedup.py)
+    candidates = await repo.find_duplicate_candidates(
+        application["dedupKeys"], application["branchKey"], application["role"]
+    )
+    match = best_match(application["dedupKeys"], candidates, settings["dedup_threshold"])
+    if match is not None:
+        existing, score, exact = match
+        if exact:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "code": "already_applied",
+                    "message": "You have already applied for this role",
+                    "application_id": existing["_id"],
+                },
+            )
+        application["possibleDuplicateOf"] = {"application_id": existing["_id"], "score": round(score, 3)}
+
+    application["_id"] = await repo.create_application(application)
 
     # No email sent (per user request)
     
@@ -247,7 +528,7 @@ def create_application(
 
 
 @app.get("/api/applications/get/{email}")
-def get_applications_by_email(
+async def get_applications_by_email(
     email: str,
     user_token: dict = Depends(verify_clerk_token)
 ):
@@ -256,20 +537,12 @@ def get_applications_by_email(
     # token_email = user_token.get("email")
     # if token_email and token_email != email: raise 403
     
-    apps = list(applications_collection.find({"email": email}))
-    for doc in apps:
-        doc["_id"] = str(doc["_id"])
-    return apps
+    return await repo.list_applications_by_email(email)
 
 @app.get("/api/applications/{app_id}")
-def get_application_detail(app_id: str):
-    try:
-        oid = ObjectId(app_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid ID")
-    doc = applications_collection.find_one({"_id": oid})
+async def get_application_detail(app_id: str = Depends(validate_app_id)):
+    doc = await repo.get_application(app_id)
     if doc:
-        doc["_id"] = str(doc["_id"])
         return doc
     raise HTTPException(status_code=404)
 
@@ -277,322 +550,500 @@ def get_application_detail(app_id: str):
 # --- Review Routes (Hierarchy Enforced) ---
 
 @app.get("/api/review/queue/{branch}")
-def get_review_queue(
+async def get_review_queue(
     branch: str,
-    user_token: dict = Depends(verify_clerk_token)
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=200),
+    roster_user: Optional[StaffMember] = Depends(get_staff_member)
 ):
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    
+    """
+    One page of the review queue. Pass the X-Next-Cursor response header back
+    as `cursor` to get the following page.
+    """
     if not roster_user:
         raise HTTPException(status_code=403, detail="Access Denied: Not in staff roster.")
+    email = roster_user.email
     
     # Hierarchy Check
-    user_role = roster_user.get("role", "").lower()
-    user_branch = roster_user.get("branch", "").lower()
-    
     # Executive Director sees all
-    if "executive" in user_role:
-        pass # No filter restrictions
-    elif user_branch != branch.lower():
-         raise HTTPException(status_code=403, detail=f"Access Denied: You belong to {user_branch}, not {branch}.")
+    if not roster_user.can_access_branch(branch):
+         raise HTTPException(status_code=403, detail=f"Access Denied: You belong to {roster_user.branch_key}, not {branch}.")
+
+    if cursor and not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # Role Filtering
-    # Logic: 
+    # Role Filtering (applied in the query on the stored roleLevel)
     # Director -> Sees "Chief" or "Lead" applications
     # Chief -> Sees "Member" (anything else)
-    
-    filter_regex = ""
-    
-    if "director" in user_role and "executive" not in user_role:
-        # Director sees Chiefs and Leads
-        filter_regex = "chief|lead|head"
-    elif "chief" in user_role:
-        # Chief sees Members (Not Chief, Not Director)
-        # Easier to just say: Not Chief, Not Director
-        # But regex for "not" is hard in basic find without $not.
-        # Let's fetch and filter in python for MVP simplicity/flexibility
-        pass
-    
-    # Base Query
-    cutoff = datetime.utcnow() - timedelta(hours=2)
-    query = {
-        "branch": {"$regex": f"^{branch}$", "$options": "i"}, # Case insensitive branch match
-        "status": {"$in": ["submitted", "under_review"]},
-        "$or": [
-            {"claimed_by": {"$exists": False}},
-            {"claimed_at": {"$lt": cutoff}},
-            {"claimed_by": email} # Show apps I claimed
-        ]
-    }
-    
-    cursor = applications_collection.find(query).limit(100)
-    apps = []
-    
-    for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        app_role = doc.get("role", "").lower()
-        
-        include = True
-        if "director" in user_role and "executive" not in user_role:
-            # Only show Chiefs/Leads
-            if not ("chief" in app_role or "lead" in app_role):
-                include = False
-        elif "chief" in user_role:
-            # Only show Members (NOT chiefs/directors)
-            if "chief" in app_role or "director" in app_role:
-                include = False
-                
-        if include:
-            apps.append(doc)
+    levels = reviewable_levels(roster_user.level)
 
+    # Base Query: unclaimed, expired leases, or apps I claimed
+    apps, next_cursor = await repo.review_queue(
+        normalize_branch(branch), email, datetime.utcnow(), levels, after=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return apps
 
 
 @app.post("/api/review/claim/{app_id}")
-def claim_application(
-    app_id: str,
-    user_token: dict = Depends(verify_clerk_token)
+async def claim_application(
+    app_id: str = Depends(validate_app_id),
+    roster_user: StaffMember = Depends(require_staff)
 ):
-    email = user_token.get("email")
-    if not get_roster_user(email):
-        raise HTTPException(status_code=403, detail="Not authorized")
-
+    now, lease_expires_at = lease_window()
     try:
-        oid = ObjectId(app_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid ID")
+        await repo.claim_application(app_id, roster_user.email, now, lease_expires_at)
+    except ApplicationNotFound:
+        raise HTTPException(404)
+    except ClaimConflict as e:
+        current_status = e.args[0] if e.args else None
+        if current_status not in OPEN_STATUSES:
+            raise HTTPException(409, detail="Application already decided")
+        raise HTTPException(409, detail="Already claimed")
+    return {"message": "Claimed", "lease_expires_at": lease_expires_at}
+
+
+@app.post("/api/review/claim-next/{branch}")
+async def claim_next_applications(
+    branch: str,
+    count: int = Query(1, ge=1, le=50),
+    roster_user: StaffMember = Depends(require_staff)
+):
+    """
+    Claim the next `count` unclaimed applications in a branch that the caller
+    is allowed to review, in queue order.
+    """
+    if not roster_user.can_access_branch(branch):
+        raise HTTPException(status_code=403, detail="Access denied to this branch.")
 
-    # Claim logic
-    app = applications_collection.find_one({"_id": oid})
-    if not app: raise HTTPException(404)
-    
-    cutoff = datetime.utcnow() - timedelta(hours=2)
-    if app.get("claimed_by") and app.get("claimed_by") != email:
-        if app.get("claimed_at") and app["claimed_at"] > cutoff:
-             raise HTTPException(409, detail="Already claimed")
-
-    applications_collection.update_one(
-        {"_id": oid},
-        {"$set": {"claimed_by": email, "claimed_at": datetime.utcnow(), "status": "under_review"}}
+    now, lease_expires_at = lease_window()
+    claimed = await repo.claim_next(
+        normalize_branch(branch),
+        roster_user.email,
+        now,
+        lease_expires_at,
+        reviewable_levels(roster_user.level),
+        count,
     )
-    return {"message": "Claimed"}
+    return {"claimed": claimed, "lease_expires_at": lease_expires_at}
+
+
+@app.post("/api/review/claim/{app_id}/renew")
+async def renew_claim(
+    app_id: str = Depends(validate_app_id),
+    roster_user: StaffMember = Depends(require_staff)
+):
+    _, lease_expires_at = lease_window()
+    try:
+        await repo.renew_claim(app_id, roster_user.email, lease_expires_at)
+    except ApplicationNotFound:
+        raise HTTPException(404)
+    except ClaimConflict:
+        raise HTTPException(409, detail="You do not hold a claim on this application")
+    return {"message": "Claim renewed", "lease_expires_at": lease_expires_at}
+
+
+@app.post("/api/review/claim/{app_id}/release")
+async def release_claim(
+    app_id: str = Depends(validate_app_id),
+    roster_user: StaffMember = Depends(require_staff)
+):
+    try:
+        await repo.release_claim(app_id, roster_user.email)
+    except ApplicationNotFound:
+        raise HTTPException(404)
+    except ClaimConflict:
+        raise HTTPException(409, detail="You do not hold a claim on this application")
+    return {"message": "Claim released"}
 
 
 @app.post("/api/review/decision/{app_id}")
-def submit_decision(
-    app_id: str,
+async def submit_decision(
+    app_id: str = Depends(validate_app_id),
     decision_data: dict = Body(...),
-    user_token: dict = Depends(verify_clerk_token)
+    roster_user: StaffMember = Depends(require_staff)
 ):
-    email = user_token.get("email")
-    if not get_roster_user(email):
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    try:
-        oid = ObjectId(app_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid ID")
+    email = roster_user.email
+    decision = validate_decision(decision_data.get("decision"))
 
     decision_record = {
-        "application_id": str(oid),
+        "application_id": app_id,
         "reviewer_email": email,
-        "decision": decision_data["decision"],
+        "decision": decision,
         "notes": decision_data.get("notes", ""),
         "timestamp": datetime.utcnow()
     }
-    decisions_collection.insert_one(decision_record)
-    
-    update_op = {
-        "$set": {
-            "status": decision_data["decision"],
-            "claimed_by": None, 
-            "claimed_at": None
-        },
-        "$push": {"history": decision_record}
-    }
     
     # Also add to main notes if text provided
+    note_entry = None
     if decision_data.get("notes"):
-        roster_user = get_roster_user(email)
         note_entry = {
-            "author": roster_user["name"] if roster_user else email,
+            "author": roster_user.name or email,
             "email": email,
-            "content": f"[Decision: {decision_data['decision'].upper()}] {decision_data['notes']}",
+            "content": f"[Decision: {decision.upper()}] {decision_data['notes']}",
             "timestamp": datetime.utcnow()
         }
-        # We need to push to both history and notes. 
-        # MongoDB allows multiple pushes to different fields in one op? 
-        # Yes, using $push: { field1: val1, field2: val2 }
-        update_op["$push"]["notes"] = note_entry
-
-    applications_collection.update_one(
-        {"_id": oid},
-        update_op
-    )
+
+    await repo.record_decision(app_id, decision_record, note_entry)
     return {"message": "Decision recorded"}
 
 
+# --- Bulk Review Routes (Chief and above) ---
+
+MAX_BULK_ITEMS = 500
+ADVANCE_STAGES = {"submitted", "under_review", "interview"}
+
+
+def split_bulk_ids(app_ids: List[str]):
+    """De-duplicate ids and reject malformed ones up front. Returns (valid ids, {bad id: error})."""
+    if not isinstance(app_ids, list) or not app_ids:
+        raise HTTPException(400, detail="No applications given")
+    if len(app_ids) > MAX_BULK_ITEMS:
+        raise HTTPException(400, detail=f"At most {MAX_BULK_ITEMS} applications per request")
+
+    valid, errors = [], {}
+    for app_id in dict.fromkeys(str(a) for a in app_ids):
+        if ObjectId.is_valid(app_id):
+            valid.append(app_id)
+        else:
+            errors[app_id] = "invalid id"
+    return valid, errors
+
+
+def bulk_response(results: Dict[str, Optional[str]]):
+    items = [
+        {"application_id": app_id, "ok": error is None, **({"error": error} if error else {})}
+        for app_id, error in results.items()
+    ]
+    succeeded = sum(1 for item in items if item["ok"])
+    return {"results": items, "succeeded": succeeded, "failed": len(items) - succeeded}
+
+
+def bulk_branch_scope(member: StaffMember) -> Optional[str]:
+    return None if member.can(Permission.ALL_BRANCHES) else member.branch_key
+
+
+@app.post("/api/review/bulk/decision")
+async def bulk_decision(
+    body: dict = Body(...),
+    roster_user: StaffMember = Depends(require_bulk_reviewer)
+):
+    """
+    Record many decisions at once.
+    Expects: { "items": [{ "application_id": "...", "decision": "accepted", "notes": "..." }] }
+    """
+    items = body.get("items")
+    if not isinstance(items, list):
+        raise HTTPException(400, detail="Expected an 'items' list")
+    # A decision outside the allowed set is a malformed request, not a per-item failure
+    for item in items:
+        if isinstance(item, dict):
+            validate_decision(item.get("decision"))
+    valid, errors = split_bulk_ids([item.get("application_id") for item in items if isinstance(item, dict)])
+
+    email = roster_user.email
+    now = datetime.utcnow()
+    entries = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        app_id = str(item.get("application_id"))
+        if app_id not in valid or app_id in entries:
+            continue
+        decision = item["decision"]
+        notes = item.get("notes") or ""
+        entries[app_id] = {
+            "application_id": app_id,
+            "record": {
+                "application_id": app_id,
+                "reviewer_email": email,
+                "decision": decision,
+                "notes": notes,
+                "timestamp": now
+            },
+            "note": {
+                "author": roster_user.name or email,
+                "email": email,
+                "content": f"[Decision: {decision.upper()}] {notes}",
+                "timestamp": now
+            } if notes else None
+        }
+
+    results = {}
+    if entries:
+        results = await repo.bulk_record_decisions(list(entries.values()), bulk_branch_scope(roster_user))
+    return bulk_response({**results, **errors})
+
+
+@app.post("/api/review/bulk/advance")
+async def bulk_advance(
+    body: dict = Body(...),
+    roster_user: StaffMember = Depends(require_bulk_reviewer)
+):
+    """
+    Move many applications to a pipeline stage (releases any claims).
+    Expects: { "application_ids": [...], "stage": "interview", "notes": "..." }
+    """
+    stage = body.get("stage")
+    if stage not in ADVANCE_STAGES:
+        raise HTTPException(400, detail=f"stage must be one of {sorted(ADVANCE_STAGES)}")
+    valid, errors = split_bulk_ids(body.get("application_ids"))
+
+    history_entry = {
+        "stage": stage,
+        "reviewer_email": roster_user.email,
+        "notes": body.get("notes", ""),
+        "timestamp": datetime.utcnow()
+    }
+    results = {}
+    if valid:
+        results = await repo.bulk_set_stage(
+            valid, stage, history_entry, history_entry["timestamp"], bulk_branch_scope(roster_user)
+        )
+    return bulk_response({**results, **errors})
+
+
+@app.post("/api/review/bulk/assign")
+async def bulk_assign(
+    body: dict = Body(...),
+    roster_user: StaffMember = Depends(require_bulk_reviewer)
+):
+    """
+    Claim many open applications on behalf of a reviewer.
+    Expects: { "application_ids": [...], "reviewer_email": "..." }
+    """
+    reviewer = get_roster_user(body.get("reviewer_email"))
+    if not reviewer:
+        raise HTTPException(400, detail="reviewer_email is not in the staff roster")
+    if not reviewer.can_access_branch(roster_user.branch) and not roster_user.can(Permission.ALL_BRANCHES):
+        raise HTTPException(400, detail="Reviewer belongs to a different branch")
+    valid, errors = split_bulk_ids(body.get("application_ids"))
+
+    now, lease_expires_at = lease_window()
+    results = {}
+    if valid:
+        # Both scopes apply per application: the caller's, and the branches the reviewer can open
+        results = await repo.bulk_assign(
+            valid, reviewer.email, now, lease_expires_at, bulk_branch_scope(roster_user),
+            reviewer_branch_key=bulk_branch_scope(reviewer),
+        )
+    return bulk_response({**results, **errors})
+
+
 # --- Notes & Reports Routes ---
 
 @app.post("/api/applications/{app_id}/notes")
-def add_application_note(
-    app_id: str,
+async def add_application_note(
+    app_id: str = Depends(validate_app_id),
     note_data: dict = Body(...),
-    user_token: dict = Depends(verify_clerk_token)
+    roster_user: StaffMember = Depends(require_staff)
 ):
     """
     Add a standalone note to an application.
     Expects: { "note": "..." }
     """
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user:
-         raise HTTPException(status_code=403, detail="Not authorized")
-         
-    try:
-        oid = ObjectId(app_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid ID")
-        
+    email = roster_user.email
+
     note_entry = {
-        "author": roster_user["name"],
+        "author": roster_user.name,
         "email": email,
         "content": note_data.get("note"),
         "timestamp": datetime.utcnow()
     }
     
-    applications_collection.update_one(
-        {"_id": oid},
-        {"$push": {"notes": note_entry}}
-    )
+    await repo.add_note(app_id, note_entry)
     
     return {"message": "Note added", "entry": note_entry}
 
 
 @app.get("/api/reports/branch-notes/{branch}")
-def get_branch_notes_report(
+async def get_branch_notes_report(
     branch: str,
-    user_token: dict = Depends(verify_clerk_token)
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    roster_user: StaffMember = Depends(require_staff)
 ):
     """
     Get a structured report of all notes for a branch, grouped by Role.
+    `offset` / `limit` page within each role. The JSON object is streamed
+    role by role as rows come off the aggregation cursor.
     """
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user:
-        raise HTTPException(status_code=403, detail="Not authorized")
-        
     # Check if user belongs to branch (or is executive)
-    if "executive" not in roster_user["role"].lower() and roster_user["branch"].lower() != branch.lower():
+    if not roster_user.can_access_branch(branch):
         raise HTTPException(status_code=403, detail="Access denied to this branch.")
 
-    # Fetch all apps for branch
-    cursor = applications_collection.find(
-        {"branch": {"$regex": f"^{branch}$", "$options": "i"}}
-    ).sort("role", 1)
-    
-    report = {}
-    
-    for doc in cursor:
-        role = doc.get("role", "Unknown Role")
-        if role not in report:
-            report[role] = []
-            
-        # Format application summary
-        full_name = f"{doc.get('formData', {}).get('firstName', '')} {doc.get('formData', {}).get('lastName', '')}".strip()
-        if not full_name: full_name = doc.get("email")
-        
-        app_summary = {
-            "id": str(doc["_id"]),
-            "name": full_name,
-            "email": doc.get("email"),
-            "status": doc.get("status"),
-            "notes": doc.get("notes", []),
-            # Include decision history notes too if needed, but let's stick to explicit notes for clarity
-            "decisions": doc.get("history", [])
-        }
-        
-        report[role].append(app_summary)
-        
-    return report
+    rows = repo.iter_branch_notes(normalize_branch(branch), offset, limit)
+    return StreamingResponse(stream_grouped_json(rows, "role"), media_type="application/json")
+
+
+@app.get("/api/stats/dashboard")
+async def get_dashboard_stats(
+    branch: Optional[str] = None,
+    roster_user: StaffMember = Depends(require_staff)
+):
+    """
+    Application counts per branch / role / status, read from the counters the
+    write paths maintain, so this is one small read no matter how many applications exist.
+    Non-executives only ever see their own branch.
+    """
+    if branch is None and not roster_user.can(Permission.ALL_BRANCHES):
+        branch = roster_user.branch
+    if branch is not None and not roster_user.can_access_branch(branch):
+        raise HTTPException(status_code=403, detail="Access denied to this branch.")
+
+    return await repo.dashboard_metrics(normalize_branch(branch) if branch is not None else None)
 
 
 # --- Admin Routes (Exec Only) ---
 
 @app.get("/api/admin/questions")
-def get_all_questions(user_token: dict = Depends(verify_clerk_token)):
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user or "executive" not in roster_user.get("role", "").lower():
-        raise HTTPException(status_code=403, detail="Admin access only")
-        
-    try:
-        with open("data/questions.json", "r") as f:
-            return json.load(f)
-    except:
-        return {}
+def get_all_questions(admin: StaffMember = Depends(require_admin)):
+    return question_store.config()
 
 @app.post("/api/admin/questions")
 def update_questions(
     questions: dict = Body(...),
-    user_token: dict = Depends(verify_clerk_token)
+    admin: StaffMember = Depends(require_admin)
 ):
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user or "executive" not in roster_user.get("role", "").lower():
-        raise HTTPException(status_code=403, detail="Admin access only")
-
-    with open("data/questions.json", "w") as f:
-        json.dump(questions, f, indent=2)
+    question_store.save(questions)
     return {"message": "Questions updated"}
 
 @app.get("/api/admin/roster")
-def get_roster(user_token: dict = Depends(verify_clerk_token)):
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user or "executive" not in roster_user.get("role", "").lower():
-        raise HTTPException(status_code=403, detail="Admin access only")
-    return ROSTER
+def get_roster(admin: StaffMember = Depends(require_admin)):
+    return roster_index.records
 
 @app.post("/api/admin/roster")
 def update_roster(
     new_roster: List[dict] = Body(...),
-    user_token: dict = Depends(verify_clerk_token)
+    admin: StaffMember = Depends(require_admin)
 ):
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user or "executive" not in roster_user.get("role", "").lower():
-        raise HTTPException(status_code=403, detail="Admin access only")
-        
-    global ROSTER
-    ROSTER = new_roster
-    with open("data/roster.json", "w") as f:
-        json.dump(ROSTER, f, indent=2)
+    set_roster(new_roster)
+    save_roster(new_roster, ROSTER_PATH)
     return {"message": "Roster updated"}
 
+@app.get("/api/admin/roster/sync")
+def get_roster_sync_status(admin: StaffMember = Depends(require_admin)):
+    """Sheets sync metrics: last success / duration / result and the last member diff counts."""
+    if not roster_sync:
+        raise HTTPException(status_code=503, detail="Google Sheets sync unavailable")
+    return roster_sync.status()
+
+@app.post("/api/admin/roster/sync")
+async def sync_roster_now(admin: StaffMember = Depends(require_admin)):
+    """Sync from Sheets now instead of waiting for the next interval; returns the per-member diff."""
+    if not roster_sync:
+        raise HTTPException(status_code=503, detail="Google Sheets sync unavailable")
+    try:
+        return await asyncio.to_thread(roster_sync.sync)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Roster sync failed: {e}")
+
+EXPORT_DEFAULT_FIELDS = ["email", "role", "branch", "status", "submittedAt", "claimed_by"]
+EXPORT_FIELD_PATTERN = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+
+def parse_export_fields(fields: Optional[str], include: Optional[str]) -> List[str]:
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(EXPORT_DEFAULT_FIELDS)
+    extras = {x.strip() for x in include.split(",")} if include else set()
+    if "decisions" in extras:
+        selected.append("history")
+    if "notes" in extras:
+        selected.append("notes")
+    if "stages" in extras:
+        selected.append("stageHistory")
+
+    for field in selected:
+        if not EXPORT_FIELD_PATTERN.match(field):
+            raise HTTPException(400, detail=f"Invalid field: {field}")
+    selected = [f for f in dict.fromkeys(selected) if f != "_id"]
+    # Drop "formData.x" when "formData" itself is selected (Mongo rejects overlapping projections)
+    return [f for f in selected if not any(f.startswith(other + ".") for other in selected)]
+
+
+def export_cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(jsonable_encoder(value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+async def stream_export_csv(rows, fields: List[str]):
+    columns = ["_id"] + fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([export_cell(get_path(row, column)) for column in columns])
+        # Flush every row so bytes start flowing immediately and memory stays flat
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+async def stream_export_ndjson(rows):
+    async for row in rows:
+        yield json.dumps(jsonable_encoder(row)).encode() + b"\n"
+
+
+@app.get("/api/admin/export")
+async def export_applications(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    branch: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="Comma-separated statuses"),
+    role: Optional[str] = Query(None, description="A level (member, lead, chief, director, executive) or an exact role title"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields; dotted paths like formData.major allowed"),
+    include: Optional[str] = Query(None, description="decisions,notes,stages"),
+    admin: StaffMember = Depends(require_admin)
+):
+    """Stream applications as NDJSON or CSV straight off a batched cursor."""
+    selected = parse_export_fields(fields, include)
+
+    role_level, role_title = None, None
+    if role:
+        if role.upper() in Level.__members__:
+            role_level = Level[role.upper()]
+        else:
+            role_title = role
+
+    rows = repo.iter_export(
+        selected,
+        branch_key=normalize_branch(branch) if branch else None,
+        statuses=[s.strip() for s in status.split(",") if s.strip()] if status else None,
+        role_level=role_level,
+        role=role_title,
+    )
+    filename = f"applications-{datetime.utcnow():%Y%m%d}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "csv":
+        return StreamingResponse(stream_export_csv(rows, selected), media_type="text/csv", headers=headers)
+    return StreamingResponse(stream_export_ndjson(rows), media_type="application/x-ndjson", headers=headers)
+
+
 @app.post("/api/admin/reset")
-def seasonal_reset(
+async def seasonal_reset(
     confirmation: dict = Body(...),
-    user_token: dict = Depends(verify_clerk_token)
+    admin: StaffMember = Depends(require_admin)
 ):
-    email = user_token.get("email")
-    roster_user = get_roster_user(email)
-    if not roster_user or "executive" not in roster_user.get("role", "").lower():
-        raise HTTPException(status_code=403, detail="Admin access only")
-        
     if confirmation.get("confirm") != "I CONFIRM SEASONAL RESET":
         raise HTTPException(400, detail="Invalid confirmation code")
         
     # Archive current applications (or delete for MVP)
     # For MVP, we'll just delete them to 'reset' the season
-    count = applications_collection.count_documents({})
-    applications_collection.delete_many({})
-    decisions_collection.delete_many({})
+    count = await repo.reset_season()
     
     return {"message": f"Seasonal reset complete. {count} applications archived/deleted."}
 
 
+@app.post("/api/admin/metrics/rebuild")
+async def rebuild_dashboard_metrics(admin: StaffMember = Depends(require_admin)):
+    """Recount the dashboard counters from the applications themselves."""
+    return await repo.rebuild_metrics()
+
+
 # --- Chatbot ---
 
 @app.post("/api/chat")
@@ -600,10 +1051,54 @@ async def chat_endpoint(body: dict = Body(...)):
     message = body.get("message")
     if not message: raise HTTPException(400)
     
+    chat_handler = await get_chat_handler()
     if not chat_handler:
-        return {"response": "Chat system offline (Check API Key).", "sources": []}
+        return {"response": "Chat system offline (Check API Key or CHAT_PROVIDER).", "sources": []}
         
-    return await chat_handler.get_response(message)
+    # Optional: messages sharing a session_id are answered as one conversation
+    return await chat_handler.get_response(message, body.get("session_id"))
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: Request, body: dict = Body(...)):
+    """
+    Server-sent events version of /api/chat: a `sources` event, `token` events as
+    the answer is generated, then `done` with first-token / total timings
+    (or `error`). Stops generating as soon as the client disconnects.
+    """
+    message = body.get("message")
+    if not message: raise HTTPException(400)
+    chat_handler = await get_chat_handler()
+
+    async def events():
+        if not chat_handler:
+            yield sse_event("error", {"message": "Chat system offline (Check API Key or CHAT_PROVIDER)."})
+            return
+        stream = chat_handler.stream_response(message, body.get("session_id"))
+        try:
+            async for event, data in stream:
+                if await request.is_disconnected():
+                    print("Chat stream: client disconnected, cancelling")
+                    return
+                yield sse_event(event, data)
+        except asyncio.TimeoutError:
+            yield sse_event("error", {"message": "That took too long to answer. Please try again in a moment."})
+        except Exception as e:
+            print(f"RAG Stream Error: {e}")
+            yield sse_event("error", {"message": "I'm having trouble processing that right now."})
+        finally:
+            # Closing the generator cancels the LLM call if it is still running
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import jwt
+import requests
+
+
+class TokenCache:
+    """
+    Bounded LRU of already-verified token -> claims. Entries expire after `ttl`
+    seconds or at the token's own `exp`, whichever comes first.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token: str, claims: dict):
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._entries[token] = (expires_at, claims)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class UnknownSigningKey(jwt.InvalidTokenError):
+    pass
+
+
+class ClerkVerifier:
+    """
+    Verifies Clerk session tokens (RS256) against Clerk's JWKS.
+
+    The key set is fetched from `jwks_url` (authenticated with the Clerk secret key)
+    or read from `jwks_path` for offline testing, kept in memory and refreshed in the
+    background by `refresh_forever`. A token signed by a key we have not seen yet
+    triggers one immediate (rate-limited) refresh, which covers key rotation.
+    """
+
+    def __init__(
+        self,
+        jwks_url: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        jwks_path: Optional[str] = None,
+        issuer: Optional[str] = None,
+        refresh_seconds: float = 3600,
+        leeway: float = 5,
+        cache: Optional[TokenCache] = None,
+    ):
+        self.jwks_url = jwks_url
+        self.secret_key = secret_key
+        self.jwks_path = jwks_path
+        self.issuer = issuer
+        self.refresh_seconds = refresh_seconds
+        self.leeway = leeway
+        self.cache = cache or TokenCache()
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def _fetch_jwks(self) -> dict:
+        if self.jwks_path:
+            with open(self.jwks_path, "r") as f:
+                return json.load(f)
+        headers = {"Authorization": f"Bearer {self.secret_key}"} if self.secret_key else {}
+        response = requests.get(self.jwks_url, headers=headers, timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self, min_interval: float = 0):
+        """Reload the key set. Skipped if the last refresh was under `min_interval` seconds ago."""
+        with self._refresh_lock:
+            if time.time() - self._last_refresh < min_interval:
+                return
+            jwk_set = jwt.PyJWKSet.from_dict(self._fetch_jwks())
+            # Single assignment so concurrent verifiers see either the old or the new set
+            self._keys = {key.key_id: key for key in jwk_set.keys}
+            self._last_refresh = time.time()
+
+    async def refresh_forever(self):
+        """Background task: keep the key set fresh without blocking requests."""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"JWKS refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def verify_cached(self, token: str) -> dict:
+        """
+        Verify with the keys already in memory. Raises UnknownSigningKey when the
+        token's `kid` is not in the set, so the caller can refresh and retry.
+        """
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            raise UnknownSigningKey(f"Unknown signing key: {kid}")
+
+        claims = jwt.decode(
+            token,
+            key.key,
+            algorithms=["RS256"],
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"require": ["exp"], "verify_aud": False},
+        )
+        self.cache.put(token, claims)
+        return claims
+
+    async def verify(self, token: str) -> dict:
+        try:
+            return self.verify_cached(token)
+        except UnknownSigningKey:
+            # Network / file IO off the event loop; at most one forced refresh every 30s
+            await asyncio.to_thread(self.refresh, 30)
+            return self.verify_cached(token)
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+def normalize_query(text: str) -> str:
+    """Case, punctuation and spacing don't change the answer: "When do apps close?" == "when do apps close"."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+
+def unit_vector(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class MemoryStore:
+    """In-process LRU with a per-entry TTL."""
+    blocking = False
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisStore:
+    """
+    Shared store for multi-worker deployments (any Redis-compatible server).
+    Redis does the TTL eviction; set `maxmemory-policy allkeys-lru` for the LRU side.
+    """
+    blocking = True
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = "chat-answer:"):
+        if redis is None:
+            raise RuntimeError("The redis package is required for CHAT_CACHE_REDIS_URL")
+        self.client = redis.Redis.from_url(url, socket_timeout=1)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*", count=500))
+        if keys:
+            self.client.delete(*keys)
+
+
+class AnswerCache:
+    """
+    Chat answers keyed on the normalized question. With `embed` and a
+    `similarity_threshold`, a miss on the exact key falls back to the closest
+    previously answered question if its embedding is at least that similar
+    (use `lookup` and hand its vector to `put` so a miss embeds the question once).
+    `version` returns the current knowledge-base version, which is part of every
+    key, so answers cached before a change (by any process) are never served;
+    `clear` drops them from this process's store early.
+    """
+
+    def __init__(
+        self,
+        store,
+        embed: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        similarity_threshold: Optional[float] = None,
+        max_vectors: int = 256,
+        version: Optional[Callable[[], str]] = None,
+    ):
+        self.store = store
+        self.version = version
+        self._current_version = None
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.max_vectors = max_vectors
+        # normalized question -> unit embedding, for near-duplicate lookups (per process)
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # The same vectors stacked into one matrix, rebuilt on the first lookup after a change
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @property
+    def matches_similar(self) -> bool:
+        return self.embed is not None and bool(self.similarity_threshold)
+
+    async def _call(self, fn, *args):
+        # Redis calls go to a thread; the in-memory store is fast enough to call inline
+        if self.store.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _closest(self, vector: np.ndarray) -> Optional[str]:
+        if self._matrix is None:
+            self._matrix = (list(self._vectors), np.vstack(list(self._vectors.values())))
+        keys, matrix = self._matrix
+        # Cosine similarity to every cached question in one matrix-vector product
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def _key(self, query: str) -> str:
+        key = normalize_query(query)
+        if self.version is None:
+            return key
+        version = self.version()
+        if version != self._current_version:
+            # Embeddings of questions answered under the old version point at dead keys
+            self._vectors.clear()
+            self._matrix = None
+            self._current_version = version
+        return f"{version}:{key}"
+
+    async def lookup(self, query: str) -> Tuple[Optional[dict], Optional[np.ndarray]]:
+        """(cached answer or None, the question's embedding if one was computed for it)."""
+        vector = None
+        try:
+            key = self._key(query)
+            answer = await self._call(self.store.get, key)
+            if answer is not None:
+                self.hits += 1
+                return answer, vector
+
+            if self.matches_similar and self._vectors:
+                vector = unit_vector(await self.embed(normalize_query(query)))
+                similar = self._closest(vector)
+                if similar is not None:
+                    answer = await self._call(self.store.get, similar)
+                    if answer is not None:
+                        self.near_hits += 1
+                        return answer, vector
+        except Exception as e:
+            print(f"Answer cache lookup failed: {e}")
+        self.misses += 1
+        return None, vector
+
+    async def get(self, query: str) -> Optional[dict]:
+        answer, _ = await self.lookup(query)
+        return answer
+
+    async def put(self, query: str, answer: dict, vector: Optional[np.ndarray] = None):
+        """`vector`: the embedding `lookup` returned for this question, if any (saves embedding it again)."""
+        try:
+            key = self._key(query)
+            await self._call(self.store.set, key, answer)
+            if self.matches_similar:
+                if vector is None:
+                    vector = unit_vector(await self.embed(normalize_query(query)))
+                self._vectors[key] = vector
+                self._vectors.move_to_end(key)
+                while len(self._vectors) > self.max_vectors:
+                    self._vectors.popitem(last=False)
+                self._matrix = None
+        except Exception as e:
+            print(f"Answer cache store failed: {e}")
+
+    def clear(self):
+        self._vectors.clear()
+        self._matrix = None
+        try:
+            self.store.clear()
+        except Exception as e:
+            print(f"Answer cache clear failed: {e}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "nearHits": self.near_hits, "misses": self.misses}
@@ -0,0 +1,114 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from tokens import count_tokens, truncate_tokens
+
+
+def condense_turn(question: str, answer: str) -> str:
+    """One line per old turn: the question plus the answer's first sentence (no LLM call)."""
+    first_sentence = re.split(r"(?<=[.!?])\s", (answer or "").strip(), maxsplit=1)[0]
+    return f"- Asked: {question.strip()} / Answered: {first_sentence}"
+
+
+class Conversation:
+    """
+    One chat session: the most recent turns verbatim plus a condensed summary of
+    everything older. Once the verbatim turns exceed `token_budget`, the oldest
+    are folded into the summary (itself capped at the same budget).
+    """
+
+    def __init__(self, token_budget: int = 800, keep_recent: int = 2):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.turns: List[Tuple[str, str]] = []
+        self.summary: List[str] = []
+        self.last_used = time.time()
+
+    def add(self, question: str, answer: str):
+        self.turns.append((question, answer))
+        while len(self.turns) > self.keep_recent and self._turn_tokens() > self.token_budget:
+            self.summary.append(condense_turn(*self.turns.pop(0)))
+        while len(self.summary) > 1 and count_tokens("\n".join(self.summary)) > self.token_budget:
+            self.summary.pop(0)
+
+    def _turn_tokens(self) -> int:
+        return sum(count_tokens(q) + count_tokens(a) for q, a in self.turns)
+
+    def last_question(self) -> Optional[str]:
+        return self.turns[-1][0] if self.turns else None
+
+    def history_text(self) -> str:
+        lines = []
+        if self.summary:
+            lines.append("Earlier:")
+            lines.extend(self.summary)
+        for question, answer in self.turns:
+            lines.append(f"User: {question}")
+            lines.append(f"Assistant: {answer}")
+        # The most recent exchange matters most, so any cut comes off the front
+        return truncate_tokens("\n".join(lines), self.token_budget * 2, keep_end=True)
+
+
+class ConversationStore:
+    """Session id -> Conversation, bounded: idle sessions expire and the least recently used are evicted."""
+
+    def __init__(self, max_sessions: int = 1000, idle_seconds: float = 1800, token_budget: int = 800):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Conversation:
+        now = time.time()
+        with self._lock:
+            # Oldest first, so expired sessions are all at the front
+            while self._sessions:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                if now - oldest.last_used < self.idle_seconds:
+                    break
+                del self._sessions[oldest_id]
+
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = Conversation(self.token_budget)
+                self._sessions[session_id] = conversation
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            conversation.last_used = now
+            self._sessions.move_to_end(session_id)
+            return conversation
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+def assemble_context(texts: List[str], token_budget: int, overlap: float = 0.6) -> str:
+    """
+    Join retrieved chunks for the prompt, best first: exact duplicates, chunks
+    contained in an earlier one, and chunks sharing more than `overlap` of their
+    5-word shingles with an earlier one are dropped; stops at `token_budget`.
+    """
+    kept, kept_shingles, used = [], [], 0
+    for text in texts:
+        text = text.strip()
+        if not text or any(text in other for other in kept):
+            continue
+        shingles = _shingles(text)
+        if any(len(shingles & other) > overlap * min(len(shingles), len(other)) for other in kept_shingles):
+            continue
+        tokens = count_tokens(text)
+        if kept and used + tokens > token_budget:
+            break
+        kept.append(text)
+        kept_shingles.append(shingles)
+        used += tokens
+    return "\n\n".join(kept)
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional, Tuple
+
+# Same rules as the data pipeline's utils/deduplication.py (which runs them vectorized over a batch)
+MERGE_THRESHOLD = 0.8
+# Indexed keys duplicates are looked up by (the blocking keys); "fullName" is only used for scoring
+DEDUP_FIELDS = ["email", "nuid", "name"]
+
+
+def normalize_email(email: Optional[str]) -> str:
+    email = (email or "").strip().lower()
+    return re.sub(r"\+[^@]*@", "@", email)
+
+
+def normalize_nuid(nuid: Optional[str]) -> str:
+    digits = re.sub(r"\D", "", str(nuid or ""))
+    return digits.zfill(9) if digits else ""
+
+
+def normalize_name(name: Optional[str]) -> str:
+    folded = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z ]+", "", folded.lower()).split())
+
+
+def dedup_keys(application: dict) -> Dict[str, str]:
+    """
+    Normalized identity of an application, stored on it as `dedupKeys` and
+    indexed: email, NUID, and last name + first initial.
+    """
+    form = application.get("formData") or {}
+    keys = {
+        "email": normalize_email(application.get("email") or form.get("email")),
+        "nuid": normalize_nuid(application.get("nuid") or form.get("nuid")),
+    }
+    first, last = normalize_name(form.get("firstName")), normalize_name(form.get("lastName"))
+    if first and last:
+        keys["name"] = f"{last.split()[-1]} {first[0]}"
+        keys["fullName"] = f"{first} {last}"
+    return {key: value for key, value in keys.items() if value}
+
+
+def trigrams(text: str) -> set:
+    if not text:
+        return set()
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of character trigrams."""
+    left, right = trigrams(a), trigrams(b)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def match_score(a: Dict[str, str], b: Dict[str, str]) -> Tuple[float, bool]:
+    """
+    (score, exact) for two dedup_keys dicts. NUID first: when both are known they
+    decide it (exact if equal, 0 if not, whatever the emails); otherwise exact when
+    the emails match, else 0.6 name + 0.4 email-local-part similarity.
+    """
+    if a.get("nuid") and b.get("nuid"):
+        if a["nuid"] == b["nuid"]:
+            return 1.0, True
+        return 0.0, False
+    if a.get("email") and a.get("email") == b.get("email"):
+        return 1.0, True
+    local_a = (a.get("email") or "").split("@")[0]
+    local_b = (b.get("email") or "").split("@")[0]
+    score = 0.6 * similarity(a.get("fullName", ""), b.get("fullName", "")) + 0.4 * similarity(local_a, local_b)
+    return score, False
+
+
+def best_match(keys: Dict[str, str], candidates: Iterable[dict], threshold: float = MERGE_THRESHOLD):
+    """(application, score, exact) of the closest candidate at or above `threshold`, else None."""
+    best = None
+    for candidate in candidates:
+        score, exact = match_score(keys, candidate.get("dedupKeys") or dedup_keys(candidate))
+        if score >= threshold and (best is None or score > best[1]):
+            best = (candidate, score, exact)
+    return best
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import math
+import random
+import time
+from typing import Callable, List, Optional
+
+
+def is_throttled(error: Exception) -> bool:
+    """Best-effort check for "slow down" errors across embedding clients (HTTP 429, gRPC RESOURCE_EXHAUSTED)."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("429", "rate limit", "ratelimit", "resourceexhausted", "resource_exhausted", "quota"))
+
+
+class EmbeddingPipeline:
+    """
+    Embeds a large list of texts in fixed-size batches with at most `concurrency`
+    batches in flight. Throttling errors are retried with exponential backoff and
+    jitter; other errors are retried fewer times. Results come back in input order.
+
+    `embeddings` is anything with `embed_documents` (and optionally `aembed_documents`),
+    i.e. a LangChain Embeddings object.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        batch_size: int = 64,
+        concurrency: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        progress: Optional[Callable[[str], None]] = print,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.progress = progress
+        self.stats = {}
+
+    async def _call(self, batch: List[str]) -> List[List[float]]:
+        if hasattr(self.embeddings, "aembed_documents"):
+            return await self.embeddings.aembed_documents(batch)
+        return await asyncio.to_thread(self.embeddings.embed_documents, batch)
+
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return await self._call(batch)
+            except Exception as e:
+                throttled = is_throttled(e)
+                # Throttling is expected under load and always worth waiting out;
+                # anything else gets a couple of tries before failing the run
+                if attempt >= (self.max_retries if throttled else 2):
+                    raise
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)
+                attempt += 1
+                self.stats["retries"] += 1
+                if throttled:
+                    self.stats["throttled"] += 1
+                self._report(f"Embedding batch failed ({e}); retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _report(self, message: str):
+        if self.progress:
+            self.progress(message)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        slots = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        self.stats = {"texts": len(texts), "batches": len(batches), "retries": 0, "throttled": 0, "done": 0}
+
+        async def run(index: int):
+            async with slots:
+                results[index] = await self._embed_batch(batches[index])
+            self.stats["done"] += len(batches[index])
+            elapsed = time.perf_counter() - started
+            self._report(
+                f"Embedded {self.stats['done']}/{len(texts)} chunks "
+                f"({self.stats['done'] / elapsed if elapsed else 0:.1f}/s)"
+            )
+
+        await asyncio.gather(*(run(i) for i in range(len(batches))))
+
+        elapsed = time.perf_counter() - started
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["per_second"] = round(len(texts) / elapsed, 1) if elapsed else None
+        return [vector for batch in results for vector in batch]
+
+
+class FakeEmbeddings:
+    """
+    Offline stand-in for an embedding API, for benchmarking the pipeline.
+    Vectors are derived from a hash of the text; `latency` simulates the round
+    trip and `throttle_rate` the fraction of calls rejected with a 429.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: float = 0.05, throttle_rate: float = 0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        raw = [digest[i % len(digest)] - 127.5 for i in range(self.dimensions)]
+        norm = math.sqrt(sum(x * x for x in raw)) or 1.0
+        return [x / norm for x in raw]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.throttle_rate:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        return [self._vector(text) for text in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+if __name__ == "__main__":
+    # Offline benchmark: python embedding_pipeline.py [chunks] [batch_size] [concurrency] [throttle_rate]
+    import sys
+
+    args = sys.argv[1:]
+    count = int(args[0]) if len(args) > 0 else 5000
+    batch_size = int(args[1]) if len(args) > 1 else 64
+    concurrency = int(args[2]) if len(args) > 2 else 4
+    throttle_rate = float(args[3]) if len(args) > 3 else 0.0
+
+    texts = [f"chunk {i} " + "lorem ipsum " * 40 for i in range(count)]
+    pipeline = EmbeddingPipeline(
+        FakeEmbeddings(throttle_rate=throttle_rate), batch_size, concurrency, base_delay=0.05, progress=None
+    )
+    vectors = asyncio.run(pipeline.embed(texts))
+    assert len(vectors) == count
+    print(pipeline.stats)
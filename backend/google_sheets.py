@@ -1,8 +1,13 @@
 import gspread
 import json
 import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
 from oauth2client.service_account import ServiceAccountCredentials
 
+from roster import diff_rosters, roster_hash, save_roster
+
 # Constants
 SCOPE = ["https://spreadsheets.google.com/feeds", 'https://www.googleapis.com/auth/spreadsheets',
          "https://www.googleapis.com/auth/drive.file", "https://www.googleapis.com/auth/drive"]
@@ -13,6 +18,62 @@ SERVICE_ACCOUNT_FILE = "service_account.json"
 ONBOARDING_FORM_FILE_ID = "1jiuA01J66Lpn1dEYnpYflFOxfRi_B1GI8Ybks0_or6I"
 NETWORKING_DASHBOARD_FILE_ID = "1WuGxXXPdvcgqGQcnxJhYwdvVnZN8GLdpyAgETNcZLdg"
 
+def _roster_worksheet(sh):
+    # Look for a sheet named "Roster" or "Members" or just take the first one
+    try:
+        return sh.worksheet("Roster")
+    except Exception:
+        try:
+            return sh.worksheet("Members")
+        except Exception:
+            return sh.get_worksheet(0)  # Default to first
+
+
+def parse_roster_records(records: List[dict]) -> List[dict]:
+    roster = []
+    for row in records:
+        # Normalize keys (handle case sensitivity)
+        # We expect: Name, Branch, Role Title (or Role)
+        keys = {k.lower(): k for k in row.keys()}
+
+        name_key = keys.get("name")
+        branch_key = keys.get("branch")
+        role_key = keys.get("role title") or keys.get("role")
+        email_key = keys.get("email") or keys.get("email address")
+
+        if not name_key or not row[name_key]:
+            continue
+
+        name = str(row[name_key]).strip()
+        branch = str(row.get(branch_key, "")).strip()
+        role_title = str(row.get(role_key, "")).strip()
+        email = str(row.get(email_key, "")).strip()
+
+        # Generate email if missing
+        if not email or "@" not in email:
+            parts = name.split()
+            if len(parts) >= 2:
+                email = f"{parts[0].lower()}.{parts[-1].lower()}@generatenu.com"
+            else:
+                email = f"{name.lower()}@generatenu.com"
+
+        # Hierarchy Level
+        level = "Member"
+        rt_lower = role_title.lower()
+        if "director" in rt_lower: level = "Director"
+        elif "chief" in rt_lower: level = "Chief"
+        elif "lead" in rt_lower: level = "Lead"
+
+        roster.append({
+            "name": name,
+            "email": email,
+            "branch": branch,
+            "role": role_title,
+            "level": level
+        })
+    return roster
+
+
 def fetch_roster_from_sheets():
     if not os.path.exists(SERVICE_ACCOUNT_FILE):
         print("Service account file not found.")
@@ -20,80 +81,148 @@ def fetch_roster_from_sheets():
 
     try:
         gc = gspread.service_account(filename=SERVICE_ACCOUNT_FILE)
-        
+
         # Try Networking Dashboard first
         try:
             sh = gc.open_by_key(NETWORKING_DASHBOARD_FILE_ID)
-            # Look for a sheet named "Roster" or "Members" or just take the first one
-            worksheet = None
-            try:
-                worksheet = sh.worksheet("Roster")
-            except:
-                try:
-                    worksheet = sh.worksheet("Members")
-                except:
-                    worksheet = sh.get_worksheet(0) # Default to first
-            
+            worksheet = _roster_worksheet(sh)
             print(f"Reading from Sheet: {sh.title} - {worksheet.title}")
             records = worksheet.get_all_records()
-            
         except Exception as e:
             print(f"Failed to open Networking Dashboard: {e}")
             return []
 
-        roster = []
-        for row in records:
-            # Normalize keys (handle case sensitivity)
-            # We expect: Name, Branch, Role Title (or Role)
-            # Check keys
-            keys = {k.lower(): k for k in row.keys()}
-            
-            name_key = keys.get("name")
-            branch_key = keys.get("branch")
-            role_key = keys.get("role title") or keys.get("role")
-            email_key = keys.get("email") or keys.get("email address")
-
-            if not name_key or not row[name_key]:
-                continue
-
-            name = str(row[name_key]).strip()
-            branch = str(row.get(branch_key, "")).strip()
-            role_title = str(row.get(role_key, "")).strip()
-            email = str(row.get(email_key, "")).strip()
-
-            # Generate email if missing
-            if not email or "@" not in email:
-                 parts = name.split()
-                 if len(parts) >= 2:
-                     email = f"{parts[0].lower()}.{parts[-1].lower()}@generatenu.com"
-                 else:
-                     email = f"{name.lower()}@generatenu.com"
-
-            # Hierarchy Level
-            level = "Member"
-            rt_lower = role_title.lower()
-            if "director" in rt_lower: level = "Director"
-            elif "chief" in rt_lower: level = "Chief"
-            elif "lead" in rt_lower: level = "Lead"
-
-            roster.append({
-                "name": name,
-                "email": email,
-                "branch": branch,
-                "role": role_title,
-                "level": level
-            })
-            
+        roster = parse_roster_records(records)
+
         # Save to local cache
-        with open("data/roster.json", "w") as f:
-            json.dump(roster, f, indent=2)
-            
+        save_roster(roster, "data/roster.json")
+
         return roster
 
     except Exception as e:
         print(f"Error fetching from Google Sheets: {e}")
         return []
 
+
+class RosterSync:
+    """
+    Periodic roster sync from the Networking Dashboard sheet.
+
+    Each sync first asks Drive for the spreadsheet's last-modified time (one
+    metadata call) and stops there if it hasn't moved. Otherwise the rows are
+    downloaded and hashed; if the content differs from the roster being served,
+    `apply(records)` swaps it in (a single reference assignment) and roster.json
+    is rewritten atomically. A failed or empty fetch leaves the current roster
+    in place. `sync` blocks on the network, so callers run it in a thread
+    (app.start_roster_sync repeats it every `interval_seconds`).
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[dict]], None],
+        current: Callable[[], List[dict]],
+        path: str = "data/roster.json",
+        interval_seconds: float = 600,
+        service_account_file: str = SERVICE_ACCOUNT_FILE,
+        file_id: str = NETWORKING_DASHBOARD_FILE_ID,
+    ):
+        self.apply = apply
+        self.current = current
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.service_account_file = service_account_file
+        self.file_id = file_id
+        self.revision: Optional[str] = None
+        self._spreadsheet = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {
+            "syncs": 0, "updated": 0, "unchanged": 0, "failures": 0,
+            "last_attempt_at": None, "last_success_at": None, "last_duration_seconds": None,
+            "last_result": None, "last_error": None, "last_diff": None,
+        }
+
+    @property
+    def configured(self) -> bool:
+        return os.path.exists(self.service_account_file)
+
+    def _open(self):
+        # The client and spreadsheet handle are reused across syncs (one auth, no re-open)
+        if self._spreadsheet is None:
+            gc = gspread.service_account(filename=self.service_account_file)
+            self._spreadsheet = gc.open_by_key(self.file_id)
+        return self._spreadsheet
+
+    @staticmethod
+    def _modified_time(sh) -> Optional[str]:
+        try:
+            # gspread 6 caches the lastUpdateTime property; the getter asks Drive every time
+            getter = getattr(sh, "get_lastUpdateTime", None)
+            return getter() if getter else sh.lastUpdateTime
+        except Exception as e:
+            # No Drive access: fall back to comparing content hashes every time
+            print(f"Roster sync: sheet revision unavailable ({e})")
+            return None
+
+    def sync(self) -> dict:
+        with self._lock:
+            started = time.perf_counter()
+            self.stats["syncs"] += 1
+            self.stats["last_attempt_at"] = time.time()
+            try:
+                result = self._sync()
+            except Exception as e:
+                # Drop the cached handle, the next attempt re-authenticates
+                self._spreadsheet = None
+                self.stats["failures"] += 1
+                self.stats["last_result"] = "failed"
+                self.stats["last_error"] = str(e)
+                raise
+            finally:
+                self.stats["last_duration_seconds"] = round(time.perf_counter() - started, 3)
+            self.stats[result["result"]] += 1
+            self.stats["last_result"] = result["result"]
+            self.stats["last_success_at"] = time.time()
+            self.stats["last_error"] = None
+            if result["result"] == "updated":
+                self.stats["last_diff"] = {key: len(value) for key, value in result["diff"].items()}
+            return result
+
+    def _sync(self) -> dict:
+        if not self.configured:
+            raise FileNotFoundError(f"{self.service_account_file} not found")
+        sh = self._open()
+        revision = self._modified_time(sh)
+        if revision is not None and revision == self.revision:
+            return {"result": "unchanged", "revision": revision}
+
+        records = parse_roster_records(_roster_worksheet(sh).get_all_records())
+        if not records:
+            raise ValueError("Sheet returned no roster rows; keeping the current roster")
+        current = self.current()
+        if roster_hash(records) == roster_hash(current):
+            self.revision = revision
+            return {"result": "unchanged", "revision": revision}
+
+        diff = diff_rosters(current, records)
+        self.apply(records)
+        save_roster(records, self.path)
+        self.revision = revision
+        print(
+            f"Roster sync: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+            f"{len(diff['changed'])} role changes ({len(records)} members)"
+        )
+        return {"result": "updated", "revision": revision, "members": len(records), "diff": diff}
+
+    def status(self) -> dict:
+        last_success = self.stats["last_success_at"]
+        return {
+            **self.stats,
+            "interval_seconds": self.interval_seconds,
+            "revision": self.revision,
+            "seconds_since_success": round(time.time() - last_success, 1) if last_success else None,
+        }
+
+
 if __name__ == "__main__":
     roster = fetch_roster_from_sheets()
     print(f"Fetched {len(roster)} members.")
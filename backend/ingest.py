@@ -1,44 +1,162 @@
 import os
+import argparse
+import asyncio
 import glob
+import hashlib
+import json
+from typing import Dict, List
 from dotenv import load_dotenv
-from rag import ChatHandler
+from embedding_pipeline import EmbeddingPipeline
+from providers import PROVIDERS, create_providers
+from rag import MANIFEST_NAME, ChatHandler, chunk_id, chunk_metadata
+from vector_store import VECTOR_STORES, default_store_dir
 
 load_dotenv()
 
 DATA_DIR = "data"
 
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: Dict[str, dict], path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def sync_sources(
+    handler: ChatHandler,
+    sources: Dict[str, str],
+    manifest: Dict[str, dict],
+    pipeline: EmbeddingPipeline,
+    full: bool = False,
+) -> dict:
+    """
+    Bring the vector store in line with `sources` ({source name: text}).
+    New chunks from every changed file are collected first and embedded together
+    by `pipeline`, then written in bulk; chunks of changed or removed sources that
+    no longer exist are deleted. `full` re-embeds every chunk of every source
+    (e.g. after the store was wiped); deletions still follow `manifest`, which
+    is updated in place.
+    """
+    report = {"unchanged": 0, "changed": 0, "removed": 0, "chunks_added": 0, "chunks_deleted": 0}
+    add_ids, add_texts, add_metadatas = [], [], []
+    stale = []
+
+    # The chunk size is part of the hash, so changing it re-chunks every source
+    chunking = f"chunk_tokens={handler.text_splitter.target_tokens}\n"
+    for source, text in sources.items():
+        file_hash = content_hash(chunking + text)
+        entry = manifest.get(source)
+        if entry and entry["hash"] == file_hash and not full:
+            report["unchanged"] += 1
+            continue
+
+        chunks = handler.split_text(text)
+        new_ids = {chunk_id(source, chunk.text): chunk for chunk in chunks}
+        old_ids = set(entry["chunks"]) if entry else set()
+
+        for cid, chunk in new_ids.items():
+            if full or cid not in old_ids:
+                add_ids.append(cid)
+                add_texts.append(chunk.text)
+                add_metadatas.append(chunk_metadata(chunk, {"source": source}))
+        stale.extend(cid for cid in old_ids if cid not in new_ids)
+
+        manifest[source] = {"hash": file_hash, "chunks": list(new_ids)}
+        report["changed"] += 1
+
+    for source in [s for s in manifest if s not in sources]:
+        stale.extend(manifest.pop(source)["chunks"])
+        report["removed"] += 1
+
+    vectors = await pipeline.embed(add_texts)
+    handler.add_embedded(add_ids, add_texts, add_metadatas, vectors)
+    handler.delete_chunks(stale)
+
+    report["chunks_added"] = len(add_ids)
+    report["chunks_deleted"] = len(stale)
+    return report
+
+
+def read_sources(files: List[str]) -> Dict[str, str]:
+    sources = {}
+    for filepath in files:
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                sources[os.path.basename(filepath)] = f.read()
+        except Exception as e:
+            print(f"Failed to read {filepath}: {e}")
+    return sources
+
+
 def main():
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        print("Error: GOOGLE_API_KEY not found in .env")
+    parser = argparse.ArgumentParser(description="Sync data/*.txt|*.md into the chat knowledge base")
+    # --full re-embeds every file (e.g. after the store was wiped); removed files are still deleted
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", "64")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("INGEST_CONCURRENCY", "4")))
+    parser.add_argument("--provider", choices=PROVIDERS, default=os.getenv("CHAT_PROVIDER", "google").lower())
+    parser.add_argument("--store", choices=VECTOR_STORES, default=os.getenv("VECTOR_STORE", "chroma").lower())
+    parser.add_argument("--chunk-tokens", type=int, default=int(os.getenv("CHAT_CHUNK_TOKENS", "400")))
+    args = parser.parse_args()
+
+    try:
+        embeddings, llm = create_providers(
+            args.provider,
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            embedding_model=os.getenv("CHAT_EMBEDDING_MODEL", "models/embedding-001"),
+            chat_model=os.getenv("CHAT_MODEL", "gemini-pro"),
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
         return
 
-    handler = ChatHandler(api_key)
-    
+    # Same store the API reads (see vector_store_dir in app.get_settings)
+    store_dir = os.getenv("VECTOR_STORE_DIR") or os.getenv("CHROMA_DIR") or default_store_dir(args.store, args.provider)
+    handler = ChatHandler(
+        embeddings, llm, persist_directory=store_dir, vector_store=args.store, chunk_tokens=args.chunk_tokens
+    )
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
         print(f"Created {DATA_DIR} directory. Place .txt or .md files here.")
         return
 
     files = glob.glob(f"{DATA_DIR}/*.txt") + glob.glob(f"{DATA_DIR}/*.md")
-    
+
     if not files:
         print("No files found in data/ directory.")
         return
 
-    print(f"Found {len(files)} files. Ingesting...")
-    
-    for filepath in files:
-        print(f"Processing {filepath}...")
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                text = f.read()
-                handler.ingest_text(text, {"source": os.path.basename(filepath)})
-        except Exception as e:
-            print(f"Failed to process {filepath}: {e}")
+    # Always the recorded chunk ids: they are what removed / renamed sources are deleted by
+    manifest = load_manifest(manifest_path)
+    pipeline = EmbeddingPipeline(handler.embeddings, args.batch_size, args.concurrency)
+
+    print(f"Found {len(files)} files. Syncing...")
+    report = asyncio.run(sync_sources(handler, read_sources(files), manifest, pipeline, args.full))
+    save_manifest(manifest, manifest_path)
 
-    print("Ingestion complete!")
+    print(
+        f"Ingestion complete! {report['changed']} changed, {report['unchanged']} unchanged, "
+        f"{report['removed']} removed; {report['chunks_added']} chunks embedded, "
+        f"{report['chunks_deleted']} deleted."
+    )
+    if report["chunks_added"]:
+        print(f"Embedding: {pipeline.stats}")
 
 if __name__ == "__main__":
     main()
-
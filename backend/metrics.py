@@ -0,0 +1,75 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+# Fields of an application the counters are keyed on; fetch these before changing a status
+METRIC_FIELDS = {"branch": 1, "branchKey": 1, "role": 1, "status": 1}
+
+
+def metric_key(branch_key: str, role: str) -> str:
+    return f"{branch_key}|{role}"
+
+
+def status_field(status: Optional[str]) -> str:
+    """Status names become sub-document keys, so strip characters Mongo treats specially."""
+    return (status or "unknown").replace(".", "_").replace("$", "_")
+
+
+class MetricDeltas:
+    """
+    Counter changes collected during a write, keyed by (branchKey, role).
+    Apply them with the repository's _apply_metrics in the same write path.
+    """
+
+    def __init__(self):
+        self.changes: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.branch_names: Dict[Tuple[str, str], str] = {}
+
+    def add(self, doc: dict, status: Optional[str], n: int = 1):
+        key = (doc.get("branchKey") or "", doc.get("role") or "Unknown Role")
+        self.branch_names[key] = doc.get("branch") or ""
+        self.changes[key][status_field(status)] += n
+
+    def move(self, doc: dict, new_status: str):
+        """`doc` holds the pre-update status."""
+        if doc.get("status") == new_status:
+            return
+        self.add(doc, doc.get("status"), -1)
+        self.add(doc, new_status, 1)
+
+    def items(self):
+        for key, counts in self.changes.items():
+            counts = {status: n for status, n in counts.items() if n}
+            if counts:
+                yield key, self.branch_names[key], counts
+
+    def __bool__(self):
+        return any(True for _ in self.items())
+
+
+def summarize_metrics(docs: Iterable[dict], branch_key: Optional[str] = None) -> dict:
+    """
+    Fold metric documents ({branchKey, branch, role, counts}) into the dashboard payload:
+    totals, then per branch totals + per role counts.
+    """
+    totals = Counter()
+    branches = {}
+    for doc in docs:
+        if branch_key is not None and doc.get("branchKey") != branch_key:
+            continue
+        counts = {status: n for status, n in doc.get("counts", {}).items() if n}
+        if not counts:
+            continue
+        branch = branches.setdefault(doc["branchKey"], {
+            "branch": doc.get("branch") or doc["branchKey"],
+            "total": 0,
+            "byStatus": Counter(),
+            "roles": {},
+        })
+        branch["roles"][doc["role"]] = counts
+        branch["byStatus"].update(counts)
+        branch["total"] += sum(counts.values())
+        totals.update(counts)
+
+    for branch in branches.values():
+        branch["byStatus"] = dict(branch["byStatus"])
+    return {"total": sum(totals.values()), "byStatus": dict(totals), "branches": branches}
@@ -0,0 +1,97 @@
+import hashlib
+import math
+import re
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.language_models.llms import LLM
+
+from search import tokenize
+
+PROVIDERS = ("google", "local")
+
+class HashingEmbeddings:
+    """
+    Deterministic local embeddings: word and word-bigram counts hashed into a
+    fixed number of signed buckets, L2-normalized. No model download, no network;
+    similar wording gives similar vectors, which is enough for retrieval tests.
+    Implements the LangChain Embeddings interface.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimensions, 1.0 if value >> 63 else -1.0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            index, sign = self._bucket(feature)
+            vector[index] += sign
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+class ExtractiveLLM(LLM):
+    """
+    Local stand-in for the chat model. Reads the Context / Question out of the
+    QA prompt and answers with the context sentences that share the most words
+    with the question, in their original order.
+    """
+
+    max_sentences: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "extractive"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        match = re.search(r"Context:(.*)Question:(.*?)Answer:", prompt, re.S)
+        if not match:
+            return "I don't know."
+        context, question = match.group(1), match.group(2)
+        wanted = set(tokenize(question))
+
+        sentences = [s.strip(" -\t") for s in re.split(r"(?<=[.!?])\s+|\n+", context) if s.strip(" -\t")]
+        scored = [(len(wanted & set(tokenize(s))), i) for i, s in enumerate(sentences)]
+        ranked = sorted(scored, key=lambda item: (-item[0], item[1]))[:self.max_sentences]
+        best = sorted(i for score, i in ranked if score)
+        if not best:
+            return "I don't know based on what I have about Generate."
+        return " ".join(sentences[i] for i in best)
+
+
+def create_providers(
+    provider: str,
+    api_key: Optional[str] = None,
+    embedding_model: str = "models/embedding-001",
+    chat_model: str = "gemini-pro",
+):
+    """(embeddings, llm) for the configured provider."""
+    if provider == "local":
+        return HashingEmbeddings(), ExtractiveLLM()
+    if provider == "google":
+        if not api_key:
+            raise ValueError("The google chat provider needs GOOGLE_API_KEY")
+        from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+
+        embeddings = GoogleGenerativeAIEmbeddings(model=embedding_model, google_api_key=api_key)
+        llm = ChatGoogleGenerativeAI(model=chat_model, temperature=0.3, google_api_key=api_key)
+        return embeddings, llm
+    raise ValueError(f"Unknown chat provider {provider!r} (expected one of {', '.join(PROVIDERS)})")
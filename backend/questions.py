@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+def role_key_for(role: str) -> str:
+    """
+    Handle "Chief", "Lead", "Member" mapping if exact match not found.
+    Simple keyword matching.
+    """
+    lowered = (role or "").lower()
+    if "chief" in lowered:
+        return "Chief"
+    if "lead" in lowered:
+        return "Lead"
+    if "member" in lowered:
+        return "Member"
+    return role
+
+
+class QuestionSet:
+    """A composed question list plus its pre-serialized body and ETag."""
+
+    def __init__(self, questions: List[dict]):
+        self.questions = questions
+        self.body = json.dumps(questions, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+
+
+class QuestionStore:
+    """
+    Caches data/questions.json and every (branch, role) merge of it.
+    Reloads when the file's mtime changes; `save` writes and refreshes in one go.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._config: dict = {}
+        self._sets: Dict[Tuple[Optional[str], Optional[str]], QuestionSet] = {}
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _build(self, config: dict, mtime: Optional[float]):
+        """
+        Precompose Global Default + Branch Default + Role Specific for every
+        branch/role in the config. (None, None) is the fallback for unknown branches.
+        """
+        global_default = list(config.get("default", []))
+        sets = {(None, None): QuestionSet(global_default)}
+
+        for branch, branch_data in config.get("branches", {}).items():
+            branch_questions = global_default + list(branch_data.get("default", []))
+            sets[(branch, None)] = QuestionSet(branch_questions)
+            for role_key, role_questions in branch_data.get("roles", {}).items():
+                sets[(branch, role_key)] = QuestionSet(branch_questions + list(role_questions))
+
+        # Swap everything at once so readers never see a half-built cache
+        self._config, self._sets, self._mtime = config, sets, mtime
+
+    def _refresh(self):
+        mtime = self._file_mtime()
+        if mtime is not None and mtime == self._mtime:
+            return
+        with self._lock:
+            mtime = self._file_mtime()
+            if mtime is not None and mtime == self._mtime:
+                return
+            try:
+                with open(self.path, "r") as f:
+                    config = json.load(f)
+            except Exception as e:
+                print(f"Error loading questions: {e}")
+                # Keep serving the last good config; start empty if there is none
+                if not self._sets:
+                    self._build({}, None)
+                return
+            self._build(config, mtime)
+
+    def config(self) -> dict:
+        self._refresh()
+        return self._config
+
+    def get(self, branch: str, role: str) -> QuestionSet:
+        self._refresh()
+        sets = self._sets
+        return (
+            sets.get((branch, role_key_for(role)))
+            or sets.get((branch, None))
+            or sets[(None, None)]
+        )
+
+    def save(self, config: dict):
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(config, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._build(config, self._file_mtime())
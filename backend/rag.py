@@ -1,12 +1,20 @@
 import os
-from typing import List, Dict
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_chroma import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import asyncio
+import hashlib
+import time
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from langchain.schema import Document
-from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 
+from chat_cache import AnswerCache, MemoryStore
+from conversation import Conversation, ConversationStore, assemble_context
+from search import BM25Index, HybridRetriever
+from text_splitter import Chunk, MarkdownChunker
+from vector_store import open_vector_store
+
+# Written next to the vector store by every ingest run: {source: {"hash": ..., "chunks": [ids]}}
+MANIFEST_NAME = "ingest_manifest.json"
+
 # Basic Knowledge Base to fallback on if no docs found
 DEFAULT_KNOWLEDGE = """
 Generate is Northeastern University's student-led product development studio.
@@ -24,84 +32,222 @@ Application Tips:
 - Applications close in mid-November.
 """
 
-class ChatHandler:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.persist_directory = "chroma_db"
+QA_PROMPT = PromptTemplate(
+    template="""Use the following pieces of context to answer the question at the end. 
+        If you don't know the answer, just say that you don't know, don't try to make up an answer.
+        Keep the answer helpful and encouraging.
+        {history}
+        Context: {context}
         
-        if not self.api_key:
-            print("ChatHandler: No Google API Key provided")
-            return
+        Question: {question}
+        Answer:""",
+    input_variables=["history", "context", "question"]
+)
 
-        # Use Google Gemini Models
-        self.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=self.api_key)
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            temperature=0.3,
-            google_api_key=self.api_key
-        )
-        
-        # Initialize Vector Store
-        self.vector_store = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
+
+def chunk_metadata(chunk: Chunk, metadata: Dict) -> Dict:
+    """Source metadata plus the chunk's heading path, when it has one."""
+    return {**metadata, "headings": chunk.headings} if chunk.headings else dict(metadata)
+
+
+def chunk_id(source: str, text: str) -> str:
+    """Stable id for a chunk: the same text from the same source always maps to the same vector."""
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+class ChatHandler:
+    def __init__(
+        self,
+        embeddings,
+        llm,
+        persist_directory: str = "chroma_db",
+        vector_store: str = "chroma",
+        max_concurrency: int = 4,
+        timeout: float = 30,
+        cache_store=None,
+        cache_similarity: Optional[float] = None,
+        retrieval: str = "hybrid",
+        conversations: Optional[ConversationStore] = None,
+        context_tokens: int = 1500,
+        chunk_tokens: int = 400,
+    ):
+        # Any LangChain embeddings / LLM pair; see providers.create_providers
+        self.embeddings = embeddings
+        self.llm = llm
+        self.persist_directory = persist_directory
+        self.vector_store = None
+        self.retriever = None
+        # Per-session history for follow-up questions; retrieved context is capped separately
+        self.conversations = conversations or ConversationStore()
+        self.context_tokens = context_tokens
+        # Lexical index over the same chunks as the vector store (hybrid retrieval)
+        self.lexical_index = BM25Index() if retrieval == "hybrid" else None
+        # Bounds how many chats run at once so chat load can't starve the rest of the API.
+        # Created on first use: on Python 3.9 a Semaphore binds to the loop current at creation.
+        self.max_concurrency = max_concurrency
+        self._slots = None
+        self.timeout = timeout
+        # Structure-aware chunks (headings / paragraphs / list items) merged up to chunk_tokens
+        self.text_splitter = MarkdownChunker(target_tokens=chunk_tokens)
+
+        # Answers to repeated (or, with a similarity threshold, near-identical) questions,
+        # keyed on the knowledge version so a re-ingest elsewhere retires them
+        self.manifest_path = os.path.join(persist_directory, MANIFEST_NAME)
+        self._manifest_stamp = None
+        self._manifest_hash = ""
+        self.answer_cache = AnswerCache(
+            cache_store or MemoryStore(),
+            embed=self.embeddings.aembed_query,
+            similarity_threshold=cache_similarity,
+            version=self.knowledge_version,
         )
+
+        # Initialize Vector Store ("chroma" or the in-memory "numpy" store for small corpora).
+        # `collection` is the raw count/get/upsert interface underneath the LangChain store.
+        self.vector_store, self.collection = open_vector_store(vector_store, self.persist_directory, self.embeddings)
         
         # Check if empty, if so, load default
         # Note: Chroma count might throw if collection doesn't exist, try/except block added
         try:
-            if self.vector_store._collection.count() == 0:
+            if self.collection.count() == 0:
                 print("Vector store empty, loading default knowledge...")
                 self.ingest_text(DEFAULT_KNOWLEDGE, {"source": "default"})
         except Exception as e:
              print(f"Vector store init warning: {e}. Loading default...")
              self.ingest_text(DEFAULT_KNOWLEDGE, {"source": "default"})
 
-    def ingest_text(self, text: str, metadata: Dict):
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50
+        if self.lexical_index is not None:
+            stored = self.collection.get(include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                self.lexical_index.add(doc_id, text, metadata)
+            self.retriever = HybridRetriever(vector_store=self.vector_store, index=self.lexical_index, k=3)
+        else:
+            self.retriever = self.vector_store.as_retriever(search_kwargs={"k": 3})
+
+    def split_text(self, text: str) -> List[Chunk]:
+        return self.text_splitter.split(text)
+
+    def add_chunks(self, chunks: List[Chunk], metadata: Dict) -> List[str]:
+        """
+        Embed and store chunks under content-derived ids. Chroma upserts by id,
+        so re-adding an unchanged chunk never creates a duplicate. Returns the ids.
+        """
+        source = metadata.get("source", "unknown")
+        by_id = {chunk_id(source, chunk.text): chunk for chunk in chunks}
+        if by_id:
+            texts = [chunk.text for chunk in by_id.values()]
+            metadatas = [chunk_metadata(chunk, metadata) for chunk in by_id.values()]
+            docs = [Document(page_content=text, metadata=meta) for text, meta in zip(texts, metadatas)]
+            self.vector_store.add_documents(docs, ids=list(by_id))
+            self._index_chunks(list(by_id), texts, metadatas)
+            self._knowledge_changed()
+        return list(by_id)
+
+    def add_embedded(self, ids: List[str], texts: List[str], metadatas: List[Dict], vectors: List[List[float]]):
+        """Write chunks whose embeddings were computed elsewhere (see embedding_pipeline) in bulk."""
+        # Chroma caps the size of a single write, so upsert in slices
+        for i in range(0, len(ids), 1000):
+            self.collection.upsert(
+                ids=ids[i:i + 1000],
+                documents=texts[i:i + 1000],
+                metadatas=metadatas[i:i + 1000],
+                embeddings=vectors[i:i + 1000],
+            )
+        self._index_chunks(ids, texts, metadatas)
+        if ids:
+            self._knowledge_changed()
+
+    def delete_chunks(self, ids: List[str]):
+        if ids:
+            self.vector_store.delete(ids=list(ids))
+            if self.lexical_index is not None:
+                self.lexical_index.remove(ids)
+            self._knowledge_changed()
+
+    def ingest_text(self, text: str, metadata: Dict) -> List[str]:
+        return self.add_chunks(self.split_text(text), metadata)
+
+    def _index_chunks(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        if self.lexical_index is not None:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self.lexical_index.add(doc_id, text, metadata)
+
+    def knowledge_version(self) -> str:
+        """
+        Hash of the ingest manifest. Ingest runs in its own process, so clearing
+        the cache there never reaches the API's cache (or Redis); the manifest it
+        rewrites is what the API sees. Re-hashed only when the file changes.
+        """
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return ""
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._manifest_stamp:
+            try:
+                with open(self.manifest_path, "rb") as f:
+                    self._manifest_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+            except OSError:
+                return self._manifest_hash
+            self._manifest_stamp = stamp
+        return self._manifest_hash
+
+    def _knowledge_changed(self):
+        # Cached answers may no longer match the knowledge base
+        if self.answer_cache:
+            self.answer_cache.clear()
+
+    def _chat_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def _prepare(self, query: str, conversation: Optional[Conversation]) -> Tuple[str, List[str]]:
+        """Retrieve and build the prompt: (prompt, sources). Duplicate / overlapping chunks are dropped."""
+        # A follow-up ("what about hardware?") retrieves better alongside the question it follows
+        previous = conversation.last_question() if conversation else None
+        docs = await self.retriever.ainvoke(f"{previous} {query}" if previous else query)
+        sources = list(set([doc.metadata.get("source", "unknown") for doc in docs]))
+        history = conversation.history_text() if conversation else ""
+        prompt = QA_PROMPT.format(
+            history=f"\n        Conversation so far:\n{history}\n" if history else "",
+            context=assemble_context([doc.page_content for doc in docs], self.context_tokens),
+            question=query,
         )
-        docs = [Document(page_content=x, metadata=metadata) for x in text_splitter.split_text(text)]
-        self.vector_store.add_documents(docs)
+        return prompt, sources
+
+    async def _answer(self, query: str, conversation: Optional[Conversation]) -> Dict:
+        # Async calls keep the event loop free during the embedding + Gemini round trip
+        async with self._chat_slots():
+            prompt, sources = await self._prepare(query, conversation)
+            result = await self.llm.ainvoke(prompt)
+        # Chat models return messages, plain LLMs return strings
+        return {"response": getattr(result, "content", result), "sources": sources}
+
+    def _conversation(self, session_id: Optional[str]) -> Optional[Conversation]:
+        return self.conversations.get(session_id) if session_id else None
 
-    async def get_response(self, query: str) -> Dict:
-        if not self.vector_store:
+    async def get_response(self, query: str, session_id: Optional[str] = None) -> Dict:
+        if not self.retriever:
             return {"response": "System error: Vector store not initialized", "sources": []}
 
-        # Create specific prompt
-        prompt_template = """Use the following pieces of context to answer the question at the end. 
-        If you don't know the answer, just say that you don't know, don't try to make up an answer.
-        Keep the answer helpful and encouraging.
-        
-        Context: {context}
-        
-        Question: {question}
-        Answer:"""
-        
-        PROMPT = PromptTemplate(
-            template=prompt_template, input_variables=["context", "question"]
-        )
-        
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.vector_store.as_retriever(search_kwargs={"k": 3}),
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": PROMPT}
-        )
-        
+        conversation = self._conversation(session_id)
+        # Answers that depend on earlier turns are not shared through the cache
+        cacheable = conversation is None or not conversation.turns
+        cached, vector = await self.answer_cache.lookup(query) if cacheable else (None, None)
+        if cached is not None:
+            if conversation is not None:
+                conversation.add(query, cached["response"])
+            return cached
+
         try:
-            result = qa_chain.invoke({"query": query})
-            
-            answer = result.get("result", "")
-            source_docs = result.get("source_documents", [])
-            
-            sources = list(set([doc.metadata.get("source", "unknown") for doc in source_docs]))
-            
+            # The timeout covers queueing for a slot as well as the call itself
+            response = await asyncio.wait_for(self._answer(query, conversation), self.timeout)
+        except asyncio.TimeoutError:
+            print(f"RAG Timeout after {self.timeout}s")
             return {
-                "response": answer,
-                "sources": sources
+                "response": "That took too long to answer. Please try again in a moment.",
+                "sources": []
             }
         except Exception as e:
             print(f"RAG Error: {e}")
@@ -109,3 +255,73 @@ class ChatHandler:
                 "response": "I'm having trouble processing that right now. (Gemini API Error or similar)",
                 "sources": []
             }
+
+        if conversation is not None:
+            conversation.add(query, response["response"])
+        if cacheable:
+            await self.answer_cache.put(query, response, vector)
+        return response
+
+    async def stream_response(self, query: str, session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Same answer as get_response, as events: ("sources", [...]) once retrieval is
+        done, ("token", text) as the model generates, then ("done", timings).
+        Closing the generator (client went away) cancels the in-flight LLM call.
+        Raises asyncio.TimeoutError past the chat timeout.
+        """
+        started = time.perf_counter()
+        deadline = started + self.timeout
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        conversation = self._conversation(session_id)
+        cacheable = conversation is None or not conversation.turns
+        cached, vector = await self.answer_cache.lookup(query) if cacheable else (None, None)
+        if cached is not None:
+            if conversation is not None:
+                conversation.add(query, cached["response"])
+            yield "sources", cached["sources"]
+            yield "token", cached["response"]
+            yield "done", {"cached": True, "ttft_ms": elapsed_ms(), "total_ms": elapsed_ms()}
+            return
+
+        parts = []
+        ttft_ms = None
+        # Like get_response, waiting for a slot counts against the timeout
+        slots = self._chat_slots()
+        await asyncio.wait_for(slots.acquire(), deadline - time.perf_counter())
+        try:
+            prompt, sources = await asyncio.wait_for(
+                self._prepare(query, conversation), deadline - time.perf_counter()
+            )
+            yield "sources", sources
+
+            stream = self.llm.astream(prompt).__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline - time.perf_counter())
+                    except StopAsyncIteration:
+                        break
+                    # Chat models stream message chunks, plain LLMs stream strings
+                    text = getattr(chunk, "content", chunk)
+                    if not text:
+                        continue
+                    if ttft_ms is None:
+                        ttft_ms = elapsed_ms()
+                    parts.append(text)
+                    yield "token", text
+            finally:
+                await stream.aclose()
+        finally:
+            slots.release()
+
+        timings = {"cached": False, "ttft_ms": ttft_ms, "total_ms": elapsed_ms()}
+        print(f"Chat stream: first token {ttft_ms} ms, total {timings['total_ms']} ms")
+        answer = {"response": "".join(parts), "sources": sources}
+        if conversation is not None:
+            conversation.add(query, answer["response"])
+        if cacheable:
+            await self.answer_cache.put(query, answer, vector)
+        yield "done", timings
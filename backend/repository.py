@@ -0,0 +1,1009 @@
+import copy
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, AsyncMongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+
+from dedup import DEDUP_FIELDS, dedup_keys
+from metrics import METRIC_FIELDS, MetricDeltas, metric_key, summarize_metrics
+from roster import Level
+
+OPEN_STATUSES = ["submitted", "under_review"]
+
+# Enough of an application to score it as a possible duplicate
+DEDUP_PROJECTION = {"email": 1, "status": 1, "dedupKeys": 1, "formData.firstName": 1, "formData.lastName": 1}
+
+# Queue rows leave out the applicant's answers; reviewers load them via /api/applications/{id}
+QUEUE_PROJECTION = {"formData": 0, "history": 0, "stageHistory": 0}
+
+
+class ApplicationNotFound(Exception):
+    pass
+
+
+class ClaimConflict(Exception):
+    pass
+
+
+RELEASED_CLAIM = {"claimed_by": None, "claimed_at": None, "lease_expires_at": None}
+
+
+def decision_entries(history: Optional[list]) -> list:
+    """
+    Decision records from an application's `history`. Stage changes go to
+    `stageHistory`, but applications advanced before that have them mixed in.
+    """
+    return [entry for entry in history or [] if "decision" in entry]
+
+
+# Aggregation twin of decision_entries
+DECISIONS_EXPR = {"$filter": {
+    "input": {"$ifNull": ["$history", []]},
+    "as": "entry",
+    "cond": {"$ne": [{"$type": "$$entry.decision"}, "missing"]},
+}}
+
+
+class ApplicationRepository:
+    """
+    Data-access interface used by the API routes.
+    Application ids go in and come out as strings; documents are plain dicts.
+    """
+
+    async def ensure_indexes(self):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def create_application(self, application: dict) -> str:
+        raise NotImplementedError
+
+    async def list_applications_by_email(self, email: str) -> List[dict]:
+        raise NotImplementedError
+
+    async def get_application(self, app_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def find_duplicate_candidates(
+        self, keys: Dict[str, str], branch_key: str, role: str, limit: int = 20
+    ) -> List[dict]:
+        """
+        Applications to the same branch and role sharing any of the dedup `keys`
+        (email, NUID or last name + first initial; see dedup.dedup_keys).
+        """
+        raise NotImplementedError
+
+    async def review_queue(
+        self,
+        branch_key: str,
+        email: str,
+        now,
+        levels: Optional[List[Level]],
+        after: Optional[str],
+        limit: int,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of open applications in a branch that are unclaimed, whose lease
+        has expired, or claimed by `email`, restricted to `levels` (None = any),
+        ordered by _id. Returns (page, cursor for the next page or None).
+        """
+        raise NotImplementedError
+
+    async def claim_application(self, app_id: str, email: str, now, lease_expires_at) -> dict:
+        """
+        Atomically take (or re-take) the lease on an open application.
+        Returns the claimed queue row. Raises ApplicationNotFound / ClaimConflict.
+        """
+        raise NotImplementedError
+
+    async def claim_next(
+        self,
+        branch_key: str,
+        email: str,
+        now,
+        lease_expires_at,
+        levels: Optional[List[Level]],
+        count: int,
+    ) -> List[dict]:
+        """Claim up to `count` unclaimed (or expired) applications, oldest first."""
+        raise NotImplementedError
+
+    async def renew_claim(self, app_id: str, email: str, lease_expires_at):
+        """Extend a lease held by `email`. Raises ApplicationNotFound / ClaimConflict."""
+        raise NotImplementedError
+
+    async def release_claim(self, app_id: str, email: str):
+        """Give a lease held by `email` back to the queue. Raises ApplicationNotFound / ClaimConflict."""
+        raise NotImplementedError
+
+    async def record_decision(self, app_id: str, decision_record: dict, note_entry: Optional[dict]):
+        raise NotImplementedError
+
+    async def add_note(self, app_id: str, note_entry: dict):
+        raise NotImplementedError
+
+    # Bulk operations take an optional branch_key (None = any branch) and return
+    # {application_id: error message, or None if the item was written}.
+
+    async def bulk_record_decisions(self, entries: List[dict], branch_key: Optional[str]) -> Dict[str, Optional[str]]:
+        """entries: [{"application_id", "record": decision record, "note": note entry or None}]"""
+        raise NotImplementedError
+
+    async def bulk_set_stage(
+        self, app_ids: List[str], stage: str, history_entry: dict, now, branch_key: Optional[str]
+    ) -> Dict[str, Optional[str]]:
+        raise NotImplementedError
+
+    async def bulk_assign(
+        self,
+        app_ids: List[str],
+        reviewer_email: str,
+        now,
+        lease_expires_at,
+        branch_key: Optional[str],
+        reviewer_branch_key: Optional[str] = None,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Give open applications to `reviewer_email`, replacing any current lease.
+        Applications outside `reviewer_branch_key` (the reviewer's branch; None
+        for all) are reported rather than assigned to someone who can't open them.
+        """
+        raise NotImplementedError
+
+    def iter_branch_notes(self, branch_key: str, offset: int, limit: Optional[int]) -> AsyncIterator[dict]:
+        """
+        Note-report rows for a branch ({role, id, name, email, status, notes, decisions}),
+        ordered by role then _id, skipping `offset` and keeping at most `limit` rows per role.
+        """
+        raise NotImplementedError
+
+    def iter_export(
+        self,
+        fields: List[str],
+        branch_key: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        role_level: Optional[Level] = None,
+        role: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[dict]:
+        """Applications matching the filters, projected to `fields` (dotted paths allowed), in _id order."""
+        raise NotImplementedError
+
+    async def reset_season(self) -> int:
+        """Delete all applications, decisions and metrics. Returns the number of applications removed."""
+        raise NotImplementedError
+
+    async def dashboard_metrics(self, branch_key: Optional[str] = None) -> dict:
+        """Per-branch / per-role / per-status counts, read from the maintained counters."""
+        raise NotImplementedError
+
+    async def rebuild_metrics(self) -> dict:
+        """Recount everything from the applications themselves (reconciliation)."""
+        raise NotImplementedError
+
+
+def _role_level_expr() -> dict:
+    """Aggregation-expression twin of roster.classify_role, used to backfill old documents."""
+    role = {"$ifNull": ["$role", ""]}
+    rules = [("executive", Level.EXECUTIVE), ("director", Level.DIRECTOR),
+             ("chief", Level.CHIEF), ("lead", Level.LEAD)]
+    return {
+        "$switch": {
+            "branches": [
+                {"case": {"$regexMatch": {"input": role, "regex": word, "options": "i"}}, "then": int(level)}
+                for word, level in rules
+            ],
+            "default": int(Level.MEMBER),
+        }
+    }
+
+
+def _or_default(field: str, default: str) -> dict:
+    """Aggregation twin of `doc.get(field) or default`: missing, null and "" all become `default`."""
+    return {"$let": {
+        "vars": {"value": {"$ifNull": [f"${field}", ""]}},
+        "in": {"$cond": [{"$eq": ["$$value", ""]}, default, "$$value"]},
+    }}
+
+
+def _status_field_expr() -> dict:
+    """Aggregation twin of metrics.status_field."""
+    status = _or_default("status", "unknown")
+    for char in (".", "$"):
+        # $literal: a bare "$" string would be read as a field path
+        status = {"$replaceAll": {"input": status, "find": {"$literal": char}, "replacement": "_"}}
+    return status
+
+
+def export_filter(branch_key=None, statuses=None, role_level=None, role=None) -> dict:
+    query = {}
+    if branch_key is not None:
+        query["branchKey"] = branch_key
+    if statuses:
+        query["status"] = {"$in": statuses}
+    if role_level is not None:
+        query["roleLevel"] = int(role_level)
+    if role is not None:
+        query["role"] = role
+    return query
+
+
+def get_path(doc: dict, path: str):
+    """Read a dotted path ("formData.firstName") out of a nested dict."""
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class MongoRepository(ApplicationRepository):
+    def __init__(
+        self,
+        mongo_uri: str,
+        db_name: str = "recruitment",
+        max_pool_size: int = 100,
+        min_pool_size: int = 0,
+        timeout_ms: int = 5000,
+        lease_minutes: int = 120,
+    ):
+        # Lease given to claims that predate leases (see ensure_indexes)
+        self.lease_minutes = lease_minutes
+        self.client = AsyncMongoClient(
+            mongo_uri,
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            serverSelectionTimeoutMS=timeout_ms,
+            connectTimeoutMS=timeout_ms,
+        )
+        self.db = self.client[db_name]
+        self.users = self.db["users"]
+        self.applications = self.db["applications"]
+        self.decisions = self.db["decisions"]
+        self.metrics = self.db["metrics"]
+
+    async def ensure_indexes(self):
+        await self.users.create_index("email", unique=True)
+        await self.applications.create_index("email")
+        await self.applications.create_index("branch")
+        await self.applications.create_index("status")
+        await self.applications.create_index([
+            ("branchKey", ASCENDING),
+            ("status", ASCENDING),
+            ("roleLevel", ASCENDING),
+            ("lease_expires_at", ASCENDING),
+        ])
+        # The review queue pages in _id order. With status / roleLevel as $in point values the
+        # planner merge-sorts these index ranges (SORT_MERGE) instead of sorting every open
+        # application in memory; the second index serves queues with no level filter.
+        await self.applications.create_index([
+            ("branchKey", ASCENDING), ("status", ASCENDING), ("roleLevel", ASCENDING), ("_id", ASCENDING),
+        ])
+        await self.applications.create_index([("branchKey", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)])
+        # One index per dedup key so each $or branch of find_duplicate_candidates is a point lookup
+        for field in DEDUP_FIELDS:
+            await self.applications.create_index([
+                (f"dedupKeys.{field}", ASCENDING), ("branchKey", ASCENDING), ("role", ASCENDING),
+            ])
+        # Applications created before branchKey / roleLevel existed
+        await self.applications.update_many(
+            {"branchKey": {"$exists": False}},
+            [{"$set": {
+                "branchKey": {"$toLower": {"$trim": {"input": {"$ifNull": ["$branch", ""]}}}},
+                "roleLevel": _role_level_expr(),
+            }}]
+        )
+        # ...and claims taken before leases existed: with no lease_expires_at they would
+        # look free (_lease_free) and drop back into everyone's queue
+        await self.applications.update_many(
+            {"status": "under_review", "claimed_by": {"$ne": None}, "lease_expires_at": None},
+            [{"$set": {"lease_expires_at": {
+                "$add": [{"$ifNull": ["$claimed_at", "$$NOW"]}, self.lease_minutes * 60 * 1000]
+            }}}]
+        )
+        # ...and before dedupKeys existed
+        backfill = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"dedupKeys": dedup_keys(doc)}})
+            async for doc in self.applications.find(
+                {"dedupKeys": {"$exists": False}},
+                {"email": 1, "nuid": 1, "formData.email": 1, "formData.nuid": 1, **DEDUP_PROJECTION},
+            )
+        ]
+        for start in range(0, len(backfill), 1000):
+            await self.applications.bulk_write(backfill[start:start + 1000], ordered=False)
+
+    async def close(self):
+        await self.client.close()
+
+    @staticmethod
+    def _out(doc: Optional[dict]) -> Optional[dict]:
+        if doc is not None:
+            doc["_id"] = str(doc["_id"])
+        return doc
+
+    async def _apply_metrics(self, deltas: MetricDeltas, session=None):
+        """Fold counter changes into the metrics collection in one unordered bulk write."""
+        if not deltas:
+            return
+        now = datetime.utcnow()
+        await self.metrics.bulk_write([
+            UpdateOne(
+                {"_id": metric_key(branch_key, role)},
+                {
+                    "$inc": {f"counts.{status}": n for status, n in counts.items()},
+                    "$set": {"branchKey": branch_key, "branch": branch, "role": role, "updatedAt": now},
+                },
+                upsert=True,
+            )
+            for (branch_key, role), branch, counts in deltas.items()
+        ], ordered=False, session=session)
+
+    async def create_application(self, application: dict) -> str:
+        result = await self.applications.insert_one(application)
+        deltas = MetricDeltas()
+        deltas.add(application, application.get("status"))
+        await self._apply_metrics(deltas)
+        return str(result.inserted_id)
+
+    async def list_applications_by_email(self, email: str) -> List[dict]:
+        return [self._out(doc) async for doc in self.applications.find({"email": email})]
+
+    async def get_application(self, app_id: str) -> Optional[dict]:
+        return self._out(await self.applications.find_one({"_id": ObjectId(app_id)}))
+
+    async def find_duplicate_candidates(self, keys, branch_key, role, limit=20):
+        clauses = [{f"dedupKeys.{field}": keys[field]} for field in DEDUP_FIELDS if keys.get(field)]
+        if not clauses:
+            return []
+        query = {"branchKey": branch_key, "role": role, "$or": clauses}
+        return [self._out(doc) async for doc in self.applications.find(query, DEDUP_PROJECTION).limit(limit)]
+
+    @staticmethod
+    def _open_query(branch_key: str, levels) -> dict:
+        query = {"branchKey": branch_key, "status": {"$in": OPEN_STATUSES}}
+        if levels is not None:
+            query["roleLevel"] = {"$in": [int(level) for level in levels]}
+        return query
+
+    @staticmethod
+    def _lease_free(now) -> List[dict]:
+        # `None` matches both a missing field and an explicit null (released / never claimed)
+        return [{"lease_expires_at": None}, {"lease_expires_at": {"$lte": now}}]
+
+    async def _claim_failure(self, oid: ObjectId) -> Exception:
+        """Work out why a conditional claim update matched nothing."""
+        app = await self.applications.find_one({"_id": oid}, {"status": 1})
+        if not app:
+            return ApplicationNotFound(str(oid))
+        return ClaimConflict(app.get("status"))
+
+    async def review_queue(self, branch_key, email, now, levels, after, limit):
+        query = self._open_query(branch_key, levels)
+        query["$or"] = self._lease_free(now) + [{"claimed_by": email}]
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
+
+        cursor = self.applications.find(query, QUEUE_PROJECTION).sort("_id", ASCENDING).limit(limit)
+        page = [self._out(doc) async for doc in cursor]
+        next_cursor = page[-1]["_id"] if len(page) == limit else None
+        return page, next_cursor
+
+    async def claim_application(self, app_id, email, now, lease_expires_at):
+        oid = ObjectId(app_id)
+        lease = {
+            "claimed_by": email,
+            "claimed_at": now,
+            "lease_expires_at": lease_expires_at,
+            "status": "under_review",
+        }
+        doc = await self.applications.find_one_and_update(
+            {
+                "_id": oid,
+                "status": {"$in": OPEN_STATUSES},
+                "$or": self._lease_free(now) + [{"claimed_by": email}],
+            },
+            {"$set": lease},
+            projection=QUEUE_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if doc is None:
+            raise await self._claim_failure(oid)
+
+        deltas = MetricDeltas()
+        deltas.move(doc, "under_review")
+        await self._apply_metrics(deltas)
+        return self._out({**doc, **lease})
+
+    async def claim_next(self, branch_key, email, now, lease_expires_at, levels, count):
+        query = self._open_query(branch_key, levels)
+        query["$or"] = self._lease_free(now)
+        lease = {
+            "claimed_by": email,
+            "claimed_at": now,
+            "lease_expires_at": lease_expires_at,
+            "status": "under_review",
+        }
+        # Mongo has no atomic "update N and return them", so take them one at a time;
+        # each find_one_and_update is atomic, so concurrent callers never get the same app.
+        claimed = []
+        deltas = MetricDeltas()
+        for _ in range(count):
+            doc = await self.applications.find_one_and_update(
+                query,
+                {"$set": lease},
+                projection=QUEUE_PROJECTION,
+                sort=[("_id", ASCENDING)],
+                return_document=ReturnDocument.BEFORE,
+            )
+            if doc is None:
+                break
+            deltas.move(doc, "under_review")
+            claimed.append(self._out({**doc, **lease}))
+        await self._apply_metrics(deltas)
+        return claimed
+
+    async def renew_claim(self, app_id, email, lease_expires_at):
+        oid = ObjectId(app_id)
+        result = await self.applications.update_one(
+            {"_id": oid, "claimed_by": email, "status": "under_review"},
+            {"$set": {"lease_expires_at": lease_expires_at}}
+        )
+        if result.matched_count == 0:
+            raise await self._claim_failure(oid)
+
+    async def release_claim(self, app_id, email):
+        oid = ObjectId(app_id)
+        doc = await self.applications.find_one_and_update(
+            {"_id": oid, "claimed_by": email, "status": "under_review"},
+            {"$set": {**RELEASED_CLAIM, "status": "submitted"}},
+            projection=METRIC_FIELDS,
+        )
+        if doc is None:
+            raise await self._claim_failure(oid)
+
+        deltas = MetricDeltas()
+        deltas.move(doc, "submitted")
+        await self._apply_metrics(deltas)
+
+    async def record_decision(self, app_id: str, decision_record: dict, note_entry: Optional[dict]):
+        # insert_one adds an ObjectId `_id` to the dict; keep it out of the embedded history
+        await self.decisions.insert_one(dict(decision_record))
+
+        update_op = {
+            "$set": {
+                "status": decision_record["decision"],
+                **RELEASED_CLAIM
+            },
+            "$push": {"history": decision_record}
+        }
+        if note_entry:
+            update_op["$push"]["notes"] = note_entry
+
+        before = await self.applications.find_one_and_update(
+            {"_id": ObjectId(app_id)}, update_op, projection=METRIC_FIELDS
+        )
+        if before is not None:
+            deltas = MetricDeltas()
+            deltas.move(before, decision_record["decision"])
+            await self._apply_metrics(deltas)
+
+    async def add_note(self, app_id: str, note_entry: dict):
+        await self.applications.update_one(
+            {"_id": ObjectId(app_id)},
+            {"$push": {"notes": note_entry}}
+        )
+
+    async def _in_transaction(self, work):
+        """
+        Run `work(session)` in a transaction. Standalone servers (local dev) don't
+        support transactions, so fall back to running it without one.
+        """
+        try:
+            async with self.client.start_session() as session:
+                return await session.with_transaction(work)
+        except OperationFailure as e:
+            if e.code != 20:  # IllegalOperation: transactions need a replica set
+                raise
+        return await work(None)
+
+    async def _bulk_targets(
+        self, app_ids: List[str], branch_key: Optional[str], session, check_open=False, reviewer_branch_key=None
+    ):
+        """Look up every target in one query; returns (results with errors filled in, ids to write)."""
+        results: Dict[str, Optional[str]] = {}
+        found = {}
+        cursor = self.applications.find(
+            {"_id": {"$in": [ObjectId(app_id) for app_id in app_ids]}},
+            METRIC_FIELDS,
+            session=session,
+        )
+        async for doc in cursor:
+            found[str(doc["_id"])] = doc
+
+        writable = []
+        for app_id in app_ids:
+            doc = found.get(app_id)
+            if doc is None:
+                results[app_id] = "not found"
+            elif branch_key is not None and doc.get("branchKey") != branch_key:
+                results[app_id] = "not in your branch"
+            elif reviewer_branch_key is not None and doc.get("branchKey") != reviewer_branch_key:
+                results[app_id] = "reviewer cannot access this branch"
+            elif check_open and doc.get("status") not in OPEN_STATUSES:
+                results[app_id] = "application is not open"
+            else:
+                results[app_id] = None
+                writable.append(app_id)
+        return results, writable, found
+
+    async def _written(self, result, writable: List[str], marker: dict, session) -> List[str]:
+        """
+        Ids in `writable` the bulk write really updated. In a transaction every
+        update matches (targets were read in it, and a concurrent change aborts
+        it); without one (standalone server) a target can be deleted or change
+        status in between, so a short matched_count means re-reading which ids
+        now carry the write (`marker`).
+        """
+        if result.matched_count == len(writable):
+            return writable
+        cursor = self.applications.find(
+            {"_id": {"$in": [ObjectId(app_id) for app_id in writable]}, **marker}, {"_id": 1}, session=session
+        )
+        done = {str(doc["_id"]) async for doc in cursor}
+        return [app_id for app_id in writable if app_id in done]
+
+    async def bulk_record_decisions(self, entries, branch_key):
+        by_id = {entry["application_id"]: entry for entry in entries}
+
+        async def work(session):
+            results, writable, found = await self._bulk_targets(list(by_id), branch_key, session)
+            if not writable:
+                return results
+
+            updates = []
+            for app_id in writable:
+                record, note = by_id[app_id]["record"], by_id[app_id]["note"]
+                push = {"history": record}
+                if note:
+                    push["notes"] = note
+                updates.append(UpdateOne(
+                    {"_id": ObjectId(app_id)},
+                    {"$set": {"status": record["decision"], **RELEASED_CLAIM}, "$push": push}
+                ))
+
+            await self.decisions.insert_many(
+                [dict(by_id[app_id]["record"]) for app_id in writable], ordered=False, session=session
+            )
+            result = await self.applications.bulk_write(updates, ordered=False, session=session)
+            # Unconditional updates: a miss means the application was deleted
+            written = await self._written(result, writable, {}, session)
+            for app_id in set(writable) - set(written):
+                results[app_id] = "not found"
+
+            deltas = MetricDeltas()
+            for app_id in written:
+                deltas.move(found[app_id], by_id[app_id]["record"]["decision"])
+            await self._apply_metrics(deltas, session)
+            return results
+
+        return await self._in_transaction(work)
+
+    async def bulk_set_stage(self, app_ids, stage, history_entry, now, branch_key):
+        async def work(session):
+            results, writable, found = await self._bulk_targets(app_ids, branch_key, session)
+            if writable:
+                result = await self.applications.bulk_write([
+                    UpdateOne(
+                        {"_id": ObjectId(app_id)},
+                        {
+                            "$set": {"status": stage, f"timestamps.{stage}": now, **RELEASED_CLAIM},
+                            "$push": {"stageHistory": history_entry},
+                        }
+                    )
+                    for app_id in writable
+                ], ordered=False, session=session)
+                written = await self._written(result, writable, {}, session)
+                for app_id in set(writable) - set(written):
+                    results[app_id] = "not found"
+
+                deltas = MetricDeltas()
+                for app_id in written:
+                    deltas.move(found[app_id], stage)
+                await self._apply_metrics(deltas, session)
+            return results
+
+        return await self._in_transaction(work)
+
+    async def bulk_assign(self, app_ids, reviewer_email, now, lease_expires_at, branch_key, reviewer_branch_key=None):
+        async def work(session):
+            results, writable, found = await self._bulk_targets(
+                app_ids, branch_key, session, check_open=True, reviewer_branch_key=reviewer_branch_key
+            )
+            if writable:
+                result = await self.applications.bulk_write([
+                    UpdateOne(
+                        {"_id": ObjectId(app_id), "status": {"$in": OPEN_STATUSES}},
+                        {"$set": {
+                            "claimed_by": reviewer_email,
+                            "claimed_at": now,
+                            "lease_expires_at": lease_expires_at,
+                            "status": "under_review",
+                        }}
+                    )
+                    for app_id in writable
+                ], ordered=False, session=session)
+                written = await self._written(
+                    result, writable, {"claimed_by": reviewer_email, "status": "under_review"}, session
+                )
+                for app_id in set(writable) - set(written):
+                    results[app_id] = "application is not open"
+
+                deltas = MetricDeltas()
+                for app_id in written:
+                    deltas.move(found[app_id], "under_review")
+                await self._apply_metrics(deltas, session)
+            return results
+
+        return await self._in_transaction(work)
+
+    async def iter_branch_notes(self, branch_key, offset, limit):
+        full_name = {"$trim": {"input": {"$concat": [
+            {"$ifNull": ["$formData.firstName", ""]}, " ", {"$ifNull": ["$formData.lastName", ""]}
+        ]}}}
+        rank_window = {"$gt": offset}
+        if limit is not None:
+            rank_window["$lte"] = offset + limit
+
+        pipeline = [
+            {"$match": {"branchKey": branch_key}},
+            # Only the report fields leave the server; formData is reduced to a name
+            {"$project": {
+                "_id": 0,
+                "appId": "$_id",
+                # Same grouping as InMemoryRepository: missing, null and "" are all "Unknown Role"
+                "role": _or_default("role", "Unknown Role"),
+                "name": {"$let": {
+                    "vars": {"name": full_name},
+                    "in": {"$cond": [{"$eq": ["$$name", ""]}, "$email", "$$name"]},
+                }},
+                "email": 1,
+                "status": 1,
+                "notes": {"$ifNull": ["$notes", []]},
+                "decisions": DECISIONS_EXPR,
+            }},
+            # Group by role server-side: number rows within each role for per-role paging
+            {"$setWindowFields": {
+                "partitionBy": "$role",
+                "sortBy": {"appId": 1},
+                "output": {"rank": {"$documentNumber": {}}},
+            }},
+            {"$match": {"rank": rank_window}},
+            {"$sort": {"role": 1, "appId": 1}},
+            {"$project": {"rank": 0}},
+        ]
+        cursor = await self.applications.aggregate(pipeline, allowDiskUse=True, batchSize=200)
+        async for row in cursor:
+            row["id"] = str(row.pop("appId"))
+            yield row
+
+    async def iter_export(self, fields, branch_key=None, statuses=None, role_level=None, role=None,
+                          batch_size=500):
+        cursor = self.applications.find(
+            export_filter(branch_key, statuses, role_level, role),
+            {field: 1 for field in fields},
+            batch_size=batch_size,
+        ).sort("_id", ASCENDING)
+        async for doc in cursor:
+            if "history" in doc:
+                doc["history"] = decision_entries(doc["history"])
+            yield self._out(doc)
+
+    async def reset_season(self) -> int:
+        count = await self.applications.count_documents({})
+        await self.applications.delete_many({})
+        await self.decisions.delete_many({})
+        await self.metrics.delete_many({})
+        return count
+
+    async def dashboard_metrics(self, branch_key=None):
+        query = {"branchKey": branch_key} if branch_key is not None else {}
+        return summarize_metrics([doc async for doc in self.metrics.find(query)], branch_key)
+
+    async def rebuild_metrics(self):
+        now = datetime.utcnow()
+        pipeline = [
+            {"$group": {
+                # Same keys as MetricDeltas.add, so later increments land on the rebuilt counters
+                "_id": {
+                    "branchKey": {"$ifNull": ["$branchKey", ""]},
+                    "role": _or_default("role", "Unknown Role"),
+                    "status": _status_field_expr(),
+                },
+                "branch": {"$first": "$branch"},
+                "n": {"$sum": 1},
+            }},
+            {"$group": {
+                "_id": {"$concat": ["$_id.branchKey", "|", "$_id.role"]},
+                "branchKey": {"$first": "$_id.branchKey"},
+                "role": {"$first": "$_id.role"},
+                "branch": {"$first": "$branch"},
+                "counts": {"$push": {"k": "$_id.status", "v": "$n"}},
+            }},
+            {"$set": {"counts": {"$arrayToObject": "$counts"}, "updatedAt": now}},
+            # $out swaps the collection in atomically once the pipeline finishes
+            {"$out": self.metrics.name},
+        ]
+        await (await self.applications.aggregate(pipeline, allowDiskUse=True)).to_list(None)
+        return await self.dashboard_metrics()
+
+
+class InMemoryRepository(ApplicationRepository):
+    """
+    Dict-backed implementation for unit tests and load benchmarks.
+    Every method runs without awaiting, so each call is atomic on the event loop.
+    """
+
+    def __init__(self):
+        self.applications: Dict[str, dict] = {}
+        self.decisions: List[dict] = []
+        self.metrics: Dict[str, dict] = {}
+
+    def _apply_metrics(self, deltas: MetricDeltas):
+        for (branch_key, role), branch, counts in deltas.items():
+            doc = self.metrics.setdefault(
+                metric_key(branch_key, role), {"branchKey": branch_key, "role": role, "counts": {}}
+            )
+            doc["branch"] = branch
+            for status, n in counts.items():
+                doc["counts"][status] = doc["counts"].get(status, 0) + n
+
+    def _set_status(self, doc: dict, status: str, **fields):
+        """Change an application's status and keep the counters in step."""
+        deltas = MetricDeltas()
+        deltas.move(doc, status)
+        doc.update(fields, status=status)
+        self._apply_metrics(deltas)
+
+    async def ensure_indexes(self):
+        pass
+
+    @staticmethod
+    def _copy(doc: Optional[dict]) -> Optional[dict]:
+        return copy.deepcopy(doc) if doc is not None else None
+
+    def _get(self, app_id: str) -> dict:
+        app = self.applications.get(app_id)
+        if app is None:
+            raise ApplicationNotFound(app_id)
+        return app
+
+    async def create_application(self, application: dict) -> str:
+        app_id = str(ObjectId())
+        self.applications[app_id] = {**copy.deepcopy(application), "_id": app_id}
+        deltas = MetricDeltas()
+        deltas.add(application, application.get("status"))
+        self._apply_metrics(deltas)
+        return app_id
+
+    async def list_applications_by_email(self, email: str) -> List[dict]:
+        return [self._copy(doc) for doc in self.applications.values() if doc.get("email") == email]
+
+    async def get_application(self, app_id: str) -> Optional[dict]:
+        return self._copy(self.applications.get(app_id))
+
+    async def find_duplicate_candidates(self, keys, branch_key, role, limit=20):
+        found = []
+        for doc in self.applications.values():
+            if doc.get("branchKey") != branch_key or doc.get("role") != role:
+                continue
+            stored = doc.get("dedupKeys") or dedup_keys(doc)
+            if any(keys.get(field) and stored.get(field) == keys[field] for field in DEDUP_FIELDS):
+                found.append(self._copy(doc))
+                if len(found) >= limit:
+                    break
+        return found
+
+    @staticmethod
+    def _queue_row(doc: dict) -> dict:
+        return {k: copy.deepcopy(v) for k, v in doc.items() if k not in QUEUE_PROJECTION}
+
+    @staticmethod
+    def _lease_free(doc: dict, now) -> bool:
+        lease = doc.get("lease_expires_at")
+        return lease is None or lease <= now
+
+    def _iter_open(self, branch_key: str, levels, after: Optional[str] = None):
+        for app_id in sorted(self.applications):
+            if after and app_id <= after:
+                continue
+            doc = self.applications[app_id]
+            if doc.get("branchKey") != branch_key or doc.get("status") not in OPEN_STATUSES:
+                continue
+            if levels is not None and doc.get("roleLevel") not in levels:
+                continue
+            yield doc
+
+    def _take_lease(self, doc: dict, email: str, now, lease_expires_at):
+        self._set_status(
+            doc, "under_review", claimed_by=email, claimed_at=now, lease_expires_at=lease_expires_at
+        )
+
+    async def review_queue(self, branch_key, email, now, levels, after, limit):
+        page = []
+        for doc in self._iter_open(branch_key, levels, after):
+            if not (self._lease_free(doc, now) or doc.get("claimed_by") == email):
+                continue
+            page.append(self._queue_row(doc))
+            if len(page) >= limit:
+                break
+        next_cursor = page[-1]["_id"] if len(page) == limit else None
+        return page, next_cursor
+
+    async def claim_application(self, app_id, email, now, lease_expires_at):
+        app = self._get(app_id)
+        if app.get("status") not in OPEN_STATUSES:
+            raise ClaimConflict(app.get("status"))
+        if not (self._lease_free(app, now) or app.get("claimed_by") == email):
+            raise ClaimConflict(app.get("status"))
+        self._take_lease(app, email, now, lease_expires_at)
+        return self._queue_row(app)
+
+    async def claim_next(self, branch_key, email, now, lease_expires_at, levels, count):
+        claimed = []
+        for doc in self._iter_open(branch_key, levels):
+            if len(claimed) >= count:
+                break
+            if self._lease_free(doc, now):
+                self._take_lease(doc, email, now, lease_expires_at)
+                claimed.append(self._queue_row(doc))
+        return claimed
+
+    def _held_by(self, app_id: str, email: str) -> dict:
+        app = self._get(app_id)
+        if app.get("claimed_by") != email or app.get("status") != "under_review":
+            raise ClaimConflict(app.get("status"))
+        return app
+
+    async def renew_claim(self, app_id, email, lease_expires_at):
+        self._held_by(app_id, email)["lease_expires_at"] = lease_expires_at
+
+    async def release_claim(self, app_id, email):
+        self._set_status(self._held_by(app_id, email), "submitted", **RELEASED_CLAIM)
+
+    async def record_decision(self, app_id: str, decision_record: dict, note_entry: Optional[dict]):
+        self.decisions.append(copy.deepcopy(decision_record))
+        app = self.applications.get(app_id)
+        if app is None:
+            return
+        self._set_status(app, decision_record["decision"], **RELEASED_CLAIM)
+        app.setdefault("history", []).append(copy.deepcopy(decision_record))
+        if note_entry:
+            app.setdefault("notes", []).append(copy.deepcopy(note_entry))
+
+    async def add_note(self, app_id: str, note_entry: dict):
+        app = self.applications.get(app_id)
+        if app is not None:
+            app.setdefault("notes", []).append(copy.deepcopy(note_entry))
+
+    def _bulk_targets(self, app_ids: List[str], branch_key: Optional[str], check_open=False, reviewer_branch_key=None):
+        results: Dict[str, Optional[str]] = {}
+        writable = []
+        for app_id in app_ids:
+            doc = self.applications.get(app_id)
+            if doc is None:
+                results[app_id] = "not found"
+            elif branch_key is not None and doc.get("branchKey") != branch_key:
+                results[app_id] = "not in your branch"
+            elif reviewer_branch_key is not None and doc.get("branchKey") != reviewer_branch_key:
+                results[app_id] = "reviewer cannot access this branch"
+            elif check_open and doc.get("status") not in OPEN_STATUSES:
+                results[app_id] = "application is not open"
+            else:
+                results[app_id] = None
+                writable.append(doc)
+        return results, writable
+
+    async def bulk_record_decisions(self, entries, branch_key):
+        by_id = {entry["application_id"]: entry for entry in entries}
+        results, writable = self._bulk_targets(list(by_id), branch_key)
+        for doc in writable:
+            entry = by_id[doc["_id"]]
+            await self.record_decision(doc["_id"], entry["record"], entry["note"])
+        return results
+
+    async def bulk_set_stage(self, app_ids, stage, history_entry, now, branch_key):
+        results, writable = self._bulk_targets(app_ids, branch_key)
+        for doc in writable:
+            self._set_status(doc, stage, **RELEASED_CLAIM)
+            doc.setdefault("timestamps", {})[stage] = now
+            doc.setdefault("stageHistory", []).append(copy.deepcopy(history_entry))
+        return results
+
+    async def bulk_assign(self, app_ids, reviewer_email, now, lease_expires_at, branch_key, reviewer_branch_key=None):
+        results, writable = self._bulk_targets(
+            app_ids, branch_key, check_open=True, reviewer_branch_key=reviewer_branch_key
+        )
+        for doc in writable:
+            self._take_lease(doc, reviewer_email, now, lease_expires_at)
+        return results
+
+    async def iter_branch_notes(self, branch_key, offset, limit):
+        docs = [doc for doc in self.applications.values() if doc.get("branchKey") == branch_key]
+        docs.sort(key=lambda d: (d.get("role") or "Unknown Role", d["_id"]))
+        rank, current_role = 0, None
+        for doc in docs:
+            role = doc.get("role") or "Unknown Role"
+            rank = rank + 1 if role == current_role else 1
+            current_role = role
+            if rank <= offset or (limit is not None and rank > offset + limit):
+                continue
+            form = doc.get("formData", {})
+            name = f"{form.get('firstName', '')} {form.get('lastName', '')}".strip()
+            yield {
+                "role": role,
+                "id": doc["_id"],
+                "name": name or doc.get("email"),
+                "email": doc.get("email"),
+                "status": doc.get("status"),
+                "notes": copy.deepcopy(doc.get("notes", [])),
+                "decisions": copy.deepcopy(decision_entries(doc.get("history"))),
+            }
+
+    async def iter_export(self, fields, branch_key=None, statuses=None, role_level=None, role=None,
+                          batch_size=500):
+        for app_id in sorted(self.applications):
+            doc = self.applications[app_id]
+            if branch_key is not None and doc.get("branchKey") != branch_key:
+                continue
+            if statuses and doc.get("status") not in statuses:
+                continue
+            if role_level is not None and doc.get("roleLevel") != role_level:
+                continue
+            if role is not None and doc.get("role") != role:
+                continue
+            row = {"_id": app_id}
+            for field in fields:
+                value = get_path(doc, field)
+                if value is None:
+                    continue
+                target = row
+                *parents, leaf = field.split(".")
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[leaf] = copy.deepcopy(decision_entries(value) if field == "history" else value)
+            yield row
+
+    async def reset_season(self) -> int:
+        count = len(self.applications)
+        self.applications.clear()
+        self.decisions.clear()
+        self.metrics.clear()
+        return count
+
+    async def dashboard_metrics(self, branch_key=None):
+        return summarize_metrics(copy.deepcopy(list(self.metrics.values())), branch_key)
+
+    async def rebuild_metrics(self):
+        self.metrics = {}
+        deltas = MetricDeltas()
+        for doc in self.applications.values():
+            deltas.add(doc, doc.get("status"))
+        self._apply_metrics(deltas)
+        return await self.dashboard_metrics()
+
+
+def create_repository(settings: dict) -> ApplicationRepository:
+    if settings["data_backend"] == "memory":
+        print("Using in-memory data backend (data is not persisted).")
+        return InMemoryRepository()
+    return MongoRepository(
+        settings["mongo_uri"],
+        max_pool_size=settings["mongo_max_pool_size"],
+        min_pool_size=settings["mongo_min_pool_size"],
+        timeout_ms=settings["mongo_timeout_ms"],
+        lease_minutes=settings["claim_lease_minutes"],
+    )
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from enum import IntEnum, IntFlag
+from typing import Dict, List, Optional
+
+
+class Level(IntEnum):
+    """Hierarchy level derived from a role title. Higher outranks lower."""
+    MEMBER = 0
+    LEAD = 1
+    CHIEF = 2
+    DIRECTOR = 3
+    EXECUTIVE = 4
+
+
+class Permission(IntFlag):
+    NONE = 0
+    REVIEW = 1          # Any staff member can review / claim / add notes
+    ALL_BRANCHES = 2    # Not restricted to their own branch
+    ADMIN = 4           # /api/admin/* (questions, roster, reset)
+    BULK_REVIEW = 8     # /api/review/bulk/* (Chief and above)
+
+
+def normalize_email(email: Optional[str]) -> str:
+    return (email or "").strip().lower()
+
+
+def normalize_branch(branch: Optional[str]) -> str:
+    return (branch or "").strip().lower()
+
+
+def classify_role(role: Optional[str]) -> Level:
+    """
+    Map a free-text role title to a hierarchy level.
+    Same keyword rules the review queue has always used ("Executive Director"
+    counts as executive, not director).
+    """
+    role = (role or "").lower()
+    if "executive" in role:
+        return Level.EXECUTIVE
+    if "director" in role:
+        return Level.DIRECTOR
+    if "chief" in role:
+        return Level.CHIEF
+    if "lead" in role:
+        return Level.LEAD
+    return Level.MEMBER
+
+
+def reviewable_levels(level: Level) -> Optional[List[Level]]:
+    """
+    Applicant role levels a reviewer at `level` works on. None means no restriction.
+    Director -> Chief / Lead applications; Chief -> everything below Chief.
+    """
+    if level == Level.DIRECTOR:
+        return [Level.LEAD, Level.CHIEF]
+    if level == Level.CHIEF:
+        return [Level.MEMBER, Level.LEAD]
+    return None
+
+
+def permissions_for(level: Level) -> Permission:
+    perms = Permission.REVIEW
+    if level >= Level.CHIEF:
+        perms |= Permission.BULK_REVIEW
+    if level == Level.EXECUTIVE:
+        perms |= Permission.ALL_BRANCHES | Permission.ADMIN
+    return perms
+
+
+@dataclass(frozen=True)
+class StaffMember:
+    name: str
+    email: str
+    branch: str
+    role: str
+    level: Level
+    permissions: Permission
+
+    @property
+    def branch_key(self) -> str:
+        return normalize_branch(self.branch)
+
+    def can(self, permission: Permission) -> bool:
+        return bool(self.permissions & permission)
+
+    def can_access_branch(self, branch: str) -> bool:
+        return self.can(Permission.ALL_BRANCHES) or self.branch_key == normalize_branch(branch)
+
+    @classmethod
+    def from_record(cls, record: dict) -> "StaffMember":
+        role = str(record.get("role") or "")
+        level = classify_role(role)
+        return cls(
+            name=str(record.get("name") or ""),
+            email=normalize_email(record.get("email")),
+            branch=str(record.get("branch") or ""),
+            role=role,
+            level=level,
+            permissions=permissions_for(level),
+        )
+
+
+class RosterIndex:
+    """
+    Immutable email -> StaffMember index built once per roster load.
+    Replace the whole object to update it; never mutate in place, so
+    readers always see a consistent snapshot.
+    """
+
+    def __init__(self, records: List[dict]):
+        self.records = list(records)
+        by_email: Dict[str, StaffMember] = {}
+        for record in self.records:
+            member = StaffMember.from_record(record)
+            if member.email:
+                by_email[member.email] = member
+        self._by_email = by_email
+
+    def get(self, email: Optional[str]) -> Optional[StaffMember]:
+        if not email:
+            return None
+        return self._by_email.get(normalize_email(email))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def load(cls, path: str) -> "RosterIndex":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+
+def roster_hash(records: List[dict]) -> str:
+    """Content hash of a roster, independent of key order within records."""
+    return hashlib.sha256(json.dumps(records, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def diff_rosters(old: List[dict], new: List[dict]) -> Dict[str, list]:
+    """Per-member changes between two rosters, keyed by normalized email."""
+    before = {normalize_email(r.get("email")): r for r in old if r.get("email")}
+    after = {normalize_email(r.get("email")): r for r in new if r.get("email")}
+    changed = []
+    for email in before.keys() & after.keys():
+        was, now = before[email], after[email]
+        if (was.get("role"), was.get("branch")) != (now.get("role"), now.get("branch")):
+            changed.append({
+                "email": email,
+                "from": {"role": was.get("role"), "branch": was.get("branch")},
+                "to": {"role": now.get("role"), "branch": now.get("branch")},
+            })
+    return {
+        "added": sorted(after.keys() - before.keys()),
+        "removed": sorted(before.keys() - after.keys()),
+        "changed": sorted(changed, key=lambda c: c["email"]),
+    }
+
+
+def save_roster(records: List[dict], path: str):
+    """Write roster.json via a temp file + rename so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(records, f, indent=2)
+    os.replace(tmp_path, path)
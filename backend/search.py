@@ -0,0 +1,162 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "that", "the", "to", "we", "what",
+    "when", "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 over the knowledge-base chunks, keyed by the same
+    ids the vector store uses. Small enough to rebuild from the store on startup.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.docs: Dict[str, Document] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, doc_id: str, text: str, metadata: Optional[dict] = None):
+        with self._lock:
+            self._remove(doc_id)
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self._postings[term][doc_id] = tf
+            self.docs[doc_id] = Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            self._lengths[doc_id] = sum(counts.values())
+            self._total_length += self._lengths[doc_id]
+
+    def remove(self, doc_ids: Iterable[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in set(tokenize(doc.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def idf(self, term: str) -> float:
+        n = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self.docs) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, k: int) -> Tuple[List[Tuple[str, float]], float]:
+        """
+        Top-k (doc id, score), plus how much of the query's IDF weight the best
+        hit covers (0..1) as a confidence signal for skipping vector search.
+        Terms the corpus has never seen carry no lexical signal and are left out
+        of that weight, unless they are the majority of the query (coverage 0).
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return [], 0.0
+        avg_length = self._total_length / len(self.docs)
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, float] = defaultdict(float)
+        weights = {term: self.idf(term) for term in terms}
+
+        for term in terms:
+            for doc_id, tf in self._postings.get(term, {}).items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] += weights[term] * tf * (self.k1 + 1) / norm
+                matched[doc_id] += weights[term]
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        known = [term for term in terms if term in self._postings]
+        if not ranked or len(known) * 2 < len(terms):
+            return ranked, 0.0
+        return ranked, matched[ranked[0][0]] / sum(weights[term] for term in known)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Merge ranked id lists: score(d) = sum 1 / (k + rank). Robust to the lists' incomparable scores."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + vector retrieval fused with RRF. When the best lexical hit covers
+    nearly all of the query's terms and clearly beats the runner-up, the lexical
+    results are returned as-is and the query is never embedded.
+    """
+
+    vector_store: Any
+    index: Any
+    k: int = 3
+    candidates: int = 10
+    # Fast path: best hit must cover this share of the query's IDF weight...
+    fast_path_coverage: float = 0.9
+    # ...and outscore the second hit by this factor. Set coverage > 1 to disable.
+    fast_path_margin: float = 1.5
+    stats: Dict[str, int] = {}
+
+    def _lexical(self, query: str) -> Tuple[List[str], bool]:
+        ranked, coverage = self.index.search(query, self.candidates)
+        ids = [doc_id for doc_id, _ in ranked]
+        confident = (
+            bool(ranked)
+            and coverage >= self.fast_path_coverage
+            and (len(ranked) == 1 or ranked[0][1] >= self.fast_path_margin * ranked[1][1])
+        )
+        return ids, confident
+
+    def _fuse(self, lexical_ids: List[str], vector_docs: List[Document]) -> List[Document]:
+        docs = {doc_id: self.index.docs[doc_id] for doc_id in lexical_ids if doc_id in self.index.docs}
+        vector_ids = []
+        for doc in vector_docs:
+            doc_id = doc.id or doc.page_content
+            docs.setdefault(doc_id, doc)
+            vector_ids.append(doc_id)
+        fused = reciprocal_rank_fusion([lexical_ids, vector_ids])
+        return [docs[doc_id] for doc_id, _ in fused[:self.k]]
+
+    def _count(self, path: str):
+        self.stats[path] = self.stats.get(path, 0) + 1
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        lexical_ids, confident = self._lexical(query)
+        if confident:
+            self._count("lexical")
+            return [self.index.docs[doc_id] for doc_id in lexical_ids[:self.k]]
+        self._count("hybrid")
+        return self._fuse(lexical_ids, self.vector_store.similarity_search(query, k=self.candidates))
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        lexical_ids, confident = self._lexical(query)
+        if confident:
+            self._count("lexical")
+            return [self.index.docs[doc_id] for doc_id in lexical_ids[:self.k]]
+        self._count("hybrid")
+        return self._fuse(lexical_ids, await self.vector_store.asimilarity_search(query, k=self.candidates))
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+PENDING, STARTING, READY, FAILED, DISABLED = "pending", "starting", "ready", "failed", "disabled"
+
+
+class Readiness:
+    """
+    Tracks the startup phases of the API (database indexes, roster, chat, ...):
+    status, when each started and how long it took, and the error if it failed.
+    Only `required` components gate readiness; the rest report degraded service.
+    """
+
+    def __init__(self, required=()):
+        self.required = set(required)
+        self.started_at = time.time()
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    def set(self, name: str, status: str, detail: Optional[str] = None, seconds: Optional[float] = None):
+        component = self.components.setdefault(name, {"status": PENDING})
+        component["status"] = status
+        component["detail"] = detail
+        if seconds is not None:
+            component["seconds"] = round(seconds, 3)
+
+    def status(self, name: str) -> str:
+        return self.components.get(name, {}).get("status", PENDING)
+
+    def is_ready(self) -> bool:
+        return all(self.status(name) == READY for name in self.required)
+
+    async def run(self, name: str, fn: Callable, *args, blocking: bool = False):
+        """
+        Run one phase and record it. Blocking (sync) work goes to a thread so the
+        event loop keeps serving requests. Returns the result, or None on failure.
+        """
+        self.set(name, STARTING)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(fn, *args) if blocking else await fn(*args)
+        except Exception as e:
+            self.set(name, FAILED, str(e), time.perf_counter() - started)
+            print(f"Startup: {name} failed after {time.perf_counter() - started:.2f}s: {e}")
+            return None
+        self.set(name, READY, seconds=time.perf_counter() - started)
+        print(f"Startup: {name} ready in {time.perf_counter() - started:.2f}s")
+        return result
+
+    def report(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "components": {
+                name: {key: value for key, value in component.items() if value is not None}
+                for name, component in self.components.items()
+            },
+        }
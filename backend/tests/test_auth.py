@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import auth
+from auth import ClerkVerifier, TokenCache, UnknownSigningKey
+
+
+def new_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def write_jwks(path, keys):
+    """keys: {kid: private key}; writes their public halves as a JWKS file."""
+    entries = []
+    for kid, key in keys.items():
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+        entries.append({**jwk, "kid": kid, "alg": "RS256", "use": "sig"})
+    path.write_text(json.dumps({"keys": entries}))
+
+
+def sign(key, kid, exp_in=600, **claims):
+    payload = {"sub": "user_1", "email": "a@northeastern.edu", "exp": int(time.time()) + exp_in, **claims}
+    return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def keys():
+    return {"k1": new_key(), "k2": new_key()}
+
+
+@pytest.fixture
+def verifier(tmp_path, keys, monkeypatch):
+    path = tmp_path / "jwks.json"
+    write_jwks(path, {"k1": keys["k1"]})
+    verifier = ClerkVerifier(jwks_path=str(path), leeway=0)
+    verifier.jwks_file = path
+    verifier.fetches = 0
+    fetch = verifier._fetch_jwks
+
+    def counting_fetch():
+        verifier.fetches += 1
+        return fetch()
+
+    monkeypatch.setattr(verifier, "_fetch_jwks", counting_fetch)
+    verifier.refresh()
+    return verifier
+
+
+def test_valid_token(verifier, keys):
+    claims = asyncio.run(verifier.verify(sign(keys["k1"], "k1")))
+    assert claims["email"] == "a@northeastern.edu"
+
+
+def test_expired_token_is_rejected(verifier, keys):
+    with pytest.raises(jwt.ExpiredSignatureError):
+        asyncio.run(verifier.verify(sign(keys["k1"], "k1", exp_in=-60)))
+
+
+def test_token_signed_with_another_key_is_rejected(verifier, keys):
+    # Claims the known kid, but signed by a different private key
+    with pytest.raises(jwt.InvalidSignatureError):
+        asyncio.run(verifier.verify(sign(keys["k2"], "k1")))
+
+
+def test_token_without_exp_is_rejected(verifier, keys):
+    token = jwt.encode({"sub": "user_1"}, keys["k1"], algorithm="RS256", headers={"kid": "k1"})
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        asyncio.run(verifier.verify(token))
+
+
+def test_unknown_kid_triggers_exactly_one_refresh(verifier, keys):
+    assert verifier.fetches == 1
+    # Clerk rotated its keys a while after our last refresh (forced refreshes are 30s apart at most)
+    write_jwks(verifier.jwks_file, {"k1": keys["k1"], "k2": keys["k2"]})
+    verifier._last_refresh -= 60
+
+    claims = asyncio.run(verifier.verify(sign(keys["k2"], "k2")))
+    assert claims["sub"] == "user_1"
+    assert verifier.fetches == 2
+
+    # A kid that is still unknown right after a refresh doesn't trigger another one
+    with pytest.raises(UnknownSigningKey):
+        asyncio.run(verifier.verify(sign(new_key(), "k3")))
+    assert verifier.fetches == 2
+
+
+def test_cache_hit_skips_verification_and_expires_at_exp(verifier, keys, monkeypatch):
+    exp = int(time.time()) + 30
+    token = sign(keys["k1"], "k1", exp_in=exp - int(time.time()))
+    first = asyncio.run(verifier.verify(token))
+
+    decodes = []
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decodes.append(args) or {})
+    assert asyncio.run(verifier.verify(token)) == first
+    assert decodes == []
+
+    # The token's exp (30s) comes before the cache TTL (60s)
+    now = time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: exp - 0.5)
+    assert verifier.cache.get(token) == first
+    monkeypatch.setattr(auth.time, "time", lambda: exp)
+    assert verifier.cache.get(token) is None
+    monkeypatch.setattr(auth.time, "time", lambda: now)
+    asyncio.run(verifier.verify(token))
+    assert len(decodes) == 1
+
+
+def test_cache_ttl_applies_when_shorter_than_exp(monkeypatch):
+    cache = TokenCache(ttl=10)
+    monkeypatch.setattr(auth.time, "time", lambda: 1000.0)
+    cache.put("token", {"exp": 5000})
+    monkeypatch.setattr(auth.time, "time", lambda: 1009.0)
+    assert cache.get("token") == {"exp": 5000}
+    monkeypatch.setattr(auth.time, "time", lambda: 1010.0)
+    assert cache.get("token") is None
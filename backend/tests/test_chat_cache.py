@@ -0,0 +1,72 @@
+import asyncio
+
+from chat_cache import AnswerCache, MemoryStore
+
+# Toy embeddings: questions about deadlines point one way, about branches another
+VECTORS = {
+    "when do applications close": [1.0, 0.1, 0.0],
+    "when do applications close this year": [0.95, 0.15, 0.0],
+    "what branches are there": [0.0, 1.0, 0.2],
+}
+
+
+def make_cache(version=None):
+    calls = []
+
+    async def embed(text):
+        calls.append(text)
+        return VECTORS[text]
+
+    cache = AnswerCache(MemoryStore(), embed=embed, similarity_threshold=0.95, version=version)
+    return cache, calls
+
+
+def test_exact_key_ignores_case_and_punctuation():
+    cache, calls = make_cache()
+
+    async def scenario():
+        await cache.put("When do applications close?", {"response": "March 1"})
+        return await cache.get("when do APPLICATIONS close")
+
+    assert asyncio.run(scenario()) == {"response": "March 1"}
+    assert cache.stats() == {"hits": 1, "nearHits": 0, "misses": 0}
+
+
+def test_near_duplicate_question_is_served_from_the_cache():
+    cache, _ = make_cache()
+
+    async def scenario():
+        await cache.put("When do applications close?", {"response": "March 1"})
+        near = await cache.get("When do applications close this year?")
+        other = await cache.get("What branches are there?")
+        return near, other
+
+    assert asyncio.run(scenario()) == ({"response": "March 1"}, None)
+    assert cache.stats() == {"hits": 0, "nearHits": 1, "misses": 1}
+
+
+def test_a_miss_embeds_the_question_once():
+    cache, calls = make_cache()
+
+    async def scenario():
+        await cache.put("When do applications close?", {"response": "March 1"})
+        calls.clear()
+        answer, vector = await cache.lookup("What branches are there?")
+        assert answer is None and vector is not None
+        await cache.put("What branches are there?", {"response": "Four"}, vector)
+
+    asyncio.run(scenario())
+    assert calls == ["what branches are there"]
+
+
+def test_new_knowledge_version_drops_old_answers_and_vectors():
+    version = ["v1"]
+    cache, _ = make_cache(lambda: version[0])
+
+    async def scenario():
+        await cache.put("When do applications close?", {"response": "March 1"})
+        version[0] = "v2"
+        return await cache.get("When do applications close?"), await cache.get("When do applications close this year?")
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert not cache._vectors
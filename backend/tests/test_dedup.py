@@ -0,0 +1,44 @@
+from dedup import best_match, dedup_keys, match_score
+
+
+def keys(email, nuid="", first="Jonathan", last="Smith"):
+    return dedup_keys({"email": email, "nuid": nuid, "formData": {"firstName": first, "lastName": last}})
+
+
+def test_keys_are_normalized():
+    assert keys(" JSmith+apply@Northeastern.edu ", "1234567") == {
+        "email": "jsmith@northeastern.edu",
+        "nuid": "001234567",
+        "name": "smith j",
+        "fullName": "jonathan smith",
+    }
+
+
+def test_matching_nuid_is_exact_whatever_the_email():
+    assert match_score(keys("a@northeastern.edu", "1234567"), keys("b@northeastern.edu", "001234567")) == (1.0, True)
+
+
+def test_different_nuids_are_different_people_even_with_the_same_email():
+    assert match_score(keys("js@northeastern.edu", "001234567"), keys("js@northeastern.edu", "009999999")) == (0.0, False)
+
+
+def test_same_email_is_exact_when_a_nuid_is_missing():
+    assert match_score(keys("js+x@northeastern.edu"), keys("js@northeastern.edu", "001234567")) == (1.0, True)
+
+
+def test_fuzzy_match_needs_name_and_email_similarity():
+    score, exact = match_score(keys("jsmith@northeastern.edu"), keys("jsmith2@northeastern.edu"))
+    assert not exact and score >= 0.8
+    score, _ = match_score(keys("jsmith@northeastern.edu"), keys("ada@northeastern.edu", first="Ada", last="Lovelace"))
+    assert score < 0.8
+
+
+def test_best_match_prefers_the_highest_score():
+    new = keys("jsmith2@northeastern.edu")
+    candidates = [
+        {"_id": "fuzzy", "dedupKeys": keys("jsmith@northeastern.edu")},
+        {"_id": "exact", "dedupKeys": keys("jsmith2@northeastern.edu")},
+        {"_id": "other", "dedupKeys": keys("jsmith2@northeastern.edu", "009999999")},
+    ]
+    match, score, exact = best_match(new, candidates)
+    assert (match["_id"], score, exact) == ("exact", 1.0, True)
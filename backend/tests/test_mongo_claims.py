@@ -0,0 +1,156 @@
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from repository import OPEN_STATUSES, ClaimConflict, MongoRepository
+
+NOW = datetime(2026, 1, 15, 12, 0)
+LEASE = timedelta(minutes=120)
+
+
+def matches(doc: dict, query: dict) -> bool:
+    """The subset of Mongo query semantics the claim filters use."""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$lte" and (value is None or not value <= operand):
+                    return False
+                if op == "$gt" and (value is None or not value > operand):
+                    return False
+        elif value != condition:
+            # `None` also matches a missing field, as in Mongo
+            return False
+    return True
+
+
+class StubCollection:
+    """Applies find_one_and_update atomically, but yields first as a server round trip would."""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.calls = []
+
+    async def find_one_and_update(self, query, update, projection=None, sort=None, return_document=None):
+        self.calls.append({"query": query, "update": update, "sort": sort, "return_document": return_document})
+        await asyncio.sleep(0)
+        found = [doc for doc in self.docs if matches(doc, query)]
+        if sort:
+            found.sort(key=lambda doc: doc["_id"])
+        if not found:
+            return None
+        before = copy.deepcopy(found[0])
+        found[0].update(update["$set"])
+        return before
+
+    async def find_one(self, query, projection=None):
+        return next((copy.deepcopy(doc) for doc in self.docs if matches(doc, query)), None)
+
+    async def bulk_write(self, ops, ordered=True, session=None):
+        self.calls.append({"bulk_write": ops})
+
+
+def application(**fields):
+    return {
+        "_id": ObjectId(), "branchKey": "software", "branch": "Software", "role": "Member",
+        "roleLevel": 0, "status": "submitted", **fields,
+    }
+
+
+def make_repo(docs):
+    repo = MongoRepository("mongodb://localhost:27017", timeout_ms=100)
+    repo.applications = StubCollection(docs)
+    repo.metrics = StubCollection()
+    return repo
+
+
+def test_claim_is_a_conditional_update_on_status_and_lease():
+    doc = application()
+    repo = make_repo([doc])
+    asyncio.run(repo.claim_application(str(doc["_id"]), "a@x.com", NOW, NOW + LEASE))
+
+    call = repo.applications.calls[0]
+    assert call["query"] == {
+        "_id": doc["_id"],
+        "status": {"$in": OPEN_STATUSES},
+        "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lte": NOW}}, {"claimed_by": "a@x.com"}],
+    }
+    assert call["update"] == {"$set": {
+        "claimed_by": "a@x.com", "claimed_at": NOW, "lease_expires_at": NOW + LEASE, "status": "under_review",
+    }}
+    # The document as it was, so the metrics move out of its old status
+    assert call["return_document"] == ReturnDocument.BEFORE
+
+
+def test_interleaved_claims_have_one_winner():
+    doc = application()
+    repo = make_repo([doc])
+
+    async def race():
+        return await asyncio.gather(
+            *(repo.claim_application(str(doc["_id"]), f"r{i}@x.com", NOW, NOW + LEASE) for i in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(race())
+    winners = [r for r in results if not isinstance(r, Exception)]
+    assert len(winners) == 1
+    assert all(isinstance(r, ClaimConflict) for r in results if r not in winners)
+    assert doc["claimed_by"] == winners[0]["claimed_by"]
+    # Only the winner's status change is counted
+    (metrics,) = [call["bulk_write"] for call in repo.metrics.calls]
+    assert metrics[0]._doc["$inc"] == {"counts.submitted": -1, "counts.under_review": 1}
+
+
+def test_held_lease_blocks_until_it_expires():
+    doc = application(status="under_review", claimed_by="a@x.com", lease_expires_at=NOW + LEASE)
+    repo = make_repo([doc])
+
+    with pytest.raises(ClaimConflict):
+        asyncio.run(repo.claim_application(str(doc["_id"]), "b@x.com", NOW, NOW + LEASE))
+    later = NOW + LEASE
+    claimed = asyncio.run(repo.claim_application(str(doc["_id"]), "b@x.com", later, later + LEASE))
+    assert claimed["claimed_by"] == "b@x.com"
+
+
+def test_claim_next_filters_by_branch_level_and_free_lease():
+    repo = make_repo([])
+    asyncio.run(repo.claim_next("software", "a@x.com", NOW, NOW + LEASE, [1, 2], 1))
+
+    call = repo.applications.calls[0]
+    assert call["query"] == {
+        "branchKey": "software",
+        "status": {"$in": OPEN_STATUSES},
+        "roleLevel": {"$in": [1, 2]},
+        # Unlike a single claim, the caller's own claims are not taken again
+        "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lte": NOW}}],
+    }
+    assert call["sort"] == [("_id", ASCENDING)]
+
+
+def test_interleaved_claim_next_hands_out_disjoint_batches():
+    docs = [application() for _ in range(7)]
+    docs.append(application(status="under_review", claimed_by="z@x.com", lease_expires_at=NOW + LEASE))
+    docs.append(application(roleLevel=3))
+    repo = make_repo(docs)
+
+    async def race():
+        return await asyncio.gather(
+            *(repo.claim_next("software", f"r{i}@x.com", NOW, NOW + LEASE, [0], 3) for i in range(3))
+        )
+
+    batches = asyncio.run(race())
+    claimed = [doc["_id"] for batch in batches for doc in batch]
+    assert sorted(claimed) == sorted(str(doc["_id"]) for doc in docs[:7])
+    assert docs[7]["claimed_by"] == "z@x.com"
+    assert "claimed_by" not in docs[8]
@@ -0,0 +1,79 @@
+import asyncio
+
+from repository import InMemoryRepository, MongoRepository
+
+
+def evaluate(expr, doc, variables=None):
+    """The aggregation operators the report's $project uses for role ($let/$ifNull/$cond/$eq)."""
+    variables = variables or {}
+    if isinstance(expr, str) and expr.startswith("$$"):
+        return variables[expr[2:]]
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    if op == "$let":
+        bound = {name: evaluate(value, doc, variables) for name, value in args["vars"].items()}
+        return evaluate(args["in"], doc, {**variables, **bound})
+    if op == "$ifNull":
+        value = evaluate(args[0], doc, variables)
+        return evaluate(args[1], doc, variables) if value is None else value
+    if op == "$cond":
+        condition, then, otherwise = args
+        return evaluate(then if evaluate(condition, doc, variables) else otherwise, doc, variables)
+    if op == "$eq":
+        return evaluate(args[0], doc, variables) == evaluate(args[1], doc, variables)
+    raise NotImplementedError(op)
+
+
+class CapturingCollection:
+    def __init__(self):
+        self.pipeline = None
+
+    async def aggregate(self, pipeline, **kwargs):
+        self.pipeline = pipeline
+
+        async def rows():
+            return
+            yield
+
+        return rows()
+
+
+DOCS = [
+    {"email": "a@northeastern.edu", "role": "Lead"},
+    {"email": "b@northeastern.edu", "role": ""},
+    {"email": "c@northeastern.edu", "role": None},
+    {"email": "d@northeastern.edu"},
+]
+
+
+def test_blank_roles_group_the_same_on_both_backends():
+    memory = InMemoryRepository()
+
+    async def memory_roles():
+        for doc in DOCS:
+            await memory.create_application({**doc, "branchKey": "data", "status": "submitted"})
+        by_email = {}
+        async for row in memory.iter_branch_notes("data", 0, None):
+            by_email[row["email"]] = row["role"]
+        return by_email
+
+    mongo = MongoRepository("mongodb://localhost:27017", timeout_ms=100)
+    mongo.applications = CapturingCollection()
+
+    async def mongo_pipeline():
+        async for _ in mongo.iter_branch_notes("data", 0, None):
+            pass
+        return mongo.applications.pipeline
+
+    expected = asyncio.run(memory_roles())
+    assert expected == {
+        "a@northeastern.edu": "Lead",
+        "b@northeastern.edu": "Unknown Role",
+        "c@northeastern.edu": "Unknown Role",
+        "d@northeastern.edu": "Unknown Role",
+    }
+    (project,) = [stage["$project"] for stage in asyncio.run(mongo_pipeline()) if "role" in stage.get("$project", {})]
+    assert {doc["email"]: evaluate(project["role"], doc) for doc in DOCS} == expected
@@ -0,0 +1,145 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from repository import ClaimConflict, InMemoryRepository
+
+NOW = datetime(2026, 1, 15, 12, 0)
+LEASE = timedelta(minutes=120)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_repo(n=5, branch_key="software", role_level=0):
+    repo = InMemoryRepository()
+
+    async def fill():
+        return [
+            await repo.create_application({
+                "email": f"applicant{i}@northeastern.edu",
+                "branchKey": branch_key,
+                "role": "Member",
+                "roleLevel": role_level,
+                "status": "submitted",
+                "formData": {"essay": "..."},
+            })
+            for i in range(n)
+        ]
+
+    return repo, run(fill())
+
+
+# InMemoryRepository methods never await, so gathered calls run one after another;
+# these check the claim rules, test_mongo_claims.py the conditional updates under interleaving
+
+def test_only_the_first_of_many_claims_wins():
+    repo, ids = make_repo(1)
+
+    async def race():
+        return await asyncio.gather(
+            *(repo.claim_application(ids[0], f"r{i}@x.com", NOW, NOW + LEASE) for i in range(10)),
+            return_exceptions=True,
+        )
+
+    results = run(race())
+    winners = [r for r in results if not isinstance(r, Exception)]
+    assert len(winners) == 1
+    assert all(isinstance(r, ClaimConflict) for r in results if r not in winners)
+    assert repo.applications[ids[0]]["claimed_by"] == winners[0]["claimed_by"]
+    assert repo.metrics["software|Member"]["counts"] == {"submitted": 0, "under_review": 1}
+
+
+def test_claim_next_hands_out_disjoint_batches():
+    repo, ids = make_repo(10)
+
+    async def race():
+        return await asyncio.gather(
+            *(repo.claim_next("software", f"r{i}@x.com", NOW, NOW + LEASE, None, 3) for i in range(4))
+        )
+
+    batches = run(race())
+    claimed = [doc["_id"] for batch in batches for doc in batch]
+    assert sorted(claimed) == sorted(ids)
+    assert sorted(len(batch) for batch in batches) == [1, 3, 3, 3]
+
+
+def test_lease_blocks_other_reviewers_until_it_expires():
+    repo, ids = make_repo(1)
+    run(repo.claim_application(ids[0], "a@x.com", NOW, NOW + LEASE))
+
+    with pytest.raises(ClaimConflict):
+        run(repo.claim_application(ids[0], "b@x.com", NOW + timedelta(minutes=5), NOW + LEASE))
+    # The holder can re-claim (renews its own lease)
+    run(repo.claim_application(ids[0], "a@x.com", NOW + timedelta(minutes=5), NOW + LEASE))
+
+    later = NOW + LEASE + timedelta(minutes=1)
+    claimed = run(repo.claim_application(ids[0], "b@x.com", later, later + LEASE))
+    assert claimed["claimed_by"] == "b@x.com"
+    assert claimed["lease_expires_at"] == later + LEASE
+
+
+def test_queue_hides_leased_applications_from_other_reviewers():
+    repo, ids = make_repo(3)
+    run(repo.claim_application(ids[0], "a@x.com", NOW, NOW + LEASE))
+
+    def queue(email, now):
+        page, _ = run(repo.review_queue("software", email, now, None, None, 10))
+        return [doc["_id"] for doc in page]
+
+    assert queue("a@x.com", NOW) == sorted(ids)
+    assert queue("b@x.com", NOW) == sorted(ids[1:])
+    assert queue("b@x.com", NOW + LEASE) == sorted(ids)
+    # Expired leases are claimable again by claim_next
+    taken = run(repo.claim_next("software", "b@x.com", NOW + LEASE, NOW + 2 * LEASE, None, 1))
+    assert [doc["_id"] for doc in taken] == [sorted(ids)[0]]
+
+
+def test_released_claim_returns_to_the_queue():
+    repo, ids = make_repo(1)
+    run(repo.claim_application(ids[0], "a@x.com", NOW, NOW + LEASE))
+    with pytest.raises(ClaimConflict):
+        run(repo.release_claim(ids[0], "b@x.com"))
+    run(repo.release_claim(ids[0], "a@x.com"))
+
+    app = repo.applications[ids[0]]
+    assert app["status"] == "submitted"
+    assert app["claimed_by"] is None and app["lease_expires_at"] is None
+    run(repo.claim_application(ids[0], "b@x.com", NOW, NOW + LEASE))
+
+
+def test_keyset_cursor_pages_through_the_queue_once():
+    repo, ids = make_repo(7)
+    seen, after = [], None
+    while True:
+        page, after = run(repo.review_queue("software", "a@x.com", NOW, None, after, 3))
+        seen.extend(doc["_id"] for doc in page)
+        if after is None:
+            break
+    assert seen == sorted(ids)
+
+
+def test_keyset_cursor_is_stable_when_earlier_rows_leave_the_queue():
+    repo, ids = make_repo(6)
+    first, cursor = run(repo.review_queue("software", "a@x.com", NOW, None, None, 3))
+    # Another reviewer claims everything on the first page before the next request
+    for doc in first:
+        run(repo.claim_application(doc["_id"], "b@x.com", NOW, NOW + LEASE))
+
+    second, cursor = run(repo.review_queue("software", "a@x.com", NOW, None, cursor, 3))
+    assert [doc["_id"] for doc in second] == sorted(ids)[3:]
+    assert cursor == sorted(ids)[-1]
+    assert run(repo.review_queue("software", "a@x.com", NOW, None, cursor, 3)) == ([], None)
+
+
+def test_queue_filters_by_level_and_omits_bulky_fields():
+    repo, _ = make_repo(2)
+    run(repo.create_application({
+        "email": "director@northeastern.edu", "branchKey": "software", "role": "Director",
+        "roleLevel": 3, "status": "submitted", "formData": {},
+    }))
+    page, _ = run(repo.review_queue("software", "a@x.com", NOW, [3], None, 10))
+    assert [doc["role"] for doc in page] == ["Director"]
+    assert "formData" not in page[0]
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# app reads its settings and data files at import time, relative to the backend directory
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as appmod  # noqa: E402
+from repository import InMemoryRepository  # noqa: E402
+
+ROSTER = [
+    {"name": "Exec", "email": "exec@g.com", "branch": "Software", "role": "Executive Director"},
+    {"name": "Chief", "email": "chief@g.com", "branch": "Software", "role": "Chief Engineer"},
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    roster, repo = appmod.roster_index, InMemoryRepository()
+    appmod.set_roster(ROSTER)
+    monkeypatch.setattr(appmod, "repo", repo)
+    user = {"email": "chief@g.com"}
+    appmod.app.dependency_overrides[appmod.verify_clerk_token] = lambda: dict(user)
+    client = TestClient(appmod.app)
+    client.user, client.repo = user, repo
+    yield client
+    appmod.app.dependency_overrides.clear()
+    appmod.set_roster(roster.records)
+
+
+def create(repo, branch):
+    return asyncio.run(repo.create_application({
+        "email": f"{branch}@northeastern.edu", "branch": branch, "branchKey": branch.lower(),
+        "role": "Member", "roleLevel": 0, "status": "submitted", "formData": {},
+    }))
+
+
+@pytest.mark.parametrize("body", [{}, {"decision": "hired"}, {"decision": ["accepted"]}])
+def test_single_decision_rejects_unknown_values(client, body):
+    app_id = create(client.repo, "Software")
+    response = client.post(f"/api/review/decision/{app_id}", json=body)
+    assert response.status_code == 422
+    assert client.repo.applications[app_id]["status"] == "submitted"
+    assert "hired" not in str(client.repo.metrics)
+
+
+def test_single_decision_records_a_valid_value(client):
+    app_id = create(client.repo, "Software")
+    response = client.post(f"/api/review/decision/{app_id}", json={"decision": "accepted", "notes": "Strong"})
+    assert response.status_code == 200
+    assert client.repo.applications[app_id]["status"] == "accepted"
+
+
+def test_bulk_decision_uses_the_same_check(client):
+    app_id = create(client.repo, "Software")
+    items = [{"application_id": app_id, "decision": "accepted"}, {"application_id": app_id, "decision": "hired"}]
+    assert client.post("/api/review/bulk/decision", json={"items": items}).status_code == 422
+    assert client.repo.applications[app_id]["status"] == "submitted"
+
+
+def test_bulk_assign_reports_applications_the_reviewer_cannot_open(client):
+    client.user["email"] = "exec@g.com"
+    software, data = create(client.repo, "Software"), create(client.repo, "Data")
+    response = client.post(
+        "/api/review/bulk/assign", json={"application_ids": [software, data], "reviewer_email": "chief@g.com"}
+    )
+    assert response.status_code == 200
+    results = {item["application_id"]: item for item in response.json()["results"]}
+    assert results[software]["ok"]
+    assert results[data] == {"application_id": data, "ok": False, "error": "reviewer cannot access this branch"}
+    assert client.repo.applications[software]["claimed_by"] == "chief@g.com"
+    assert client.repo.applications[data].get("claimed_by") is None
@@ -0,0 +1,98 @@
+from langchain_core.documents import Document
+
+from search import BM25Index, HybridRetriever, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "deadline": "Applications close on March 1. Late applications are not accepted.",
+    "branches": "Generate has software, hardware, design and operations branches.",
+    "software": "The software branch builds web and mobile products for clients.",
+    "interview": "Interviews are scheduled after the application deadline closes.",
+}
+
+
+def make_index():
+    index = BM25Index()
+    for doc_id, text in DOCS.items():
+        index.add(doc_id, text, {"source": doc_id})
+    return index
+
+
+class FixedVectorStore:
+    """Returns the same ranking for every query and counts how often it was asked."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = 0
+
+    def similarity_search(self, query, k):
+        self.calls += 1
+        return self.docs[:k]
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("When do applications CLOSE?") == ["applications", "close"]
+
+
+def test_rare_terms_and_repeated_terms_score_higher():
+    index = make_index()
+    assert index.idf("hardware") > index.idf("software")
+    ranked, _ = index.search("software hardware", 4)
+    assert [doc_id for doc_id, _ in ranked] == ["branches", "software"]
+    # "applications" twice in the deadline document, never in the others
+    assert index.search("applications", 4)[0][0][0] == "deadline"
+
+
+def test_coverage_reflects_the_share_of_the_query_the_best_hit_matches():
+    index = make_index()
+    ranked, coverage = index.search("application deadline interviews", 3)
+    assert ranked[0][0] == "interview"
+    assert coverage == 1.0
+
+    _, partial = index.search("software interviews", 3)
+    assert 0 < partial < 1
+    # Mostly unknown words: no lexical confidence at all
+    assert index.search("zebra quokka software", 3)[1] == 0.0
+
+
+def test_re_adding_a_document_replaces_it():
+    index = make_index()
+    index.add("software", "Robotics and embedded firmware.")
+    assert len(index) == len(DOCS)
+    assert index.search("web mobile products", 3)[0] == []
+    assert index.search("firmware", 3)[0][0][0] == "software"
+
+    index.remove(["software"])
+    assert "firmware" not in index._postings
+    assert index.search("firmware", 3) == ([], 0.0)
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["d", "b", "e"]], k=60)
+    ids = [doc_id for doc_id, _ in fused]
+    # Second in both lists beats first in one
+    assert ids[0] == "b"
+    assert set(ids[1:3]) == {"a", "d"}
+    assert set(ids[3:]) == {"c", "e"}
+    assert dict(fused)["b"] == 2 / 62
+
+
+def test_confident_lexical_hit_skips_the_vector_store():
+    store = FixedVectorStore([])
+    retriever = HybridRetriever(vector_store=store, index=make_index(), k=2, stats={})
+    docs = retriever.invoke("mobile products clients")
+    assert docs[0].id == "software"
+    assert store.calls == 0
+    assert retriever.stats == {"lexical": 1}
+
+
+def test_ambiguous_query_is_fused_with_vector_results():
+    semantic = Document(page_content="Recruiting runs every fall and spring.", id="seasons")
+    store = FixedVectorStore([semantic, Document(page_content=DOCS["interview"], id="interview")])
+    retriever = HybridRetriever(vector_store=store, index=make_index(), k=3, stats={})
+    docs = retriever.invoke("recruiting season deadline")
+    ids = [doc.id for doc in docs]
+    assert store.calls == 1
+    # Ranked by both lists, so it comes first; the vector-only hit still makes the cut
+    assert ids[0] == "interview"
+    assert "seasons" in ids
+    assert retriever.stats == {"hybrid": 1}
@@ -0,0 +1,84 @@
+import re
+
+from text_splitter import MarkdownChunker
+from tokens import count_tokens
+
+
+def sentences(n, word="recruiting"):
+    return " ".join(f"Sentence {i} is about {word} at Generate." for i in range(n))
+
+
+def words(text):
+    return re.findall(r"\w+", text)
+
+
+def test_small_document_is_one_chunk():
+    text = "# FAQ\n\nApplications close on March 1.\n\n- Software\n- Hardware"
+    chunks = MarkdownChunker(target_tokens=100).split(text)
+    assert len(chunks) == 1
+    assert chunks[0].headings == "FAQ"
+    # List items stay on consecutive lines
+    assert chunks[0].text == text
+
+
+def test_no_chunk_exceeds_max_tokens():
+    text = "\n\n".join(f"## Part {i}\n\n{sentences(12)}" for i in range(6))
+    chunker = MarkdownChunker(target_tokens=60, max_tokens=90)
+    chunks = chunker.split(text)
+    assert len(chunks) > 6
+    # The heading path restated on continuation chunks counts too
+    assert any(chunk.text.startswith("Part ") for chunk in chunks)
+    for chunk in chunks:
+        assert count_tokens(chunk.text) <= chunker.max_tokens
+
+
+def test_oversized_paragraph_breaks_at_sentence_ends():
+    chunker = MarkdownChunker(target_tokens=40, max_tokens=60)
+    chunks = chunker.split(sentences(20))
+    assert len(chunks) > 1
+    assert all(chunk.text.endswith(".") for chunk in chunks)
+    assert words(" ".join(chunk.text for chunk in chunks)) == words(sentences(20))
+
+
+def test_run_on_text_without_sentence_ends_is_cut_hard():
+    text = " ".join(["word"] * 2000)
+    chunker = MarkdownChunker(target_tokens=50, max_tokens=80)
+    chunks = chunker.split(text)
+    assert all(count_tokens(chunk.text) <= chunker.max_tokens for chunk in chunks)
+    # Nothing lost and nothing repeated (no overlap)
+    assert words(" ".join(chunk.text for chunk in chunks)) == words(text)
+
+
+def test_sections_merge_up_to_target_without_splitting_one_that_fits():
+    short = "## {}\n\nOne line about {}."
+    text = "# Branches\n\n" + "\n\n".join(short.format(name, name) for name in ("Software", "Hardware"))
+    text += "\n\n## Design\n\n" + sentences(6, "design")
+    chunker = MarkdownChunker(target_tokens=80, max_tokens=120)
+    chunks = chunker.split(text)
+
+    design = [chunk for chunk in chunks if "design" in chunk.text]
+    assert len(design) == 1
+    assert design[0].text.count("Sentence") == 6
+    assert "## Design" in design[0].text
+    assert chunks[0].headings == "Branches"
+    assert "## Software" in chunks[0].text and "## Hardware" in chunks[0].text
+
+
+def test_long_heading_path_still_fits_max_tokens():
+    path = "# Frequently Asked Questions About Recruiting\n\n## Interviews, Presentations and Timelines\n\n"
+    chunker = MarkdownChunker(target_tokens=40, max_tokens=50)
+    chunks = chunker.split(path + " ".join(["word"] * 600))
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert count_tokens(chunk.text) <= chunker.max_tokens
+
+
+def test_continuation_chunks_restate_their_heading_path():
+    text = "# Guide\n\n## Interviews\n\n" + "\n\n".join(sentences(3, f"topic{i}") for i in range(6))
+    chunks = MarkdownChunker(target_tokens=60, max_tokens=90).split(text)
+    assert len(chunks) > 1
+    # The parent heading is not left in a chunk of its own
+    assert chunks[0].text.startswith("# Guide\n\n## Interviews\n\nSentence 0")
+    for chunk in chunks[1:]:
+        assert chunk.headings == "Guide > Interviews"
+        assert chunk.text.startswith("Guide > Interviews:\n")
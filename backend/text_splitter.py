@@ -0,0 +1,145 @@
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from tokens import count_tokens, truncate_tokens
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+LIST_ITEM = re.compile(r"^\s{0,3}(?:[-*+]|\d+[.)])\s+")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    # "Branches > Software": the markdown headings the chunk sits under ("" for none)
+    headings: str
+
+
+class MarkdownChunker:
+    """
+    Splits markdown (or plain text) along its structure instead of at fixed
+    character offsets: sections at headings, then blocks at blank lines and list
+    items. Consecutive small blocks and sections are merged up to `target_tokens`;
+    a single block over `max_tokens` is split at sentence boundaries. No overlap,
+    so no text is embedded twice. Continuation chunks repeat their heading path
+    on the first line so each chunk reads on its own.
+    """
+
+    def __init__(self, target_tokens: int = 400, max_tokens: int = 600):
+        self.target_tokens = target_tokens
+        self.max_tokens = max(max_tokens, target_tokens)
+
+    def _sections(self, text: str) -> List[Tuple[List[str], List[str]]]:
+        """[(heading path, lines under it)], lines include the heading line itself."""
+        sections, path, lines = [], [], []
+        for line in text.splitlines():
+            match = HEADING.match(line)
+            if match:
+                if any(l.strip() for l in lines):
+                    sections.append((list(path), lines))
+                level = len(match.group(1))
+                path = path[:level - 1] + [""] * max(0, level - 1 - len(path)) + [match.group(2)]
+                lines = [line]
+            else:
+                lines.append(line)
+        if any(l.strip() for l in lines):
+            sections.append((list(path), lines))
+        return sections
+
+    @staticmethod
+    def _blocks(lines: List[str]) -> List[str]:
+        """Paragraphs and list items (with their continuation lines)."""
+        blocks, current = [], []
+        for line in lines:
+            if not line.strip() or LIST_ITEM.match(line) or HEADING.match(line):
+                if current:
+                    blocks.append("\n".join(current))
+                current = [line] if line.strip() else []
+                if HEADING.match(line):
+                    blocks.append(line)
+                    current = []
+            else:
+                current.append(line)
+        if current:
+            blocks.append("\n".join(current))
+        return [block.strip("\n") for block in blocks if block.strip()]
+
+    def _fit(self, block: str, reserve: int = 0) -> List[str]:
+        """
+        Break an oversized block at sentence ends (hard cut only as a last resort),
+        leaving `reserve` tokens of each limit for the heading path restated in front.
+        """
+        target = max(self.target_tokens - reserve, 1)
+        limit = max(self.max_tokens - reserve, 1)
+        if count_tokens(block) <= limit:
+            return [block]
+        pieces, current = [], ""
+        for sentence in SENTENCE_END.split(block):
+            candidate = f"{current} {sentence}".strip()
+            if current and count_tokens(candidate) > target:
+                pieces.append(current)
+                candidate = sentence
+            while count_tokens(candidate) > limit:
+                head = truncate_tokens(candidate, target)
+                pieces.append(head)
+                candidate = candidate[len(head):].strip()
+            current = candidate
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def split(self, text: str) -> List[Chunk]:
+        chunks: List[Chunk] = []
+        parts: List[str] = []
+        part_paths: List[List[str]] = []
+        used = 0
+
+        def flush():
+            nonlocal parts, part_paths, used
+            if parts:
+                chunks.append(Chunk(join_blocks(parts), " > ".join(common_prefix(part_paths))))
+            parts, part_paths, used = [], [], 0
+
+        for path, lines in self._sections(text):
+            label = " > ".join(p for p in path if p)
+            prefix = f"{label}:\n" if label else ""
+            pieces = [
+                piece for block in self._blocks(lines) for piece in self._fit(block, count_tokens(prefix))
+            ]
+            sizes = [count_tokens(piece) for piece in pieces]
+            # A section that fits whole is never split across chunks (nor its heading stranded),
+            # and parent headings with no text of their own stay with the section below them
+            headings_only = all(HEADING.match(part) for part in parts)
+            if parts and not headings_only and used + sum(sizes) > self.target_tokens:
+                flush()
+            for piece, tokens in zip(pieces, sizes):
+                if parts and used + tokens > self.target_tokens:
+                    flush()
+                if not parts and label and not HEADING.match(piece):
+                    # Continuation of a section: restate where it sits
+                    piece = prefix + piece
+                    tokens = count_tokens(piece)
+                parts.append(piece)
+                part_paths.append(path)
+                used += tokens
+        flush()
+        return chunks
+
+
+def join_blocks(blocks: List[str]) -> str:
+    """Blank line between blocks, except between consecutive list items."""
+    text = blocks[0]
+    for previous, block in zip(blocks, blocks[1:]):
+        in_list = LIST_ITEM.match(block) and any(LIST_ITEM.match(line) for line in previous.splitlines())
+        text += ("\n" if in_list else "\n\n") + block
+    return text
+
+
+def common_prefix(paths: List[List[str]]) -> List[str]:
+    prefix = []
+    for level in zip(*paths):
+        if any(name != level[0] for name in level):
+            break
+        prefix.append(level[0])
+    return [name for name in prefix if name]
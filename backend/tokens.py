@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@lru_cache()
+def _encoding():
+    """cl100k_base if tiktoken and its BPE file are available (it downloads on first use); else None."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"tiktoken unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text or "", disallowed_special=()))
+    # ~4 characters per token for English prose
+    return (len(text or "") + 3) // 4
+
+
+def truncate_tokens(text: str, limit: int, keep_end: bool = False) -> str:
+    """Cut `text` to at most `limit` tokens, keeping the beginning (or the end)."""
+    text = text or ""
+    encoding = _encoding()
+    if encoding is not None:
+        ids = encoding.encode(text, disallowed_special=())
+        if len(ids) <= limit:
+            return text
+        return encoding.decode(ids[-limit:] if keep_end else ids[:limit])
+    if len(text) <= limit * 4:
+        return text
+    return text[-limit * 4:] if keep_end else text[:limit * 4]
@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+VECTOR_STORES = ("chroma", "numpy")
+
+
+def default_store_dir(store: str, provider: str) -> str:
+    """Where a store lives unless configured; vectors from different providers never share one."""
+    if store == "chroma":
+        return "chroma_db" if provider == "google" else f"chroma_db_{provider}"
+    return f"{store}_db_{provider}"
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Small-corpus vector store: unit-normalized float32 embeddings in one contiguous
+    matrix, top-k by a single matrix-vector product.
+
+    Persisted as `vectors.npy` (opened memory-mapped, so loading is near-instant)
+    plus `chunks.json` with ids / texts / metadata in the same row order. Every
+    write rewrites both files via temp file + rename; fine for a knowledge base of
+    a few thousand chunks, not meant for large corpora.
+
+    `count` / `get` / `upsert` mirror the Chroma collection calls ChatHandler uses.
+    """
+
+    def __init__(self, directory: str, embedding):
+        self.directory = directory
+        self.embedding = embedding
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._load()
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.npy")
+
+    @property
+    def _chunks_path(self) -> str:
+        return os.path.join(self.directory, "chunks.json")
+
+    def _load(self):
+        if not (os.path.exists(self._vectors_path) and os.path.exists(self._chunks_path)):
+            return
+        with open(self._chunks_path, "r") as f:
+            chunks = json.load(f)
+        self._matrix = np.load(self._vectors_path, mmap_mode="r")
+        self._ids, self._texts, self._metadatas = chunks["ids"], chunks["texts"], chunks["metadatas"]
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # np.save appends .npy to names without it, so keep the suffix on the temp file
+        tmp_vectors = os.path.join(self.directory, "vectors.tmp.npy")
+        tmp_chunks = f"{self._chunks_path}.tmp"
+        np.save(tmp_vectors, self._matrix)
+        with open(tmp_chunks, "w") as f:
+            json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f)
+        os.replace(tmp_vectors, self._vectors_path)
+        os.replace(tmp_chunks, self._chunks_path)
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    # --- Chroma-collection-compatible calls ---
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get(self, include: Optional[List[str]] = None) -> Dict[str, list]:
+        return {"ids": list(self._ids), "documents": list(self._texts), "metadatas": list(self._metadatas)}
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[dict], embeddings: List[List[float]]):
+        if not ids:
+            return
+        rows = self._normalize(embeddings)
+        with self._lock:
+            if self._ids and self._matrix.shape[1] != rows.shape[1]:
+                raise ValueError(f"Embedding size {rows.shape[1]} does not match the store's {self._matrix.shape[1]}")
+            matrix = np.array(self._matrix) if self._ids else np.zeros((0, rows.shape[1]), np.float32)
+            all_ids, texts, metas = list(self._ids), list(self._texts), list(self._metadatas)
+            position = {doc_id: row for row, doc_id in enumerate(all_ids)}
+
+            appended = []
+            for i, doc_id in enumerate(ids):
+                row = position.get(doc_id)
+                if row is None:
+                    position[doc_id] = len(all_ids)
+                    all_ids.append(doc_id)
+                    texts.append(documents[i])
+                    metas.append(metadatas[i] if metadatas else {})
+                    appended.append(i)
+                else:
+                    matrix[row] = rows[i]
+                    texts[row] = documents[i]
+                    metas[row] = metadatas[i] if metadatas else {}
+            if appended:
+                matrix = np.vstack([matrix, rows[appended]])
+
+            self._matrix, self._ids, self._texts, self._metadatas = matrix, all_ids, texts, metas
+            self._save()
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        drop = set(ids or [])
+        with self._lock:
+            keep = [row for row, doc_id in enumerate(self._ids) if doc_id not in drop]
+            if len(keep) == len(self._ids):
+                return True
+            self._matrix = np.array(self._matrix[keep]) if keep else np.zeros((0, self._matrix.shape[1]), np.float32)
+            self._ids = [self._ids[row] for row in keep]
+            self._texts = [self._texts[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._save()
+        return True
+
+    # --- LangChain VectorStore interface ---
+
+    def add_texts(
+        self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        if ids is None:
+            raise ValueError("NumpyVectorStore needs explicit ids")
+        self.upsert(list(ids), texts, metadatas or [{} for _ in texts], self.embedding.embed_documents(texts))
+        return list(ids)
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        # Snapshot the references; writers swap whole lists/arrays, never mutate in place
+        matrix, ids, texts, metadatas = self._matrix, self._ids, self._texts, self._metadatas
+        if not ids:
+            return []
+        scores = matrix @ self._normalize(embedding)[0]
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (Document(page_content=texts[row], metadata=metadatas[row], id=ids[row]), float(scores[row]))
+            for row in top
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(await self.embedding.aembed_query(query), k)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def _select_relevance_score_fn(self):
+        # Scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, directory: str = "numpy_db", **kwargs):
+        store = cls(directory, embedding)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+
+def open_vector_store(kind: str, directory: str, embeddings):
+    """Returns (store, collection): the LangChain store and the object with count/get/upsert."""
+    if kind == "numpy":
+        store = NumpyVectorStore(directory, embeddings)
+        return store, store
+    if kind == "chroma":
+        from langchain_chroma import Chroma
+
+        store = Chroma(persist_directory=directory, embedding_function=embeddings)
+        return store, store._collection
+    raise ValueError(f"Unknown vector store {kind!r} (expected one of {', '.join(VECTOR_STORES)})")
+
+
+if __name__ == "__main__":
+    # Load-time / query-latency comparison: python vector_store.py [chunks] [dimensions]
+    import shutil
+    import sys
+    import tempfile
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 768
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimensions)).astype(np.float32)
+    queries = rng.standard_normal((200, dimensions)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(count)]
+    texts = [f"chunk {i}" for i in range(count)]
+    metadatas = [{"source": "bench"} for _ in range(count)]
+
+    class PrecomputedEmbeddings:
+        def embed_documents(self, docs):
+            raise RuntimeError("benchmark writes precomputed vectors")
+
+        def embed_query(self, text):
+            return queries[0].tolist()
+
+    for kind in VECTOR_STORES:
+        directory = tempfile.mkdtemp(prefix=f"bench-{kind}-")
+        try:
+            _, collection = open_vector_store(kind, directory, PrecomputedEmbeddings())
+            for i in range(0, count, 1000):
+                collection.upsert(
+                    ids=ids[i:i + 1000], documents=texts[i:i + 1000],
+                    metadatas=metadatas[i:i + 1000], embeddings=vectors[i:i + 1000].tolist(),
+                )
+            started = time.perf_counter()
+            store, _ = open_vector_store(kind, directory, PrecomputedEmbeddings())
+            load_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            for query in queries:
+                store.similarity_search_by_vector(query.tolist(), k=3)
+            query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+            print(f"{kind:>6}: load {load_ms:8.2f} ms, query {query_ms:6.3f} ms (n={count}, d={dimensions})")
+        except ImportError as e:
+            print(f"{kind:>6}: skipped ({e})")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
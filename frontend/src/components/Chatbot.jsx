@@ -1,6 +1,17 @@
 import React, { useState, useRef, useEffect } from 'react';
 import './Chatbot.css';
 
+// Parse one server-sent event block ("event: x\ndata: {...}")
+const parseEvent = (block) => {
+  let event = 'message';
+  let data = '';
+  block.split('\n').forEach(line => {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data += line.slice(5).trim();
+  });
+  return { event, data: data ? JSON.parse(data) : null };
+};
+
 function Chatbot() {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState([
@@ -14,6 +25,10 @@ function Chatbot() {
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const messagesEndRef = useRef(null);
+  // Aborting the request makes the backend stop generating
+  const streamRef = useRef(null);
+  // Lets the backend answer follow-up questions in context (kept for this page load only)
+  const sessionIdRef = useRef(`${Date.now()}-${Math.random().toString(36).slice(2)}`);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -23,7 +38,10 @@ function Chatbot() {
     scrollToBottom();
   }, [messages]);
 
+  useEffect(() => () => streamRef.current?.abort(), []);
+
   const toggleChat = () => {
+    if (isOpen) streamRef.current?.abort();
     setIsOpen(!isOpen);
   };
 
@@ -45,7 +63,11 @@ function Chatbot() {
       // Use relative path if proxied, or get from env. 
       // Assuming backend runs on port 8000 and we are on 3000, we need full URL if no proxy.
       const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
-      const API_ENDPOINT = `${API_URL}/api/chat`; 
+      const API_ENDPOINT = `${API_URL}/api/chat/stream`; 
+
+      streamRef.current?.abort();
+      const controller = new AbortController();
+      streamRef.current = controller;
       
       const response = await fetch(API_ENDPOINT, {
       method: 'POST',
@@ -54,26 +76,54 @@ function Chatbot() {
       },
       body: JSON.stringify({
         message: inputMessage,
-      })
+        session_id: sessionIdRef.current,
+      }),
+      signal: controller.signal
     });
 
     if (!response.ok) {
       throw new Error(`API error: ${response.status}`);
     }
 
-    const data = await response.json();
-    const botResponseText = data.response || data.message || data.reply || data.text;
-    
-    const botMessage = {
-      id: Date.now() + 1,
-      text: botResponseText,
-      isBot: true,
-      timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+    // Tokens are appended to this message as they arrive
+    const botId = Date.now() + 1;
+    const updateBot = (update) => setMessages(prev => prev.map(m => (m.id === botId ? update(m) : m)));
+    let started = false;
+    const startBot = () => {
+      if (started) return;
+      started = true;
+      setIsLoading(false);
+      setMessages(prev => [...prev, {
+        id: botId,
+        text: '',
+        isBot: true,
+        timestamp: new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+      }]);
     };
-    
-    setMessages(prev => [...prev, botMessage]);
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const { event, data } = parseEvent(buffer.slice(0, end));
+        buffer = buffer.slice(end + 2);
+        if (event === 'token') {
+          startBot();
+          updateBot(m => ({ ...m, text: m.text + data }));
+        } else if (event === 'error') {
+          startBot();
+          updateBot(m => ({ ...m, text: data.message }));
+        }
+      }
+    }
     
   } catch (error) {
+    if (error.name === 'AbortError') return;
     console.error('Error calling chatbot API:', error);
     const errorMessage = {
       id: Date.now() + 1,
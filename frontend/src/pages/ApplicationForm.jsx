@@ -173,6 +173,7 @@ function ApplicationForm() {
     lastName: user?.lastName || '',
     preferredName: '',
     email: user?.primaryEmailAddress?.emailAddress || '',
+    nuid: '',
     pronouns: '',
     major: '',
     minor: '',
@@ -250,12 +251,16 @@ function ApplicationForm() {
   };
 
 
+  // Digits only; spreadsheets and people both drop the leading zeros, the backend pads them back
+  const nuidDigits = (formData.nuid || '').replace(/\D/g, '');
+  const nuidValid = nuidDigits.length > 0 && nuidDigits.length <= 9;
+
   const isStepValid = () => {
     switch(currentStep) {
       case 1:
         return true; 
       case 2:
-        return formData.firstName && formData.lastName && formData.email && 
+        return formData.firstName && formData.lastName && formData.email && nuidValid &&
                formData.pronouns && formData.major && formData.year && 
                formData.graduationSemester && formData.referralSource;
       case 3:
@@ -294,6 +299,7 @@ function ApplicationForm() {
     try {
       const application = {
         email: user?.primaryEmailAddress?.emailAddress,
+        nuid: nuidDigits,
         role: roleId?.replace(/-/g, ' '),
         branch: branchId,
         branchColor: roleContent.branch.toLowerCase().replace(' ', '-'),
@@ -336,6 +342,13 @@ function ApplicationForm() {
       alert('Application submitted successfully!');
       navigate('/my-applications');
     } catch (error) {
+      if (error.status === 409 && error.detail?.code === 'already_applied') {
+        // Resubmitting can never succeed; send them to the application that's on file
+        localStorage.removeItem('application-draft');
+        alert("You've already applied for this role. You can follow your application under My Applications.");
+        navigate('/my-applications');
+        return;
+      }
       console.error('Error submitting application:', error);
       alert(`Failed to submit application: ${error.message}. Please try again.`);
     } finally {
@@ -501,6 +514,15 @@ function ApplicationForm() {
                     onChange={handleInputChange}
                     required
                   />
+                  <Input
+                    label="NUID"
+                    name="nuid"
+                    value={formData.nuid || ''}
+                    onChange={handleInputChange}
+                    placeholder="e.g., 001234567"
+                    error={formData.nuid && !nuidValid ? 'Enter your 9-digit NUID' : ''}
+                    required
+                  />
                   
                   <div className="input-wrapper">
                     <label className="input-label">Pronouns <span className="required">*</span></label>
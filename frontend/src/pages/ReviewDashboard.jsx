@@ -62,7 +62,9 @@ function ReviewDashboard() {
   const handleSelectApp = async (app) => {
     try {
       await reviewAPI.claim(app._id, getToken);
-      setSelectedApp(app);
+      // Queue rows omit formData; load the full application once claimed
+      const detail = await applicationAPI.getDetail(app._id, getToken);
+      setSelectedApp(detail);
       setNotes('');
     } catch (error) {
       alert("Could not claim application: " + error.message);
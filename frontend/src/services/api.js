@@ -43,7 +43,13 @@ const apiRequest = async (endpoint, options = {}, getToken) => {
     // Handle response
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.detail || errorData.error || `HTTP error! status: ${response.status}`);
+      // `detail` is either a message or an object with a `message` (and a `code` callers can branch on)
+      const detail = errorData.detail;
+      const message = (detail && typeof detail === 'object' ? detail.message : detail) || errorData.error;
+      const error = new Error(message || `HTTP error! status: ${response.status}`);
+      error.status = response.status;
+      error.detail = detail;
+      throw error;
     }
 
     return await response.json();
@@ -123,6 +129,24 @@ export const reviewAPI = {
     }, getToken);
   },
 
+  claimNext: async (branch, count, getToken) => {
+    return apiRequest(`/api/review/claim-next/${branch}?count=${count}`, {
+      method: 'POST',
+    }, getToken);
+  },
+
+  renewClaim: async (appId, getToken) => {
+    return apiRequest(`/api/review/claim/${appId}/renew`, {
+      method: 'POST',
+    }, getToken);
+  },
+
+  releaseClaim: async (appId, getToken) => {
+    return apiRequest(`/api/review/claim/${appId}/release`, {
+      method: 'POST',
+    }, getToken);
+  },
+
   submitDecision: async (appId, decisionData, getToken) => {
     return apiRequest(`/api/review/decision/${appId}`, {
       method: 'POST',
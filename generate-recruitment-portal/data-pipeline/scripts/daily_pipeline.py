@@ -1 +1,24 @@
-"""Module: Placeholder for Generate Recruitment Portal."""\n
\ No newline at end of file
+"""Daily ETL run: python scripts/daily_pipeline.py [--full] [--config path]"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.etl.pipeline import CONFIG_PATH, daily_etl_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load new Fillout responses into the applications collection")
+    # --full ignores the watermarks and reprocesses every row (upserts make this safe)
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    args = parser.parse_args()
+    reports = daily_etl_pipeline(args.config, full=args.full)
+    if any("error" in report for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 
 from .extract import (
     fetch_applications_from_sheets,
-    fetch_decisions_from_sheets,
+    read_csv_export,
 )
 
 from .transform import (
@@ -13,7 +13,7 @@ from .transform import (
 )
 
 from .load import (
-    update_review_queues,
+    upsert_applications,
     trigger_incomplete_emails,
     update_dashboard_metrics,
 )
@@ -22,13 +22,13 @@ from .pipeline import daily_etl_pipeline
 
 __all__ = [
     "fetch_applications_from_sheets",
-    "fetch_decisions_from_sheets",
+    "read_csv_export",
     "clean_applications",
     "get_branch_queues",
     "find_incomplete",
     "find_unreviewed",
-    "update_review_queues",
+    "upsert_applications",
     "trigger_incomplete_emails",
     "update_dashboard_metrics",
     "daily_etl_pipeline",
-]
\ No newline at end of file
+]
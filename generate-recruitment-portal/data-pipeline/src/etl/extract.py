@@ -1,9 +1,16 @@
 # extract data
 
+from typing import List
+
 import pandas as pd
 from fastapi import FastAPI
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
+
+try:
+    from googleapiclient.discovery import build
+    from google.oauth2.service_account import Credentials
+except ImportError:
+    # Only needed for Sheets sources; CSV exports work without the Google client
+    build = Credentials = None
 
 app = FastAPI()
 
@@ -13,15 +20,123 @@ def extract_data():
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
-def fetch_applications_from_sheets():
-    '''Get applications from sheets'''
-    creds = Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
-    applications = build("sheets", "v4")
-    
-    return applications.spreadshets().values()
+# Sheet row number of every extracted row (row 1 is the header); the watermark
+ROW_COLUMN = "_row"
+# Fillout's edit time; rows behind the row watermark edited after the last run are re-read
+UPDATED_COLUMN = "Last updated"
+
+
+def parse_fillout_time(series: pd.Series) -> pd.Series:
+    # "Wed Aug 06 2025 07:22:00 GMT-0400 (Eastern Daylight Time)"
+    cleaned = series.str.replace(r"\s*\(.*\)\s*$", "", regex=True)
+    return pd.to_datetime(cleaned, format="%a %b %d %Y %H:%M:%S GMT%z", utc=True, errors="coerce")
+
+
+def _edited_since(updated: pd.Series, updated_after) -> pd.Series:
+    """Mask of `updated` (Fillout time strings) later than `updated_after` (naive UTC or aware)."""
+    after = pd.Timestamp(updated_after)
+    after = after.tz_localize("UTC") if after.tzinfo is None else after.tz_convert("UTC")
+    return (parse_fillout_time(updated.astype("string")) > after).fillna(False).astype(bool)
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def sheets_values(credentials_file: str = "credentials.json"):
+    '''Sheets API `spreadsheets().values()` resource, authenticated as the service account'''
+    if build is None:
+        raise RuntimeError("google-api-python-client is not installed")
+    creds = Credentials.from_service_account_file(credentials_file, scopes=SCOPES)
+    return build("sheets", "v4", credentials=creds, cache_discovery=False).spreadsheets().values()
+
+
+def _rows_to_df(header: List[str], rows: List[list], first_row: int) -> pd.DataFrame:
+    # The API drops trailing empty cells, so rows come back ragged
+    width = len(header)
+    padded = [(row + [""] * width)[:width] for row in rows]
+    df = pd.DataFrame(padded, columns=header, dtype="string")
+    df[ROW_COLUMN] = range(first_row, first_row + len(df))
+    # Fully blank rows still advance the watermark, they just carry no data
+    return df[(df[header] != "").any(axis=1)]
+
+
+def _fetch_edited_rows(values, sheet_id: str, tab: str, header: List[str], end_row: int,
+                       updated_after, batch_rows: int) -> List[pd.DataFrame]:
+    '''
+    Rows 2..`end_row` edited after `updated_after`: one call for the
+    "Last updated" column, then only those rows (batchGet, `batch_rows` ranges a call).
+    '''
+    column = next((i for i, name in enumerate(header) if name.startswith(UPDATED_COLUMN)), None)
+    if column is None or end_row < 2:
+        return []
+    letter = _column_letter(column)
+    cells = values.get(spreadsheetId=sheet_id, range=f"'{tab}'!{letter}2:{letter}{end_row}").execute()
+    updated = pd.Series([(cell or [""])[0] for cell in cells.get("values", [])], dtype="string")
+    rows = [2 + i for i in updated.index[_edited_since(updated, updated_after)]]
+    frames = []
+    for start in range(0, len(rows), batch_rows):
+        ranges = [f"'{tab}'!{row}:{row}" for row in rows[start:start + batch_rows]]
+        result = values.batchGet(spreadsheetId=sheet_id, ranges=ranges).execute()
+        for row, value_range in zip(rows[start:start + batch_rows], result.get("valueRanges", [])):
+            if value_range.get("values"):
+                frames.append(_rows_to_df(header, value_range["values"], row))
+    return frames
+
+
+def fetch_applications_from_sheets(
+    sheet_id: str,
+    tab: str,
+    start_row: int = 2,
+    batch_rows: int = 500,
+    values=None,
+    updated_after=None,
+) -> pd.DataFrame:
+    '''
+    Get applications from sheets: every row from `start_row` on, read in ranged
+    batches of `batch_rows` rows (one API call each) until a short batch marks
+    the end of the data, plus earlier rows edited after `updated_after` (when given).
+    Returns string columns plus `_row`.
+    '''
+    values = values or sheets_values()
+    header = values.get(spreadsheetId=sheet_id, range=f"'{tab}'!1:1").execute().get("values", [[]])[0]
+    frames = []
+    if updated_after is not None:
+        frames += _fetch_edited_rows(values, sheet_id, tab, header, start_row - 1, updated_after, batch_rows)
+    row = max(start_row, 2)
+    while True:
+        end = row + batch_rows - 1
+        rows = values.get(spreadsheetId=sheet_id, range=f"'{tab}'!{row}:{end}").execute().get("values", [])
+        if rows:
+            frames.append(_rows_to_df(header, rows, row))
+        if len(rows) < batch_rows:
+            break
+        row = end + 1
+    if not frames:
+        return pd.DataFrame(columns=header + [ROW_COLUMN])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_csv_export(path: str, start_row: int = 2, updated_after=None) -> pd.DataFrame:
+    '''Same shape as fetch_applications_from_sheets, from a downloaded Fillout/Sheets CSV'''
+    df = pd.read_csv(path, dtype="string", keep_default_na=False)
+    df[ROW_COLUMN] = range(2, len(df) + 2)
+    keep = df[ROW_COLUMN] >= start_row
+    updated = next((c for c in df.columns if c.startswith(UPDATED_COLUMN)), None)
+    if updated_after is not None and updated is not None:
+        keep |= _edited_since(df[updated], updated_after)
+    df = df[keep]
+    data_columns = [c for c in df.columns if c != ROW_COLUMN]
+    return df[(df[data_columns] != "").any(axis=1)].reset_index(drop=True)
+
 
 def sheet_to_df(sheet_id, sheet_range):
-    values = fetch_applications_from_sheets().get(
+    values = sheets_values().get(
         spreadsheetId=sheet_id,
         range=sheet_range
     ).execute()
@@ -33,4 +148,4 @@ def sheet_to_df(sheet_id, sheet_range):
     headers = rows[0]
     data = rows[1:]
 
-    return pd.DataFrame(data, columns=headers)
\ No newline at end of file
+    return pd.DataFrame(data, columns=headers)
@@ -1,6 +1,16 @@
 # load data
 
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
 from fastapi import FastAPI
+from pymongo import MongoClient, UpdateOne
+
+from .extract import ROW_COLUMN
+from .transform import form_fields
 
 app = FastAPI()
 
@@ -8,11 +18,167 @@ app = FastAPI()
 def load_data():
     return {"message": "Data Loaded"}
 
-def update_review_queues(branch_queues):
-    pass
+# Same database the backend API serves applications from
+DATABASE_NAME = "recruitment"
+WATERMARKS = "etl_watermarks"
+
+
+def get_database(uri: Optional[str] = None, name: str = DATABASE_NAME):
+    uri = uri or os.getenv("MONGO") or os.getenv("MONGODB_URI") or "mongodb://localhost:27017"
+    return MongoClient(uri)[name]
+
+
+def _value(value):
+    # pandas NA / NaT -> None, Timestamps -> datetimes pymongo can encode
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.tz_convert("UTC").tz_localize(None).to_pydatetime()
+    return value
+
+
+def existing_applications(db, df: pd.DataFrame, batch_size: int = 1000) -> pd.Series:
+    '''
+    _id of the stored application each row belongs to (None for new applicants),
+    found by normalized NUID, then email, within the same branch and role. Same
+    indexed dedupKeys lookup the backend makes before an insert (backend/dedup.py),
+    so a resubmission from a new email in a later run updates the old application.
+    '''
+    by_key = {}
+    for field, column in (("email", "dedupEmail"), ("nuid", "dedupNuid")):
+        values = df[column].dropna().unique().tolist()
+        for start in range(0, len(values), batch_size):
+            cursor = db["applications"].find(
+                {f"dedupKeys.{field}": {"$in": values[start:start + batch_size]}},
+                {"branchKey": 1, "role": 1, f"dedupKeys.{field}": 1},
+            )
+            for doc in cursor:
+                by_key[(field, doc.get("branchKey"), doc.get("role"), doc["dedupKeys"][field])] = doc["_id"]
+    found = [
+        by_key.get(("nuid", branch_key, role, nuid)) or by_key.get(("email", branch_key, role, email))
+        for branch_key, role, nuid, email in zip(df["branchKey"], df["role"], df["dedupNuid"], df["dedupEmail"])
+    ]
+    return pd.Series(found, index=df.index, dtype=object)
+
+
+def application_upserts(df: pd.DataFrame, existing: Optional[pd.Series] = None) -> List[UpdateOne]:
+    '''
+    One upsert per applicant: the matching stored application when `existing`
+    has one (see existing_applications), else keyed by email (NUID when there is
+    no email), branch and role. Shaped like the documents the backend's
+    /api/applications/create writes. Sheet fields are $set on every run; review state (status, claims,
+    notes) is only ever set on insert, so re-running never undoes a decision.
+    '''
+    fields = form_fields(df)
+    now = datetime.utcnow()
+    if existing is None:
+        existing = pd.Series(None, index=df.index, dtype=object)
+    ops = []
+    for row, existing_id in zip(df.to_dict("records"), existing):
+        row = {key: _value(value) for key, value in row.items()}
+        if existing_id is not None:
+            key = {"_id": existing_id}
+        else:
+            key = {"email": row["email"]} if row["email"] else {"nuid": row["nuid"]}
+            key.update(branchKey=row["branchKey"], role=row["role"])
+        submitted = row["startedAt"] or now
+        update = {
+            "email": row["email"],
+            "nuid": row["nuid"],
+            "branch": row["branch"],
+            "branchKey": row["branchKey"],
+            "roleLevel": int(row["roleLevel"]),
+            "formData": {field: row[field] for field in fields if row[field] is not None},
+            "source": {
+                "fillout": row.get("submissionId"),
+                "row": int(row[ROW_COLUMN]),
+                "url": row.get("filloutUrl"),
+                "updatedAt": row["updatedAt"],
+            },
+            "emailValid": bool(row["emailValid"]),
+            # Looked up by the backend before it inserts a new application (see backend/dedup.py)
+            "dedupKeys": {
+                key: value for key, value in
+                (
+                    ("email", row.get("dedupEmail")), ("nuid", row.get("dedupNuid")),
+                    ("name", row.get("nameKey")), ("fullName", row.get("dedupName")),
+                )
+                if value is not None
+            },
+            "syncedAt": now,
+        }
+        ops.append(UpdateOne(
+            key,
+            {
+                "$set": {field: value for field, value in update.items() if value is not None},
+                "$setOnInsert": {
+                    "status": "submitted",
+                    "submittedAt": submitted,
+                    "timestamps": {"submitted": submitted},
+                    "branchColor": "",
+                    "isSubmitted": True,
+                },
+            },
+            upsert=True,
+        ))
+    return ops
+
+
+def upsert_applications(db, df: pd.DataFrame, batch_size: int = 1000) -> Dict[str, int]:
+    '''Unordered bulk upserts in batches; returns counts plus the new applications per (branchKey, role)'''
+    ops = application_upserts(df, existing_applications(db, df))
+    report = {"matched": 0, "modified": 0, "upserted": 0}
+    inserted = Counter()
+    keys = list(zip(df["branchKey"], df["branch"], df["role"]))
+    for start in range(0, len(ops), batch_size):
+        result = db["applications"].bulk_write(ops[start:start + batch_size], ordered=False)
+        report["matched"] += result.matched_count
+        report["modified"] += result.modified_count
+        report["upserted"] += result.upserted_count
+        for index in result.upserted_ids:
+            inserted[keys[start + index]] += 1
+    report["inserted_by_role"] = inserted
+    return report
+
+
+def update_dashboard_metrics(db, inserted: Counter):
+    '''
+    Count newly inserted applications into the backend's dashboard counters
+    (metrics collection, one document per branchKey|role; see backend metrics.py).
+    '''
+    if not inserted:
+        return
+    now = datetime.utcnow()
+    db["metrics"].bulk_write([
+        UpdateOne(
+            {"_id": f"{branch_key}|{role}"},
+            {
+                "$inc": {"counts.submitted": n},
+                "$set": {"branchKey": branch_key, "branch": branch, "role": role, "updatedAt": now},
+            },
+            upsert=True,
+        )
+        for (branch_key, branch, role), n in inserted.items()
+    ], ordered=False)
+
+
+def get_watermark(db, source: str) -> dict:
+    return db[WATERMARKS].find_one({"_id": source}) or {"_id": source, "lastRow": 1}
+
+
+def save_watermark(db, source: str, last_row: int, last_updated_at=None):
+    # $max: a run that only re-read edited rows (behind the row watermark) must not move either mark back
+    db[WATERMARKS].update_one(
+        {"_id": source},
+        {
+            "$max": {"lastRow": int(last_row), "lastUpdatedAt": _value(last_updated_at)},
+            "$set": {"runAt": datetime.utcnow()},
+        },
+        upsert=True,
+    )
+
 
 def trigger_incomplete_emails(incompleted):
     pass
-
-def update_dashboard_metrics(apps_df):
-    pass
\ No newline at end of file
@@ -1,39 +1,117 @@
 # ETL Pipeline
 
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
 from fastapi import FastAPI
-import pandas as pd
-from googleapiclient.discovery import build
+import yaml
 
-from .extract import sheet_to_df
-from .transform import clean_applications, get_branch_queues, find_incompleted, find_unreviewed
-from .load import update_review_queues, trigger_incomplete_emails, update_dashboard_metrics
+from .extract import ROW_COLUMN, fetch_applications_from_sheets, read_csv_export, sheets_values
+from .transform import clean_applications, find_incomplete
+from ..utils.deduplication import deduplicate
+from .load import (
+    get_database, get_watermark, save_watermark, trigger_incomplete_emails,
+    update_dashboard_metrics, upsert_applications,
+)
 
 app = FastAPI()
 
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "config", "pipeline_config.yaml")
+
 @app.post ("/api/etl/run")
 def run_etl():
-    return {"message": "Run ETL"}
-
-def daily_etl_pipeline():
-    # EXTRACT - Get data from Google Sheets
-    sheet_name = "Sheet Name"
-    data = sheet_to_df(sheet_name, "A:Z")
-    
-    # TRANSFORM - Clean and process
-    # Remove duplicates/validate emails
-    data = data.clean_applications()
-    
-    # Categorize by branch (i do this in the api kinda)
-    branch_queues = data.groupby('branch')
-    
-    # Find incomplete (missing required fields)
-    incomplete = find_incompleted(data)
-    
-    # Find unreviewed
-    reviewed_ids = set(decisions['application_id'])
-    unreviewed = data[~data['id'].isin(reviewed_ids)]
-    
-    # LOAD - Update systems
-    update_review_queues(branch_queues)
-    trigger_incomplete_emails(incomplete)
-    update_dashboard_metrics(apps_df)
\ No newline at end of file
+    return {"message": "Run ETL", "sources": daily_etl_pipeline()}
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+@contextmanager
+def stage(name: str, timings: dict):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - started, 3)
+
+
+def run_source(source: dict, db, values=None, full: bool = False, batch_rows: int = 500) -> dict:
+    '''
+    One form's responses: rows past the stored row watermark, plus earlier rows
+    Fillout edited after the stored "Last updated" watermark, are extracted,
+    cleaned and upserted. The watermarks only move once the load has succeeded,
+    so a failed run is simply repeated (upserts are idempotent).
+    '''
+    name = source["name"]
+    timings = {}
+    watermark = {} if full else get_watermark(db, name)
+    start_row = watermark.get("lastRow", 1) + 1
+    updated_after = watermark.get("lastUpdatedAt")
+
+    # EXTRACT - new and edited rows only
+    with stage("extract", timings):
+        if source.get("csv"):
+            raw = read_csv_export(source["csv"], start_row, updated_after)
+        else:
+            raw = fetch_applications_from_sheets(
+                source["sheet_id"], source.get("tab", "Sheet1"), start_row, batch_rows, values, updated_after
+            )
+    report = {"source": name, "start_row": start_row, "rows": len(raw), "timings": timings}
+    if raw.empty:
+        print(f"{name}: no new or edited rows after row {start_row - 1}")
+        return report
+
+    # TRANSFORM - typed columns, validation, de-duplication
+    with stage("transform", timings):
+        data = clean_applications(raw, branch=source.get("branch", ""), role=source.get("role", ""))
+
+    # DEDUP - merge resubmissions and the same applicant under another email
+    with stage("dedup", timings):
+        data, merged = deduplicate(data)
+        incomplete = find_incomplete(data)
+
+    # LOAD - upsert applications, count new ones into the dashboard, then advance the watermark
+    with stage("load", timings):
+        loaded = upsert_applications(db, data)
+        update_dashboard_metrics(db, loaded.pop("inserted_by_role"))
+        trigger_incomplete_emails(incomplete)
+        save_watermark(db, name, raw[ROW_COLUMN].max(), data["updatedAt"].max())
+
+    report.update(
+        loaded,
+        edited_rows=int((raw[ROW_COLUMN] < start_row).sum()),
+        applications=len(data),
+        merged=int(merged["size"].sum() - len(merged)),
+        incomplete=len(incomplete),
+        invalid_email=int((~data["emailValid"]).sum()),
+    )
+    print(
+        f"{name}: rows {start_row}-{raw[ROW_COLUMN].max()} -> {len(data)} applications "
+        f"({loaded['upserted']} new, {loaded['modified']} updated, {report['merged']} duplicates merged, "
+        f"{len(incomplete)} incomplete) | "
+        + " | ".join(f"{stage_name} {seconds:.2f}s" for stage_name, seconds in timings.items())
+    )
+    return report
+
+
+def daily_etl_pipeline(config_path: str = CONFIG_PATH, full: bool = False, db=None) -> List[dict]:
+    config = load_config(config_path)
+    db = db if db is not None else get_database(config.get("mongo_uri"), config.get("database", "recruitment"))
+    sources = config.get("sources") or []
+    values: Optional[object] = None
+    if any(not source.get("csv") for source in sources):
+        values = sheets_values(config.get("credentials_file", "credentials.json"))
+
+    reports = []
+    for source in sources:
+        try:
+            reports.append(run_source(source, db, values, full, config.get("batch_rows", 500)))
+        except Exception as e:
+            # One broken form must not hold up the others
+            print(f"{source.get('name')}: failed: {e}")
+            reports.append({"source": source.get("name"), "error": str(e)})
+    return reports
@@ -1,26 +1,115 @@
 # transform data
 
+import re
+
 from fastapi import FastAPI
+import numpy as np
 import pandas as pd
 
+from .extract import ROW_COLUMN, parse_fillout_time
+
 app = FastAPI()
 
 @app.post ("/api/etl/run/transform")
 def transform_Data():
     return {"message": "Data Transformed"}
 
-def clean_applications(applications):
-    # Remove duplicates
-    df = df.drop_duplicates(subset=["email"])
+# Fillout column (matched by prefix: the year question is reworded every season) -> field name
+FILLOUT_COLUMNS = [
+    ("Submission ID", "submissionId"),
+    ("Last updated", "updatedAt"),
+    ("Submission started", "startedAt"),
+    ("Status", "formStatus"),
+    ("First Name", "firstName"),
+    ("Preferred Name", "preferredName"),
+    ("Last Name", "lastName"),
+    ("Northeastern Email", "email"),
+    ("Major(s)", "majors"),
+    ("Minors(s)", "minors"),
+    ("Year", "year"),
+    ("NUID", "nuid"),
+    ("Expected Graduation Semester", "graduation"),
+    ("Previous Generate Experience", "experience"),
+    ("Url", "filloutUrl"),
+]
+# Fillout bookkeeping with no value to reviewers
+DROPPED_COLUMNS = ["Current step", "Errors", "Network ID"]
+# Fields an application needs before it is reviewable
+REQUIRED_FIELDS = ["firstName", "lastName", "email", "nuid", "year", "graduation"]
+# Everything except these ends up in the application's formData
+APPLICATION_FIELDS = [
+    "submissionId", "updatedAt", "startedAt", "formStatus", "email", "nuid", "filloutUrl",
+    "branch", "role", "branchKey", "roleLevel", "emailValid", ROW_COLUMN,
+    # added by utils.deduplication
+    "dedupEmail", "dedupNuid", "dedupName", "emailLocal", "nameKey",
+]
+# Same keyword rules as the backend's roster.classify_role (Level values)
+ROLE_LEVELS = [("executive", 4), ("director", 3), ("chief", 2), ("lead", 1)]
+
+
+def field_names(columns) -> dict:
+    renames = {}
+    for column in columns:
+        for prefix, name in FILLOUT_COLUMNS:
+            if column.startswith(prefix):
+                renames[column] = name
+                break
+        else:
+            # Free-text question titles become formData keys; Mongo keys can't contain "." or start with "$"
+            renames[column] = re.sub(r"[.$]", "", column).strip()
+    return renames
+
+
+def role_levels(roles: pd.Series) -> pd.Series:
+    lowered = roles.str.lower().fillna("")
+    conditions = [lowered.str.contains(word, regex=False) for word, _ in ROLE_LEVELS]
+    return pd.Series(np.select(conditions, [level for _, level in ROLE_LEVELS], 0), index=roles.index, dtype="int64")
+
+
+def clean_applications(df: pd.DataFrame, branch: str = "", role: str = "") -> pd.DataFrame:
+    '''
+    Typed, validated, de-duplicated applications. Column-wise (vectorized) only:
+    strings stripped and blank -> NA, emails lowercased, NUIDs digits-only,
+    timestamps parsed to UTC. `branch` / `role` fill in for forms that don't ask
+    (one Fillout form per branch and role). Rows with neither email nor NUID
+    can't be matched to anyone and are dropped; duplicate applicants are merged
+    afterwards by utils.deduplication.
+    '''
+    df = df.drop(columns=[c for c in DROPPED_COLUMNS if c in df.columns])
+    df = df.rename(columns=field_names(c for c in df.columns if c != ROW_COLUMN))
+    text = [c for c in df.columns if c != ROW_COLUMN]
+    df[text] = df[text].astype("string").apply(lambda s: s.str.strip()).replace("", pd.NA)
+
+    for column in REQUIRED_FIELDS + ["updatedAt", "startedAt", "branch", "role"]:
+        if column not in df.columns:
+            df[column] = pd.Series(pd.NA, index=df.index, dtype="string")
+    df["email"] = df["email"].str.lower()
+    df["nuid"] = df["nuid"].str.replace(r"\D", "", regex=True).replace("", pd.NA)
+    df["updatedAt"] = parse_fillout_time(df["updatedAt"])
+    df["startedAt"] = parse_fillout_time(df["startedAt"])
+    if "formStatus" in df.columns:
+        df["formStatus"] = df["formStatus"].astype("category")
+
+    df["branch"] = df["branch"].fillna(branch)
+    df["role"] = df["role"].fillna(role)
+    df["branchKey"] = df["branch"].str.strip().str.lower()
+    df["roleLevel"] = role_levels(df["role"])
+    # Same rule as validators.valid_email
+    df["emailValid"] = df["email"].str.contains("@northeastern.edu", regex=False).fillna(False).astype(bool)
+    return df[df["email"].notna() | df["nuid"].notna()].reset_index(drop=True)
+
+
+def form_fields(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if c not in APPLICATION_FIELDS]
 
-    # validate emails
-    df = df[df["email"].str.contains("@")]
 
 def get_branch_queues(df):
     return df.groupby("branch")
 
-def find_incompleted(df):
-    return df[df["experience"].isna()]..
+def find_incomplete(df):
+    '''Applications missing any required field'''
+    required = [c for c in REQUIRED_FIELDS if c in df.columns]
+    return df[df[required].isna().any(axis=1)]
 
 def find_unreviewed(df, reviewed_ids):
-    return df[~df['id'].isin(reviewed_ids)]
\ No newline at end of file
+    return df[~df['id'].isin(reviewed_ids)]
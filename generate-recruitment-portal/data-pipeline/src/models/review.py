@@ -1 +1,252 @@
-"""Module: Placeholder for Generate Recruitment Portal."""\n
\ No newline at end of file
+"""
+Review state behind api/review_queue.py.
+
+Applications sit in a DataFrame indexed by NUID (a unique index, so a lookup
+is a hash probe rather than a scan of every row) with categorical branch,
+status, reviewer and decision columns, plus set indexes by branch, status and
+reviewer. Every change is appended to a JSON-lines log before it is applied.
+On start the last snapshot (or the CSV export, the first time) is loaded and
+the log replayed on top; once the log grows it is folded into a new snapshot.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+from ..etl.transform import parse_fillout_time
+from ..utils.deduplication import normalize_nuids
+
+UNREVIEWED, IN_REVIEW, REVIEWED = "Unreviewed", "In Review", "Reviewed"
+STATUSES = [UNREVIEWED, IN_REVIEW, REVIEWED]
+DECISIONS = ["accept", "reject", "waitlist"]
+# Columns with a set index (value -> NUIDs)
+INDEXED = ["branch", "status", "reviewer"]
+# Log entries kept before they are folded into the snapshot
+COMPACT_EVERY = 1000
+
+
+def nuid_key(nuid: str) -> str:
+    """Same normalization as the stored index (digits, zero-padded), so "1234567" finds "001234567"."""
+    digits = re.sub(r"\D", "", str(nuid))
+    return digits.zfill(9) if digits else ""
+
+
+def applications_frame(raw: pd.DataFrame, branch: str = "") -> pd.DataFrame:
+    """
+    One row per NUID from a Fillout export, indexed by NUID; a resubmission
+    replaces the earlier one. Rows without a NUID can't be addressed by the
+    review API and are left out. `branch` fills in for exports without one.
+    """
+    df = raw.copy()
+    df["NUID"] = normalize_nuids(df["NUID"])
+    df = df[df["NUID"].notna()]
+    if "Last updated" in df.columns:
+        updated = parse_fillout_time(df["Last updated"].astype("string"))
+        df = df.assign(_updated=updated).sort_values("_updated", na_position="first", kind="stable")
+        df = df.drop(columns="_updated")
+    df = df.drop_duplicates("NUID", keep="last").set_index("NUID").fillna("")
+
+    for column, default in (("branch", branch), ("status", UNREVIEWED), ("reviewer", ""), ("decision", "")):
+        if column not in df.columns:
+            df[column] = default
+    df["branch"] = df["branch"].str.strip().str.lower().astype("category")
+    df["status"] = pd.Categorical(df["status"], categories=STATUSES)
+    df["reviewer"] = df["reviewer"].astype("category")
+    df["decision"] = pd.Categorical(df["decision"].str.lower(), categories=[""] + DECISIONS)
+    return df
+
+
+class ReviewStore:
+    """
+    Thread-safe (FastAPI runs the sync endpoints in a thread pool); every
+    method looks applications up by NUID or through the set indexes. NUIDs
+    may be given in any format (see nuid_key).
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        history: Optional[Dict[str, List[dict]]] = None,
+        seq: int = 0,
+        log_path: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
+    ):
+        self.frame = frame
+        self.history: Dict[str, List[dict]] = history or {}
+        # Number of the last log entry reflected in `frame`
+        self.seq = seq
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._log = None
+        self._pending = 0
+        self.indexes: Dict[str, Dict[str, Set[str]]] = {column: self._index(column) for column in INDEXED}
+
+    @classmethod
+    def open(cls, csv_path: str, log_path: str, snapshot_path: str, branch: str = "") -> "ReviewStore":
+        """Last snapshot (or the CSV export if there is none yet) plus the log written since."""
+        if os.path.exists(snapshot_path):
+            saved = pd.read_pickle(snapshot_path)
+            store = cls(saved["frame"], saved["history"], saved["seq"], log_path, snapshot_path)
+        else:
+            raw = pd.read_csv(csv_path, dtype=str)
+            store = cls(applications_frame(raw, branch), log_path=log_path, snapshot_path=snapshot_path)
+        store.replay()
+        return store
+
+    def _index(self, column: str) -> Dict[str, Set[str]]:
+        index = defaultdict(set)
+        for value, nuids in self.frame.groupby(column, observed=True).groups.items():
+            index[value] = set(nuids)
+        return index
+
+    # --- reads ---
+
+    # Reads take the lock too: a concurrent change swaps categorical columns and
+    # moves NUIDs between index sets, so an unlocked read could see half of it
+
+    def __contains__(self, nuid: str) -> bool:
+        return nuid_key(nuid) in self.frame.index
+
+    def get(self, nuid: str) -> Optional[dict]:
+        nuid = nuid_key(nuid)
+        with self._lock:
+            if nuid not in self.frame.index:
+                return None
+            return {"NUID": nuid, **self.frame.loc[nuid].to_dict(), "history": list(self.history.get(nuid, []))}
+
+    def get_history(self, nuid: str) -> List[dict]:
+        with self._lock:
+            return list(self.history.get(nuid_key(nuid), []))
+
+    def select(self, branch: str, status: Optional[str] = None) -> pd.DataFrame:
+        with self._lock:
+            nuids = self.indexes["branch"].get(branch, set())
+            if status is not None:
+                nuids = nuids & self.indexes["status"].get(status, set())
+            return self.frame.loc[sorted(nuids)].copy()
+
+    def count(self, branch: str, status: Optional[str] = None) -> int:
+        with self._lock:
+            nuids = self.indexes["branch"].get(branch, set())
+            if status is None:
+                return len(nuids)
+            return len(nuids & self.indexes["status"].get(status, set()))
+
+    def reviewer_decisions(self, reviewer: str) -> Dict[str, int]:
+        """Applications claimed by `reviewer`, counted by decision ("" = none yet)."""
+        with self._lock:
+            nuids = sorted(self.indexes["reviewer"].get(reviewer, set()))
+            counts = self.frame.loc[nuids, "decision"].value_counts()
+        return {decision: int(n) for decision, n in counts.items()}
+
+    # --- changes (checked, logged, then applied) ---
+
+    def claim(self, nuid: str, reviewer: str) -> bool:
+        """Take an unreviewed application; False if it is already in review or reviewed."""
+        nuid = nuid_key(nuid)
+        with self._lock:
+            if self.frame.at[nuid, "status"] != UNREVIEWED:
+                return False
+            self._record({"op": "claim", "nuid": nuid, "reviewer": reviewer})
+            return True
+
+    def release(self, nuid: str) -> bool:
+        """Mark an application in review as reviewed; False if it isn't in review."""
+        nuid = nuid_key(nuid)
+        with self._lock:
+            if self.frame.at[nuid, "status"] != IN_REVIEW:
+                return False
+            self._record({"op": "release", "nuid": nuid})
+            return True
+
+    def decide(self, nuid: str, decision: str, reviewer: str):
+        with self._lock:
+            self._record(
+                {"op": "decision", "nuid": nuid_key(nuid), "decision": decision.lower(), "reviewer": reviewer}
+            )
+
+    def _set(self, nuid: str, column: str, value: str):
+        if value not in self.frame[column].cat.categories:
+            self.frame[column] = self.frame[column].cat.add_categories([value])
+        if column in self.indexes:
+            index = self.indexes[column]
+            index[self.frame.at[nuid, column]].discard(nuid)
+            index[value].add(nuid)
+        self.frame.at[nuid, column] = value
+
+    def _apply(self, entry: dict):
+        nuid = entry["nuid"]
+        if entry["op"] == "claim":
+            self._set(nuid, "reviewer", entry["reviewer"])
+            self._set(nuid, "status", IN_REVIEW)
+        elif entry["op"] == "release":
+            self._set(nuid, "status", REVIEWED)
+        elif entry["op"] == "decision":
+            self._set(nuid, "decision", entry["decision"])
+            self.history.setdefault(nuid, []).append(
+                {"decision": entry["decision"], "reviewer": entry["reviewer"], "at": entry["at"]}
+            )
+        self.seq = entry["seq"]
+
+    def _record(self, entry: dict):
+        entry.update(seq=self.seq + 1, at=datetime.utcnow().isoformat())
+        if self.log_path:
+            if self._log is None:
+                self._log = open(self.log_path, "a")
+            self._log.write(json.dumps(entry) + "\n")
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        self._apply(entry)
+        self._pending += 1
+        if self._pending >= COMPACT_EVERY:
+            self.compact()
+
+    # --- persistence ---
+
+    def replay(self) -> int:
+        """Apply the log entries newer than the loaded state; returns how many."""
+        if not self.log_path or not os.path.exists(self.log_path):
+            return 0
+        applied, good = 0, 0
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if entry is None or not line.endswith(b"\n"):
+                    # A write cut short by a crash; everything before it is intact
+                    break
+                good += len(line)
+                if entry["seq"] <= self.seq or entry["nuid"] not in self.frame.index:
+                    continue
+                self._apply(entry)
+                applied += 1
+        if good < os.path.getsize(self.log_path):
+            # Cut the torn write off, or the next entry appended would be glued onto it
+            with open(self.log_path, "r+b") as f:
+                f.truncate(good)
+        self._pending = applied
+        return applied
+
+    def compact(self):
+        """Write the current state to the snapshot and start a new log."""
+        if not self.snapshot_path:
+            return
+        temp = self.snapshot_path + ".tmp"
+        pd.to_pickle({"frame": self.frame, "history": self.history, "seq": self.seq}, temp)
+        os.replace(temp, self.snapshot_path)
+        # Entries up to `seq` are in the snapshot, so a crash before this truncate only costs a re-read
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self.log_path:
+            open(self.log_path, "w").close()
+        self._pending = 0
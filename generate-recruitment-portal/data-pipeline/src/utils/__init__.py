@@ -1 +1 @@
-"""Package init for Generate Recruitment Portal."""\n
\ No newline at end of file
+"""Package init for Generate Recruitment Portal."""
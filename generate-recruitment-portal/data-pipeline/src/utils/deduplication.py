@@ -1 +1,187 @@
-"""Module: Placeholder for Generate Recruitment Portal."""\n
\ No newline at end of file
+"""
+Applicant de-duplication for the ETL.
+
+Records are normalized (email, NUID, name), then only records sharing a
+blocking key (same email, NUID, email local part or last name + first initial,
+within one branch and role) are compared, so the work grows with the block
+sizes rather than with all pairs. Candidate pairs are scored in bulk with
+numpy and linked into merge groups.
+
+The backend's create path applies the same rules one application at a time
+(backend/dedup.py); keep the two in step.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Pairs scoring at least this are the same applicant
+MERGE_THRESHOLD = 0.8
+# Fuzzy-key blocks bigger than this are skipped (a local part or name key shared that widely
+# is not identifying); exact-key blocks have no limit
+MAX_BLOCK = 50
+# Size of the hashed trigram signatures used for name / email similarity
+SIGNATURE_BITS = 512
+
+# Rows sharing one of these are the same applicant, however many there are
+EXACT_KEYS = ["dedupEmail", "dedupNuid"]
+# Rows sharing one of these only might be; their pairs are scored
+FUZZY_KEYS = ["emailLocal", "nameKey"]
+BLOCKING_KEYS = EXACT_KEYS + FUZZY_KEYS
+SCOPE = ["branchKey", "role"]
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def normalize_emails(emails: pd.Series) -> pd.Series:
+    """Lowercase, trimmed, without a "+tag" in the local part."""
+    emails = emails.astype("string").str.strip().str.lower()
+    return emails.str.replace(r"\+[^@]*@", "@", regex=True).replace("", pd.NA)
+
+
+def normalize_nuids(nuids: pd.Series) -> pd.Series:
+    """Digits only, zero-padded to NUID length (spreadsheets drop the leading zeros)."""
+    digits = nuids.astype("string").str.replace(r"\D", "", regex=True).replace("", pd.NA)
+    return digits.str.zfill(9)
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """ASCII-folded, lowercase letters and single spaces."""
+    folded = names.astype("string").str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    cleaned = folded.str.lower().str.replace(r"[^a-z ]+", "", regex=True).str.split().str.join(" ")
+    return cleaned.replace("", pd.NA)
+
+
+def add_dedup_keys(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    first = normalize_names(df.get("firstName", pd.Series(pd.NA, index=df.index)))
+    last = normalize_names(df.get("lastName", pd.Series(pd.NA, index=df.index)))
+    df["dedupEmail"] = normalize_emails(df["email"])
+    df["dedupNuid"] = normalize_nuids(df["nuid"])
+    df["dedupName"] = (first.fillna("") + " " + last.fillna("")).str.strip().replace("", pd.NA)
+    df["emailLocal"] = df["dedupEmail"].str.split("@").str[0]
+    # Last name + first initial: survives nicknames ("Alex" / "Alexander") and middle names
+    df["nameKey"] = last.str.split().str[-1] + " " + first.str[0]
+    return df
+
+
+def candidate_pairs(df: pd.DataFrame, keys=BLOCKING_KEYS, max_block: int = MAX_BLOCK) -> pd.DataFrame:
+    """
+    Positional (left, right) pairs, left < right, of rows sharing at least one
+    blocking key. Exact-key blocks are chained (each row paired with the next
+    one in its block), which links the whole block in linear time; fuzzy-key
+    blocks up to `max_block` rows are paired all against all.
+    """
+    rows = df[SCOPE + list(keys)].reset_index(drop=True)
+    rows[SCOPE] = rows[SCOPE].fillna("")
+    rows["_pos"] = np.arange(len(rows))
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for key in keys:
+        block = rows[rows[key].notna()][SCOPE + [key, "_pos"]]
+        if key in EXACT_KEYS:
+            block = block.sort_values(SCOPE + [key, "_pos"], kind="stable")
+            group = block[SCOPE + [key]]
+            same = (group == group.shift()).all(axis=1).to_numpy()
+            positions = block["_pos"].to_numpy()
+            pairs.append(np.column_stack([positions[:-1][same[1:]], positions[1:][same[1:]]]))
+            continue
+        sizes = block.groupby(SCOPE + [key])["_pos"].transform("size")
+        block = block[(sizes > 1) & (sizes <= max_block)]
+        joined = block.merge(block, on=SCOPE + [key])
+        joined = joined[joined["_pos_x"] < joined["_pos_y"]]
+        pairs.append(joined[["_pos_x", "_pos_y"]].to_numpy())
+    found = np.concatenate(pairs).astype(np.int64)
+    return pd.DataFrame(np.unique(found, axis=0), columns=["left", "right"])
+
+
+def trigram_signatures(texts: pd.Series, bits: int = SIGNATURE_BITS) -> np.ndarray:
+    """One packed bit-vector per text with a bit set for each (hashed) character trigram."""
+    signatures = np.zeros((len(texts), bits // 8), dtype=np.uint8)
+    positions = {}
+    rows, cols, masks = [], [], []
+    for row, text in enumerate(texts.fillna("")):
+        if not text:
+            # Missing values must not look alike
+            continue
+        padded = f"  {text} "
+        for i in range(len(padded) - 2):
+            trigram = padded[i:i + 3]
+            h = positions.get(trigram)
+            if h is None:
+                h = positions[trigram] = int.from_bytes(
+                    hashlib.blake2b(trigram.encode(), digest_size=4).digest(), "little"
+                ) % bits
+            rows.append(row)
+            cols.append(h >> 3)
+            masks.append(1 << (h & 7))
+    np.bitwise_or.at(signatures, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(masks, dtype=np.uint8))
+    return signatures
+
+
+def signature_similarity(signatures: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Jaccard similarity of the trigram sets for every (left, right) pair at once."""
+    a, b = signatures[left], signatures[right]
+    both = _POPCOUNT[a & b].sum(axis=1)
+    either = _POPCOUNT[a | b].sum(axis=1)
+    return np.where(either > 0, both / np.maximum(either, 1), 0.0)
+
+
+def score_pairs(df: pd.DataFrame, pairs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same person if both NUIDs are known and match, different people if they
+    differ (whatever the emails); otherwise same person if the emails match,
+    else 0.6 name + 0.4 email-local-part similarity.
+    """
+    left, right = pairs["left"].to_numpy(), pairs["right"].to_numpy()
+    nuid = df["dedupNuid"].fillna("").to_numpy(dtype=object)
+    email = df["dedupEmail"].fillna("").to_numpy(dtype=object)
+    nuid_known = (nuid[left] != "") & (nuid[right] != "")
+    same_nuid = nuid_known & (nuid[left] == nuid[right])
+    same_email = (email[left] != "") & (email[left] == email[right])
+
+    names = signature_similarity(trigram_signatures(df["dedupName"]), left, right)
+    locals_ = signature_similarity(trigram_signatures(df["emailLocal"]), left, right)
+    score = 0.6 * names + 0.4 * locals_
+    # NUID first: two known NUIDs decide it even when the emails match (as backend/dedup.match_score)
+    exact = np.where(nuid_known, same_nuid, same_email)
+    score = np.where(exact, 1.0, np.where(nuid_known, 0.0, score))
+    return pairs.assign(score=score, exact=exact)
+
+
+def merge_groups(n: int, pairs: pd.DataFrame, threshold: float = MERGE_THRESHOLD) -> np.ndarray:
+    """Group id per row (union-find over the matching pairs); unmatched rows are their own group."""
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for left, right in pairs.loc[pairs["score"] >= threshold, ["left", "right"]].itertuples(index=False):
+        root_left, root_right = find(left), find(right)
+        if root_left != root_right:
+            parent[max(root_left, root_right)] = min(root_left, root_right)
+    return np.array([find(i) for i in range(n)])
+
+
+def deduplicate(df: pd.DataFrame, threshold: float = MERGE_THRESHOLD):
+    """
+    Returns (deduplicated rows, merge groups). Each group keeps its most recently
+    updated row; the groups frame lists every merged group's member emails.
+    """
+    if df.empty:
+        return add_dedup_keys(df), pd.DataFrame(columns=["group", "size", "kept", "emails"])
+    df = add_dedup_keys(df).reset_index(drop=True)
+    pairs = score_pairs(df, candidate_pairs(df))
+    df["dedupGroup"] = merge_groups(len(df), pairs, threshold)
+
+    latest = df.sort_values(["updatedAt"], na_position="first", kind="stable")
+    kept = latest.drop_duplicates("dedupGroup", keep="last").sort_index()
+
+    sizes = df.groupby("dedupGroup").size()
+    merged = df[df["dedupGroup"].isin(sizes[sizes > 1].index)]
+    groups = merged.groupby("dedupGroup").agg(size=("email", "size"), emails=("email", lambda s: sorted(s.dropna())))
+    groups["kept"] = kept.set_index("dedupGroup").loc[groups.index, "email"]
+    return kept.drop(columns=["dedupGroup"]).reset_index(drop=True), groups.reset_index(names="group")
@@ -1 +1 @@
-"""Module: Placeholder for Generate Recruitment Portal."""\n
\ No newline at end of file
+"""Module: Placeholder for Generate Recruitment Portal."""
@@ -1 +1,141 @@
-"""Module: Placeholder for Generate Recruitment Portal."""\n
\ No newline at end of file
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.etl.extract import ROW_COLUMN
+from src.etl.transform import clean_applications
+from src.utils.deduplication import add_dedup_keys, candidate_pairs, deduplicate
+
+START = datetime(2025, 8, 6, 7, 22)
+
+
+def fillout_time(minutes: int) -> str:
+    return (START + timedelta(minutes=minutes)).strftime("%a %b %d %Y %H:%M:%S GMT-0400 (Eastern Daylight Time)")
+
+
+def fillout_row(first, last, email, nuid, minutes=0, **extra):
+    return {
+        "Submission ID": f"sub-{email or nuid}-{minutes}",
+        "Last updated": fillout_time(minutes),
+        "Submission started": fillout_time(minutes - 10),
+        "Status": "Finished",
+        "First Name": first,
+        "Last Name": last,
+        "Northeastern Email": email,
+        "NUID": nuid,
+        "Year (2025-26)": "Third",
+        "Expected Graduation Semester": "Spring 2027",
+        "Current step": "Ending",
+        "Errors": "",
+        **extra,
+    }
+
+
+def export(rows):
+    df = pd.DataFrame(rows, dtype="string")
+    df[ROW_COLUMN] = range(2, len(df) + 2)
+    return df
+
+
+def applicants(n):
+    return [
+        fillout_row(f"First{chr(97 + i % 26)}{i}", f"Last{i}", f"applicant{i}@northeastern.edu", f"{i + 1:09d}", i)
+        for i in range(n)
+    ]
+
+
+def test_clean_applications_types_and_normalizes_columns():
+    df = clean_applications(export([
+        fillout_row("  Ada ", "Lovelace", " ADA.L@Northeastern.edu ", "001-234-567", 5, **{"Why Generate?": "Build things."}),
+    ]), branch="Software", role="Technical Lead")
+    row = df.iloc[0]
+
+    assert row["firstName"] == "Ada"
+    assert row["email"] == "ada.l@northeastern.edu"
+    assert row["nuid"] == "001234567"
+    assert row["updatedAt"] == pd.Timestamp("2025-08-06 11:27", tz="UTC")
+    assert (row["branch"], row["branchKey"], row["role"], row["roleLevel"]) == ("Software", "software", "Technical Lead", 1)
+    assert bool(row["emailValid"])
+    assert row["Why Generate?"] == "Build things."
+    for dropped in ("Current step", "Errors"):
+        assert dropped not in df.columns
+
+
+def test_clean_applications_keeps_rows_with_either_identifier():
+    df = clean_applications(export([
+        fillout_row("Ada", "Lovelace", "ada@northeastern.edu", "", 0),
+        fillout_row("Grace", "Hopper", "", "002345678", 1),
+        fillout_row("Nobody", "Known", "  ", " ", 2),
+    ]))
+    assert df["firstName"].tolist() == ["Ada", "Grace"]
+    assert df["email"].isna().tolist() == [False, True]
+    assert not df["emailValid"].iloc[1]
+
+
+def test_clean_applications_flags_non_northeastern_email():
+    df = clean_applications(export([fillout_row("Ada", "Lovelace", "ada@gmail.com", "001234567")]))
+    assert not df["emailValid"].iloc[0]
+
+
+def test_deduplicate_merges_exact_and_fuzzy_matches():
+    df = clean_applications(export([
+        fillout_row("Jonathan", "Smith", "jsmith@northeastern.edu", "001234567", 0),
+        # Same NUID without its leading zeros, different email
+        fillout_row("Jonathan", "Smith", "jonathan.smith@northeastern.edu", "1234567", 10),
+        # +tag on the same address, no NUID
+        fillout_row("Jon", "Smith", "JSmith+apply@northeastern.edu", "", 20),
+        # Same name and a similar email, no NUID: fuzzy match
+        fillout_row("Jonathan", "Smith", "jsmith2@northeastern.edu", "", 30),
+        # Same name, different NUID and an unrelated email: a different person
+        fillout_row("Jonathan", "Smith", "smithj.eng@northeastern.edu", "009999999", 40),
+        fillout_row("Ada", "Lovelace", "ada@northeastern.edu", "002345678", 50),
+    ]), branch="Data", role="Member")
+    kept, groups = deduplicate(df)
+
+    assert sorted(kept["email"]) == ["ada@northeastern.edu", "jsmith2@northeastern.edu", "smithj.eng@northeastern.edu"]
+    assert len(groups) == 1
+    group = groups.iloc[0]
+    assert group["size"] == 4
+    # The most recently updated submission is the one kept
+    assert group["kept"] == "jsmith2@northeastern.edu"
+
+
+def test_deduplicate_keeps_different_nuids_apart_even_with_the_same_email():
+    # Same precedence as backend/dedup.match_score: known NUIDs decide it
+    df = clean_applications(export([
+        fillout_row("Jonathan", "Smith", "js@northeastern.edu", "001234567", 0),
+        fillout_row("Jonathan", "Smith", "js@northeastern.edu", "009999999", 1),
+    ]))
+    kept, groups = deduplicate(df)
+    assert kept["nuid"].tolist() == ["001234567", "009999999"]
+    assert groups.empty
+
+
+def test_deduplicate_only_merges_within_branch_and_role():
+    rows = [fillout_row("Ada", "Lovelace", "ada@northeastern.edu", "002345678", i) for i in range(2)]
+    df = clean_applications(export(rows))
+    df["branchKey"] = ["software", "hardware"]
+    kept, groups = deduplicate(df)
+    assert len(kept) == 2 and groups.empty
+
+
+def test_deduplicate_large_block_of_copies():
+    # Every applicant resubmitted 200 times: blocks far above MAX_BLOCK on the exact keys
+    copies = 200
+    base = applicants(77)
+    rows = [dict(row, **{"Last updated": fillout_time(copy)}) for copy in range(copies) for row in base]
+    df = clean_applications(export(rows), branch="Data", role="Member")
+    assert len(df) == 77 * copies
+
+    # Exact-key blocks are chained, not paired all against all
+    assert len(candidate_pairs(add_dedup_keys(df))) < 2 * len(df)
+    kept, groups = deduplicate(df)
+    assert len(kept) == 77
+    assert sorted(kept["email"]) == sorted(row["Northeastern Email"] for row in base)
+    assert (groups["size"] == copies).all()
+    assert (kept["updatedAt"] == pd.Timestamp(START + timedelta(minutes=copies - 1), tz="-04:00")).all()
+
+
+def test_deduplicate_empty_frame():
+    kept, groups = deduplicate(clean_applications(export([fillout_row("A", "B", "", "")])))
+    assert kept.empty and groups.empty
@@ -1 +1,144 @@
-"""Module: Placeholder for Generate Recruitment Portal."""\n
\ No newline at end of file
+import threading
+
+import pandas as pd
+import pytest
+
+from src.models import review
+from src.models.review import IN_REVIEW, REVIEWED, UNREVIEWED, ReviewStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    csv = tmp_path / "export.csv"
+    pd.DataFrame({
+        "NUID": ["1234567", "002345678", "003456789", "4567890"],
+        "First Name": ["Ada", "Grace", "Alan", "Edsger"],
+        "branch": ["Data", "data", "Software", "Data"],
+    }).to_csv(csv, index=False)
+    return {
+        "csv_path": str(csv),
+        "log_path": str(tmp_path / "changes.log"),
+        "snapshot_path": str(tmp_path / "snapshot.pkl"),
+    }
+
+
+def state(store):
+    return (
+        store.frame[["status", "reviewer", "decision"]].astype(str).to_dict("index"),
+        store.history,
+        store.seq,
+        {column: {k: v for k, v in index.items() if v} for column, index in store.indexes.items()},
+    )
+
+
+def test_loads_export_with_normalized_nuids(paths):
+    store = ReviewStore.open(**paths)
+    assert "001234567" in store and "1234567" in store
+    assert store.count("data") == 3
+    assert store.count("data", UNREVIEWED) == 3
+    assert store.get("4567890")["First Name"] == "Edsger"
+
+
+def test_changes_survive_a_restart(paths):
+    store = ReviewStore.open(**paths)
+    assert store.claim("1234567", "rev@x.com")
+    store.decide("1234567", "Accept", "rev@x.com")
+    assert store.release("1234567")
+    assert store.claim("2345678", "rev@x.com")
+
+    reopened = ReviewStore.open(**paths)
+    assert state(reopened) == state(store)
+    assert reopened.get("001234567")["status"] == REVIEWED
+    assert reopened.get_history("001234567")[0]["decision"] == "accept"
+    assert reopened.select("data", IN_REVIEW).index.tolist() == ["002345678"]
+    assert reopened.reviewer_decisions("rev@x.com") == {"": 1, "accept": 1, "reject": 0, "waitlist": 0}
+
+
+def test_claim_is_refused_once_taken(paths):
+    store = ReviewStore.open(**paths)
+    assert store.claim("1234567", "a@x.com")
+    assert not store.claim("1234567", "b@x.com")
+    assert not store.release("2345678")
+    assert store.get("1234567")["reviewer"] == "a@x.com"
+
+
+def test_concurrent_claims_have_one_winner(paths):
+    store = ReviewStore.open(**paths)
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(store.claim("1234567", f"r{i}@x.com")))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+
+    # Exactly one claim made it into the log
+    reopened = ReviewStore.open(**paths)
+    assert reopened.seq == 1
+    assert reopened.get("1234567")["reviewer"] == store.get("1234567")["reviewer"]
+
+
+def test_torn_last_line_is_ignored(paths):
+    store = ReviewStore.open(**paths)
+    store.claim("1234567", "a@x.com")
+    store.claim("2345678", "a@x.com")
+    with open(paths["log_path"], "a") as f:
+        f.write('{"op": "claim", "nuid": "003456')
+
+    reopened = ReviewStore.open(**paths)
+    assert reopened.seq == 2
+    assert reopened.get("3456789")["status"] == UNREVIEWED
+
+    # Changes made after the crash must survive the next restart
+    assert reopened.claim("3456789", "b@x.com")
+    reopened.decide("3456789", "waitlist", "b@x.com")
+    again = ReviewStore.open(**paths)
+    assert again.seq == 4
+    assert again.get("3456789")["status"] == IN_REVIEW
+    assert [entry["decision"] for entry in again.get_history("3456789")] == ["waitlist"]
+
+
+def test_compact_folds_the_log_into_the_snapshot(paths):
+    store = ReviewStore.open(**paths)
+    store.claim("1234567", "a@x.com")
+    store.decide("1234567", "reject", "a@x.com")
+    store.compact()
+    with open(paths["log_path"]) as f:
+        assert f.read() == ""
+
+    # Changes after the snapshot go to the fresh log and are replayed on top of it
+    store.claim("2345678", "b@x.com")
+    reopened = ReviewStore.open(**paths)
+    assert state(reopened) == state(store)
+    assert reopened.seq == 3
+
+
+def test_entries_already_in_the_snapshot_are_not_replayed(paths):
+    store = ReviewStore.open(**paths)
+    store.decide("1234567", "accept", "a@x.com")
+    log = open(paths["log_path"]).read()
+    store.compact()
+    # A crash between writing the snapshot and truncating the log leaves the old entries behind
+    with open(paths["log_path"], "w") as f:
+        f.write(log)
+
+    reopened = ReviewStore.open(**paths)
+    assert reopened.replay() == 0
+    assert len(reopened.get_history("1234567")) == 1
+
+
+def test_compacts_automatically(paths, monkeypatch):
+    monkeypatch.setattr(review, "COMPACT_EVERY", 3)
+    store = ReviewStore.open(**paths)
+    for nuid in ("1234567", "2345678", "3456789"):
+        store.claim(nuid, "a@x.com")
+    with open(paths["log_path"]) as f:
+        assert f.read() == ""
+    store.claim("4567890", "a@x.com")
+
+    reopened = ReviewStore.open(**paths)
+    assert reopened.seq == 4
+    assert reopened.count("data", IN_REVIEW) == 3